@@ -4,51 +4,202 @@ Calcula KPIs por actividad y sugiere mejoras sencillas.
 """
 import csv
 import argparse
-from collections import defaultdict
-from statistics import mean, stdev
 
+from event_store import add_store_args, store_filters
+from eventos import read_events
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
 
-def load_rows(path):
-    rows = []
-    with open(path) as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            # convertir tipos
-            r['duracion_min'] = int(r['duracion_min'])
-            r['rendimiento_kg'] = int(r['rendimiento_kg'])
-            r['humedad_pct'] = float(r['humedad_pct'])
-            r['defectos_kg'] = int(r['defectos_kg'])
-            r['operadores'] = int(r['operadores'])
-            rows.append(r)
+
+def load_rows(path, cache=False, db=None, **filtros):
+    """Eventos del CSV; con `db`, solo el tramo que cumple `filtros` leído del almacén SQLite."""
+    with stage('load'):
+        if db:
+            from event_store import open_store
+            with open_store(db, path) as store:
+                rows = list(store.query(order='rowid', **filtros))
+            count('rows', len(rows))
+            return rows
+        if cache:
+            from columnar_cache import load_columns
+            rows = list(load_columns(path).iter_rows())
+            count('rows', len(rows))
+            return rows
+        count_file(path)
+        # registros compactos (`Evento`), ya tipados
+        rows = list(read_events(path))
+        count('rows', len(rows))
     return rows
 
 
-def analyze(path):
-    rows = load_rows(path)
-    by_act = defaultdict(list)
-    for r in rows:
-        by_act[r['actividad']].append(r)
+class ActivityStats:
+    """Acumulador en línea de KPIs para una actividad.
 
-    results = {}
-    for act, recs in by_act.items():
-        duraciones = [x['duracion_min'] for x in recs]
-        rendimientos = [x['rendimiento_kg'] for x in recs]
-        defectos = [x['defectos_kg'] for x in recs]
-        hums = [x['humedad_pct'] for x in recs]
-        ops = [x['operadores'] for x in recs]
-
-        results[act] = {
-            'count': len(recs),
-            'duracion_mean': mean(duraciones),
-            'duracion_std': stdev(duraciones) if len(duraciones)>1 else 0,
-            'rendimiento_mean': mean(rendimientos),
-            'defectos_total': sum(defectos),
-            'defectos_pct': (sum(defectos)/sum(rendimientos))*100 if sum(rendimientos)>0 else 0,
-            'humedad_mean': mean(hums),
-            'operadores_mean': mean(ops),
+    Mantiene conteo, media/varianza de duración (Welford) y sumas del resto de
+    campos, por lo que la memoria es constante por grupo.
+    """
+    __slots__ = ('count', 'dur_mean', 'dur_m2', 'rend_sum', 'def_sum', 'hum_sum', 'ops_sum')
+
+    def __init__(self):
+        self.count = 0
+        self.dur_mean = 0.0
+        self.dur_m2 = 0.0
+        self.rend_sum = 0
+        self.def_sum = 0
+        self.hum_sum = 0.0
+        self.ops_sum = 0
+
+    def add(self, duracion, rendimiento, humedad, defectos, operadores):
+        self.count += 1
+        delta = duracion - self.dur_mean
+        self.dur_mean += delta / self.count
+        self.dur_m2 += delta * (duracion - self.dur_mean)
+        self.rend_sum += rendimiento
+        self.def_sum += defectos
+        self.hum_sum += humedad
+        self.ops_sum += operadores
+
+    def merge(self, other):
+        """Combina otro acumulador (fórmula paralela de Chan para la varianza)."""
+        if other.count == 0:
+            return self
+        n = self.count + other.count
+        delta = other.dur_mean - self.dur_mean
+        self.dur_m2 += other.dur_m2 + delta * delta * self.count * other.count / n
+        self.dur_mean += delta * other.count / n
+        self.count = n
+        self.rend_sum += other.rend_sum
+        self.def_sum += other.def_sum
+        self.hum_sum += other.hum_sum
+        self.ops_sum += other.ops_sum
+        return self
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d):
+        acc = cls()
+        for k in cls.__slots__:
+            setattr(acc, k, d[k])
+        return acc
+
+    def result(self):
+        n = self.count
+        return {
+            'count': n,
+            'duracion_mean': self.dur_mean,
+            'duracion_std': (self.dur_m2 / (n - 1)) ** 0.5 if n > 1 else 0,
+            'rendimiento_mean': self.rend_sum / n,
+            'defectos_total': self.def_sum,
+            'defectos_pct': (self.def_sum/self.rend_sum)*100 if self.rend_sum > 0 else 0,
+            'humedad_mean': self.hum_sum / n,
+            'operadores_mean': self.ops_sum / n,
         }
 
-    # imprimir resumen
+
+def stream_kpis(path, cache=False, db=None, **filtros):
+    """Recorre el CSV una sola vez y devuelve los KPIs por actividad.
+
+    Con `db` recorre solo las filas del almacén SQLite que cumplen `filtros`.
+    """
+    with stage('aggregate'):
+        if db:
+            from event_store import open_store
+            with open_store(db, path) as store:
+                results = _aggregate(store.rows(KPI_COLUMNS, order='rowid', **filtros))
+        elif cache:
+            from columnar_cache import load_columns
+            results = kpis_from_table(load_columns(path))
+        else:
+            count_file(path)
+            results = _stream_csv(path)
+        count('rows', sum(v['count'] for v in results.values()))
+    return results
+
+
+KPI_COLUMNS = ('actividad', 'duracion_min', 'rendimiento_kg', 'humedad_pct', 'defectos_kg', 'operadores')
+
+
+def _aggregate(rows):
+    """KPIs desde tuplas ya tipadas con las columnas de `KPI_COLUMNS`."""
+    stats = {}
+    for act, dur, rend, hum, defe, ops in rows:
+        acc = stats.get(act)
+        if acc is None:
+            acc = stats[act] = ActivityStats()
+        acc.add(dur, rend, hum, defe, ops)
+    return {act: acc.result() for act, acc in stats.items()}
+
+
+def _stream_csv(path):
+    stats = {}
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        i_act = header.index('actividad')
+        i_dur = header.index('duracion_min')
+        i_rend = header.index('rendimiento_kg')
+        i_hum = header.index('humedad_pct')
+        i_def = header.index('defectos_kg')
+        i_ops = header.index('operadores')
+        for r in reader:
+            if not r:
+                continue
+            acc = stats.get(r[i_act])
+            if acc is None:
+                acc = stats[r[i_act]] = ActivityStats()
+            acc.add(int(r[i_dur]), int(r[i_rend]), float(r[i_hum]), int(r[i_def]), int(r[i_ops]))
+    return {act: acc.result() for act, acc in stats.items()}
+
+
+def kpis_from_table(table):
+    """KPIs por actividad desde la caché columnar (agregación vectorizada con bincount)."""
+    import numpy as np
+
+    codes = table['actividad']
+    k = len(table.labels['actividad'])
+    count = np.bincount(codes, minlength=k)
+    dur = np.asarray(table['duracion_min'], dtype=np.float64)
+    dur_mean = np.bincount(codes, dur, minlength=k) / np.maximum(count, 1)
+    dev = dur - dur_mean[codes]
+    dur_m2 = np.bincount(codes, dev * dev, minlength=k)
+    rend = np.bincount(codes, table['rendimiento_kg'], minlength=k)
+    defe = np.bincount(codes, table['defectos_kg'], minlength=k)
+    hum = np.bincount(codes, table['humedad_pct'], minlength=k)
+    ops = np.bincount(codes, table['operadores'], minlength=k)
+
+    results = {}
+    for i, act in enumerate(table.labels['actividad']):
+        n = int(count[i])
+        if n == 0:
+            continue
+        acc = ActivityStats()
+        acc.count = n
+        acc.dur_mean = float(dur_mean[i])
+        acc.dur_m2 = float(dur_m2[i])
+        acc.rend_sum = int(rend[i])
+        acc.def_sum = int(defe[i])
+        acc.hum_sum = float(hum[i])
+        acc.ops_sum = int(ops[i])
+        results[act] = acc.result()
+    return results
+
+
+def suggestions(v):
+    """Sugerencias de mejora a partir de los KPIs de una actividad."""
+    sug = []
+    if v['duracion_std'] > v['duracion_mean'] * 0.15:
+        sug.append('Estandarizar tiempos / capacitar operadores')
+    if v['humedad_mean'] > 14:
+        sug.append('Revisar secado o almacenamiento de materia prima')
+    if v['defectos_pct'] > 1.0:
+        sug.append('Auditar control de calidad y calibración de equipos')
+    if v['operadores_mean'] > 4.5:
+        sug.append('Optimizar asignación de personal o automatizar tareas')
+    return sug
+
+
+def print_summary(results):
     print("KPIs por actividad:\n")
     for act, v in sorted(results.items()):
         print(f"Actividad: {act}")
@@ -58,16 +209,7 @@ def analyze(path):
         print(f"  Defectos totales (kg): {v['defectos_total']} ({v['defectos_pct']:.2f}% del total)")
         print(f"  Humedad media (%): {v['humedad_mean']:.2f}")
         print(f"  Operadores medios: {v['operadores_mean']:.2f}")
-        # sugerencias
-        sug = []
-        if v['duracion_std'] > v['duracion_mean'] * 0.15:
-            sug.append('Estandarizar tiempos / capacitar operadores')
-        if v['humedad_mean'] > 14:
-            sug.append('Revisar secado o almacenamiento de materia prima')
-        if v['defectos_pct'] > 1.0:
-            sug.append('Auditar control de calidad y calibración de equipos')
-        if v['operadores_mean'] > 4.5:
-            sug.append('Optimizar asignación de personal o automatizar tareas')
+        sug = suggestions(v)
         if sug:
             print('  Sugerencias:')
             for s in sug:
@@ -75,6 +217,12 @@ def analyze(path):
         print('')
 
 
+def analyze(path, cache=False, db=None, **filtros):
+    results = stream_kpis(path, cache, db, **filtros)
+    print_summary(results)
+    return results
+
+
 def to_markdown(results, out_path):
     with open(out_path, 'w') as f:
         f.write('# Reporte de análisis - Producción de Harina\n\n')
@@ -88,15 +236,7 @@ def to_markdown(results, out_path):
             f.write(f'- Humedad media (%): {v["humedad_mean"]:.2f}\n')
             f.write(f'- Operadores medios: {v["operadores_mean"]:.2f}\n')
             # sugerencias
-            sug = []
-            if v['duracion_std'] > v['duracion_mean'] * 0.15:
-                sug.append('Estandarizar tiempos / capacitar operadores')
-            if v['humedad_mean'] > 14:
-                sug.append('Revisar secado o almacenamiento de materia prima')
-            if v['defectos_pct'] > 1.0:
-                sug.append('Auditar control de calidad y calibración de equipos')
-            if v['operadores_mean'] > 4.5:
-                sug.append('Optimizar asignación de personal o automatizar tareas')
+            sug = suggestions(v)
             if sug:
                 f.write('\n**Sugerencias:**\n')
                 for s in sug:
@@ -108,61 +248,30 @@ if __name__ == '__main__':
     p = argparse.ArgumentParser()
     p.add_argument('--in', dest='infile', required=True, help='CSV de entrada')
     p.add_argument('--out', dest='outfile', required=False, help='Ruta de salida Markdown (.md)')
+    p.add_argument('--state', dest='state', required=False,
+                   help='JSON de estado persistido: solo procesa las filas agregadas desde la última corrida')
+    p.add_argument('--cache', action='store_true', help='Leer desde la caché columnar (<csv>.cols/)')
+    p.add_argument('--actividad', default=None, help='Con --db: solo esta actividad')
+    add_store_args(p)
+    add_profile_args(p)
     args = p.parse_args()
+    setup_profile(args, 'analyze_data')
     # ejecutar analisis y opcionalmente exportar
-    rows = load_rows(args.infile)
-    # reutilizar lógica de analyze pero retornando results
-    from collections import defaultdict
-    from statistics import mean, stdev
-
-    by_act = defaultdict(list)
-    for r in rows:
-        by_act[r['actividad']].append(r)
-
-    results = {}
-    for act, recs in by_act.items():
-        duraciones = [x['duracion_min'] for x in recs]
-        rendimientos = [x['rendimiento_kg'] for x in recs]
-        defectos = [x['defectos_kg'] for x in recs]
-        hums = [x['humedad_pct'] for x in recs]
-        ops = [x['operadores'] for x in recs]
-
-        results[act] = {
-            'count': len(recs),
-            'duracion_mean': mean(duraciones),
-            'duracion_std': stdev(duraciones) if len(duraciones)>1 else 0,
-            'rendimiento_mean': mean(rendimientos),
-            'defectos_total': sum(defectos),
-            'defectos_pct': (sum(defectos)/sum(rendimientos))*100 if sum(rendimientos)>0 else 0,
-            'humedad_mean': mean(hums),
-            'operadores_mean': mean(ops),
-        }
-
-    # imprimir resumen en consola (braindown)
-    print("KPIs por actividad:\n")
-    for act, v in sorted(results.items()):
-        print(f"Actividad: {act}")
-        print(f"  Registros: {v['count']}")
-        print(f"  Duración media (min): {v['duracion_mean']:.1f} ± {v['duracion_std']:.1f}")
-        print(f"  Rendimiento medio (kg): {v['rendimiento_mean']:.1f}")
-        print(f"  Defectos totales (kg): {v['defectos_total']} ({v['defectos_pct']:.2f}% del total)")
-        print(f"  Humedad media (%): {v['humedad_mean']:.2f}")
-        print(f"  Operadores medios: {v['operadores_mean']:.2f}")
-        sug = []
-        if v['duracion_std'] > v['duracion_mean'] * 0.15:
-            sug.append('Estandarizar tiempos / capacitar operadores')
-        if v['humedad_mean'] > 14:
-            sug.append('Revisar secado o almacenamiento de materia prima')
-        if v['defectos_pct'] > 1.0:
-            sug.append('Auditar control de calidad y calibración de equipos')
-        if v['operadores_mean'] > 4.5:
-            sug.append('Optimizar asignación de personal o automatizar tareas')
-        if sug:
-            print('  Sugerencias:')
-            for s in sug:
-                print(f'   - {s}')
-        print('')
+    if args.state:
+        from kpi_state import refresh, kpis_from_state
+        state, new_rows, rebuilt = refresh(args.infile, args.state)
+        print(f"Estado: {new_rows} filas nuevas{' (reconstruido)' if rebuilt else ''}\n")
+        results = kpis_from_state(state)
+        print_summary(results)
+    else:
+        filtros = store_filters(args)
+        if args.actividad:
+            filtros['actividad'] = args.actividad
+        if filtros and not args.db:
+            p.error('los filtros (--desde, --hasta, --shift, --lote, --area, --actividad) requieren --db')
+        results = analyze(args.infile, args.cache, args.db, **filtros)
 
     if args.outfile:
-        to_markdown(results, args.outfile)
+        with stage('write'):
+            to_markdown(results, args.outfile)
         print(f'Reporte Markdown escrito en {args.outfile}')
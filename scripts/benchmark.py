@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Banco de pruebas de rendimiento de los caminos críticos de los scripts.
+
+Genera datasets reproducibles (motor numpy de `generate_data`, semilla y fecha
+de inicio fijas) de 1k, 100k y 10M filas de actividad y mide, para cada uno:
+KPIs de `analyze_data`, `export_minitab.export`, los dos clasificadores Pareto,
+`calcular_capacidad`, `calcular_financiero` y cada función `plot_*`.
+
+Cada medición corre en un proceso nuevo, así el pico de RSS es el de ese
+caso y no arrastra memoria de los anteriores. Se reporta el mejor tiempo de
+`--repeats` corridas, el pico de RSS del proceso (carga de datos incluida) y,
+en una corrida aparte, el pico de memoria Python según `tracemalloc`.
+
+Los resultados van a un JSON; `--compare BASE.json` marca regresiones contra
+una línea base guardada (y termina con código 1 si las hay).
+
+Uso:
+  python3 scripts/benchmark.py --sizes 1k 100k --out data/.bench/resultados.json
+  python3 scripts/benchmark.py --sizes 1k 100k --compare data/.bench/base.json
+  python3 scripts/benchmark.py --results nuevo.json --compare base.json   # solo comparar
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from perfilado import add_profile_args, count, setup_profile, stage
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+BENCH_DIR = 'data/.bench'
+SIZES = ['1k', '100k', '10M']
+SEED = 42
+START = datetime(2024, 1, 1)
+ROWS_PER_LOT = 7  # actividades por lote en generate_data.ACTIVITIES
+
+LSE, LIE, TARGET = 140, 100, 120
+
+
+def parse_size(texto):
+    """'1k' → 1000, '10M' → 10_000_000 (filas de actividad)."""
+    mult = {'k': 1_000, 'm': 1_000_000}.get(texto[-1].lower(), 1)
+    return int(float(texto.rstrip('kKmM')) * mult)
+
+
+def dataset(size, seed=SEED):
+    """Ruta del dataset de `size` filas; se genera una sola vez (es determinista)."""
+    from generate_data import generate_fast
+
+    path = os.path.join(BENCH_DIR, f'harina_{size}_s{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        lotes = max(1, parse_size(size) // ROWS_PER_LOT)
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+            generate_fast(lotes, path + '.tmp', seed=seed, start_date=START)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+# --- Casos: nombre → (preparación(csv, workdir) → ctx, función a medir(ctx), llamadas por corrida)
+
+def _setup_path(path, workdir):
+    return {'path': path, 'workdir': workdir}
+
+
+def _setup_variabilidad(path, workdir):
+    from eventos import read_records
+    from export_minitab import MoliendaSink, export
+    export(path, workdir, sinks=[MoliendaSink()])
+    return {'rows': list(read_records(os.path.join(workdir, MoliendaSink.filename)))}
+
+
+def _setup_molienda(path, workdir):
+    from calcular_indicadores_lss import load_molienda_data
+    return {'data': load_molienda_data(path)}
+
+
+def _setup_plot(path, workdir):
+    from generar_graficos_minitab import load_data
+    return {'data': load_data(path), 'workdir': workdir}
+
+
+def _run_kpis(ctx):
+    from analyze_data import stream_kpis
+    stream_kpis(ctx['path'])
+
+
+def _run_export(ctx):
+    from export_minitab import export
+    export(ctx['path'], os.path.join(ctx['workdir'], 'export'))
+
+
+def _run_pareto(ctx):
+    from generate_pareto_molienda import CLASSIFIER
+    list(CLASSIFIER.classify_rows(ctx['rows']))
+
+
+def _run_reclasificar(ctx):
+    from reclassify_pareto_molienda import CLASSIFIER
+    list(CLASSIFIER.classify_rows(ctx['rows']))
+
+
+def _run_capacidad(ctx):
+    from calcular_indicadores_lss import calcular_capacidad
+    calcular_capacidad(ctx['data'], LSE, LIE, TARGET)
+
+
+def _run_financiero(ctx):
+    from calcular_indicadores_lss import calcular_financiero
+    calcular_financiero(45_300, 166_320)
+
+
+def _plot(nombre):
+    def run(ctx):
+        import generar_graficos_minitab as g
+        func, keys = g.CHARTS[nombre]
+        params = {'lse': LSE, 'lie': LIE, 'target': TARGET, 'decimate': None}
+        func(ctx['data'], ctx['workdir'], *[params[k] for k in keys])
+    return run
+
+
+BENCHES = {
+    'analyze_kpis': (_setup_path, _run_kpis, 1),
+    'export_minitab': (_setup_path, _run_export, 1),
+    'pareto_clasificar': (_setup_variabilidad, _run_pareto, 1),
+    'pareto_reclasificar': (_setup_variabilidad, _run_reclasificar, 1),
+    'calcular_capacidad': (_setup_molienda, _run_capacidad, 1),
+    'calcular_financiero': (_setup_path, _run_financiero, 1000),
+    'plot_imr_chart': (_setup_plot, _plot('imr'), 1),
+    'plot_capability': (_setup_plot, _plot('capacidad'), 1),
+    'plot_normal_probability': (_setup_plot, _plot('normalidad'), 1),
+    'plot_boxplot_by_shift': (_setup_plot, _plot('boxplot_turnos'), 1),
+    'plot_scatter_humidity': (_setup_plot, _plot('scatter_humedad'), 1),
+}
+
+
+def _maxrss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS, bytes
+    return rss / (1 << 20) if sys.platform == 'darwin' else rss / 1024
+
+
+def _measure(bench, path, workdir, repeats, trace):
+    """Corre en un proceso propio: prepara el caso y devuelve sus métricas."""
+    import tracemalloc
+
+    sys.path.insert(0, SCRIPTS_DIR)
+    os.makedirs(workdir, exist_ok=True)
+    setup, run, llamadas = BENCHES[bench]
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        ctx = setup(path, workdir)
+        rss_setup = _maxrss_mb()
+        tiempos = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            for _ in range(llamadas):
+                run(ctx)
+            tiempos.append((time.perf_counter() - t0) / llamadas)
+        rss_peak = _maxrss_mb()
+        traced = None
+        if trace:
+            tracemalloc.start()
+            run(ctx)
+            traced = tracemalloc.get_traced_memory()[1] / (1 << 20)
+            tracemalloc.stop()
+    return {
+        'segundos': min(tiempos),
+        'segundos_mediana': sorted(tiempos)[len(tiempos) // 2],
+        'repeticiones': repeats,
+        'rss_preparacion_mb': round(rss_setup, 1),
+        'rss_pico_mb': round(rss_peak, 1),
+        'tracemalloc_pico_mb': None if traced is None else round(traced, 2),
+    }
+
+
+def run_suite(sizes, benches, repeats=3, trace=True, log=print):
+    ctx = multiprocessing.get_context('spawn')
+    resultados = []
+    for size in sizes:
+        with stage('generate'):
+            path = dataset(size)
+        log(f'Dataset {size}: {path}')
+        for bench in benches:
+            count('cases')
+            workdir = os.path.join(BENCH_DIR, 'work', f'{size}_{bench}')
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                r = pool.submit(_measure, bench, path, workdir, repeats, trace).result()
+            r = {'tamano': size, 'filas': parse_size(size), 'caso': bench, **r}
+            resultados.append(r)
+            log(f"  {bench:<24} {r['segundos']:9.4f} s  RSS {r['rss_pico_mb']:8.1f} MB  "
+                f"tracemalloc {r['tracemalloc_pico_mb'] if trace else '-'} MB")
+    return {
+        'meta': {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'semilla': SEED,
+        },
+        'resultados': resultados,
+    }
+
+
+def compare(actual, base, tol_tiempo=0.20, tol_memoria=0.20, piso_segundos=0.005):
+    """Lista de regresiones: casos más lentos o con más memoria que la base más la tolerancia."""
+    previos = {(r['tamano'], r['caso']): r for r in base['resultados']}
+    regresiones = []
+    for r in actual['resultados']:
+        b = previos.get((r['tamano'], r['caso']))
+        if b is None:
+            continue
+        checks = [('segundos', tol_tiempo, piso_segundos), ('rss_pico_mb', tol_memoria, 1.0),
+                  ('tracemalloc_pico_mb', tol_memoria, 0.1)]
+        for campo, tol, piso in checks:
+            nuevo, viejo = r.get(campo), b.get(campo)
+            if nuevo is None or viejo is None:
+                continue
+            if nuevo > viejo * (1 + tol) and nuevo - viejo > piso:
+                regresiones.append({'tamano': r['tamano'], 'caso': r['caso'], 'metrica': campo,
+                                    'base': viejo, 'actual': nuevo, 'ratio': nuevo / viejo if viejo else None})
+    return regresiones
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--sizes', nargs='+', default=SIZES, help='Tamaños en filas (p. ej. 1k 100k 10M)')
+    p.add_argument('--bench', nargs='+', default=list(BENCHES), choices=list(BENCHES), help='Casos a medir')
+    p.add_argument('--repeats', type=int, default=3, help='Corridas por caso (se reporta la mejor)')
+    p.add_argument('--no-tracemalloc', action='store_true', help='Omitir la corrida con tracemalloc')
+    p.add_argument('--out', default=os.path.join(BENCH_DIR, 'resultados.json'), help='JSON de resultados')
+    p.add_argument('--results', default=None, help='Usar este JSON de resultados en vez de medir')
+    p.add_argument('--compare', default=None, help='JSON de línea base para detectar regresiones')
+    p.add_argument('--tol', type=float, default=0.20, help='Tolerancia relativa de tiempo y memoria')
+    add_profile_args(p)
+    args = p.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, SCRIPTS_DIR)
+    setup_profile(args, 'benchmark')
+    if args.results:
+        with open(args.results) as f:
+            actual = json.load(f)
+    else:
+        actual = run_suite(args.sizes, args.bench, args.repeats, not args.no_tracemalloc)
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(actual, f, indent=1)
+        print(f'Resultados en {args.out}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        regresiones = compare(actual, base, args.tol, args.tol)
+        for r in regresiones:
+            print(f"REGRESIÓN {r['tamano']} {r['caso']} {r['metrica']}: {r['base']} → {r['actual']}"
+                  + (f" (x{r['ratio']:.2f})" if r['ratio'] else ''))
+        print(f'{len(regresiones)} regresiones contra {args.compare}')
+        sys.exit(1 if regresiones else 0)
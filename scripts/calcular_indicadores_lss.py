@@ -2,24 +2,37 @@
 """Cálculo de indicadores financieros y de capacidad del proceso para el proyecto LSS.
 Genera valores de ROI, VAN, TIR, Payback y métricas Six Sigma (Cp, Cpk, nivel sigma).
 """
-import csv
 import math
 import random
+import argparse
 from statistics import mean, stdev
 
-def load_molienda_data(path):
-    """Carga datos de molienda del CSV."""
-    rows = []
-    with open(path) as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            if r['actividad'].lower() == 'molienda':
-                rows.append({
-                    'duracion_min': int(r['duracion_min']),
-                    'humedad_pct': float(r['humedad_pct']),
-                    'defectos_kg': int(r['defectos_kg']),
-                })
-    return rows
+from event_store import add_store_args, store_filters
+from estadistica import nivel_sigma, ppm_esperado
+from eventos import read_events, record_type
+from finanzas import tir as calcular_tir
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+
+PuntoCapacidad = record_type('PuntoCapacidad', ['duracion_min', 'humedad_pct', 'defectos_kg'], module=__name__)
+
+
+def load_molienda_data(path, cache=False, db=None, **filtros):
+    """Carga datos de molienda del CSV (con `db`, del almacén SQLite filtrado por `filtros`)."""
+    if db:
+        from event_store import open_store
+        with open_store(db, path) as store:
+            return [PuntoCapacidad(*r) for r in store.rows(PuntoCapacidad._fields, order='rowid',
+                                                           actividad='molienda', **filtros)]
+    if cache:
+        from columnar_cache import load_columns
+        table = load_columns(path, ['actividad', 'duracion_min', 'humedad_pct', 'defectos_kg'])
+        idx = table.mask('actividad', 'molienda', ignore_case=True).nonzero()[0]
+        return [PuntoCapacidad(d, h, k)
+                for d, h, k in zip(table['duracion_min'][idx].tolist(),
+                                   table['humedad_pct'][idx].tolist(),
+                                   table['defectos_kg'][idx].tolist())]
+    return [PuntoCapacidad(r.duracion_min, r.humedad_pct, r.defectos_kg)
+            for r in read_events(path) if r.actividad.lower() == 'molienda']
 
 
 def calcular_capacidad(data, lse, lie, target):
@@ -27,7 +40,24 @@ def calcular_capacidad(data, lse, lie, target):
     duraciones = [x['duracion_min'] for x in data]
     mu = mean(duraciones)
     sigma = stdev(duraciones)
+    defects = sum(1 for d in duraciones if d < lie or d > lse)
+    return _indicadores_capacidad(len(duraciones), mu, sigma, defects, lse, lie)
+
+
+def capacidad_desde_histograma(hist, lse, lie, target):
+    """Igual que `calcular_capacidad` pero a partir de un histograma {duracion: frecuencia}.
+
+    Permite calcular la capacidad desde el estado incremental (`kpi_state`)
+    sin volver a leer el CSV.
+    """
+    n = sum(hist.values())
+    mu = sum(d * c for d, c in hist.items()) / n
+    sigma = math.sqrt(sum(c * (d - mu) ** 2 for d, c in hist.items()) / (n - 1))
+    defects = sum(c for d, c in hist.items() if d < lie or d > lse)
+    return _indicadores_capacidad(n, mu, sigma, defects, lse, lie)
+
 
+def _indicadores_capacidad(n, mu, sigma, defects, lse, lie):
     # Cp y Cpk
     cp = (lse - lie) / (6 * sigma)
     cpk_upper = (lse - mu) / (3 * sigma)
@@ -39,32 +69,15 @@ def calcular_capacidad(data, lse, lie, target):
     ppk = cpk
 
     # % defectos
-    defects = sum(1 for d in duraciones if d < lie or d > lse)
-    pct_defects = (defects / len(duraciones)) * 100
+    pct_defects = (defects / n) * 100
 
-    # Nivel sigma (aproximado)
+    # Nivel sigma
     # DPMO = defects per million opportunities
-    dpmo = (defects / len(duraciones)) * 1_000_000
-    if dpmo >= 1_000_000:
-        nivel_sigma = 0
-    elif dpmo == 0:
-        nivel_sigma = 6.0  # Perfecto
-    else:
-        # Aproximación inversa normal estándar simplificada
-        p = 1 - dpmo/1_000_000
-        # Aproximación de Beasley-Springer-Moro para ppf
-        if p > 0.5:
-            t = math.sqrt(-2 * math.log(1 - p))
-        else:
-            t = math.sqrt(-2 * math.log(p))
-        c0, c1, c2 = 2.515517, 0.802853, 0.010328
-        d1, d2, d3 = 1.432788, 0.189269, 0.001308
-        nivel_sigma = t - (c0 + c1*t + c2*t*t) / (1 + d1*t + d2*t*t + d3*t*t*t)
-        if p < 0.5:
-            nivel_sigma = -nivel_sigma
+    dpmo = (defects / n) * 1_000_000
+    nivel = nivel_sigma(dpmo)
 
     return {
-        'n': len(duraciones),
+        'n': n,
         'mean': mu,
         'std': sigma,
         'cv': (sigma/mu)*100,
@@ -73,7 +86,9 @@ def calcular_capacidad(data, lse, lie, target):
         'pp': pp,
         'ppk': ppk,
         'pct_defects': pct_defects,
-        'nivel_sigma': nivel_sigma,
+        'ppm': dpmo,
+        'ppm_esperado': ppm_esperado(mu, sigma, lse, lie),
+        'nivel_sigma': nivel,
     }
 
 
@@ -84,15 +99,8 @@ def calcular_financiero(inversion, ahorro_anual, tasa_descuento=0.12, horizonte=
     # VAN
     van = sum(flujos[t] / ((1 + tasa_descuento)**t) for t in range(len(flujos)))
 
-    # TIR (aproximación iterativa)
-    tir = None
-    rate = 0.0
-    while rate < 2.0:
-        van_test = sum(flujos[t] / ((1 + rate)**t) for t in range(len(flujos)))
-        if van_test <= 0:
-            tir = rate
-            break
-        rate += 0.001
+    # TIR (Newton acotado con respaldo de Brent)
+    tir = calcular_tir(flujos)
 
     # ROI
     beneficio_total = ahorro_anual * horizonte
@@ -110,15 +118,25 @@ def calcular_financiero(inversion, ahorro_anual, tasa_descuento=0.12, horizonte=
 
     return {
         'van': van,
-        'tir': tir * 100 if tir else None,
+        'tir': tir * 100 if tir is not None else None,
         'roi': roi,
         'payback_meses': payback_meses,
     }
 
 
 if __name__ == '__main__':
-    # Cargar datos
-    data_actual = load_molienda_data('data/produccion_harina.csv')
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default='data/produccion_harina.csv', help='CSV de entrada')
+    p.add_argument('--state', dest='state', required=False,
+                   help='JSON de estado persistido: solo procesa las filas agregadas desde la última corrida')
+    p.add_argument('--cache', action='store_true', help='Leer desde la caché columnar (<csv>.cols/)')
+    add_store_args(p)
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'calcular_indicadores_lss')
+    filtros = store_filters(args)
+    if filtros and not args.db:
+        p.error('los filtros (--desde, --hasta, --shift, --lote, --area) requieren --db')
 
     # Parámetros especificación
     LSE = 140  # min
@@ -126,7 +144,19 @@ if __name__ == '__main__':
     TARGET = 120  # min
 
     # Calcular capacidad actual
-    cap_actual = calcular_capacidad(data_actual, LSE, LIE, TARGET)
+    if args.state:
+        from kpi_state import refresh, duration_histogram
+        state, _, _ = refresh(args.infile, args.state)
+        with stage('capacidad'):
+            cap_actual = capacidad_desde_histograma(duration_histogram(state, 'molienda'), LSE, LIE, TARGET)
+    else:
+        with stage('load'):
+            if not args.db:
+                count_file(args.infile)
+            data_actual = load_molienda_data(args.infile, args.cache, args.db, **filtros)
+            count('rows', len(data_actual))
+        with stage('capacidad'):
+            cap_actual = calcular_capacidad(data_actual, LSE, LIE, TARGET)
 
     print("=== INDICADORES DE CAPACIDAD DEL PROCESO (ACTUAL) ===\n")
     print(f"N (muestras):        {cap_actual['n']}")
@@ -138,6 +168,8 @@ if __name__ == '__main__':
     print(f"Pp:                  {cap_actual['pp']:.3f}")
     print(f"Ppk:                 {cap_actual['ppk']:.3f}")
     print(f"% Defectos:          {cap_actual['pct_defects']:.2f}%")
+    print(f"PPM (observado):     {cap_actual['ppm']:,.0f}")
+    print(f"PPM (ajuste normal): {cap_actual['ppm_esperado']:,.0f}")
     print(f"Nivel Sigma:         {cap_actual['nivel_sigma']:.2f}σ")
 
     # Simular proceso mejorado
@@ -152,19 +184,29 @@ if __name__ == '__main__':
     print(f"Cp proyectado:       {cap_mejorado['cp']:.3f}")
     print(f"Cpk proyectado:      {cap_mejorado['cpk']:.3f}")
     print(f"% Defectos:          {cap_mejorado['pct_defects']:.2f}%")
+    print(f"PPM (ajuste normal): {cap_mejorado['ppm_esperado']:,.0f}")
     print(f"Nivel Sigma:         {cap_mejorado['nivel_sigma']:.2f}σ")
 
+    # Intervalos Monte Carlo para la misma proyección (5000 réplicas de n=200)
+    from montecarlo_capacidad import simular_grilla
+    with stage('montecarlo'):
+        mc = {f['metrica']: f for f in simular_grilla([120], [8], n=200, replicas=5000, lse=LSE, lie=LIE, workers=1)}
+        count('replicas', 5000)
+    print(f"Cpk (IC 95% MC):     {mc['cpk']['p_lo']:.3f} – {mc['cpk']['p_hi']:.3f}")
+    print(f"% Defectos (IC 95%): {mc['pct_defects']['p_lo']:.2f}% – {mc['pct_defects']['p_hi']:.2f}%")
+
     # Indicadores financieros
     print("\n=== INDICADORES FINANCIEROS ===\n")
     INVERSION = 45_300  # S/
     AHORRO_ANUAL = 166_320  # S/
 
-    fin = calcular_financiero(INVERSION, AHORRO_ANUAL)
+    with stage('financiero'):
+        fin = calcular_financiero(INVERSION, AHORRO_ANUAL)
 
     print(f"Inversión total:     S/ {INVERSION:,.2f}")
     print(f"Ahorro anual:        S/ {AHORRO_ANUAL:,.2f}")
     print(f"VAN (3 años, 12%):   S/ {fin['van']:,.2f}")
-    print(f"TIR:                 {fin['tir']:.2f}%" if fin['tir'] else "TIR: >200%")
+    print(f"TIR:                 {fin['tir']:.2f}%" if fin['tir'] is not None else "TIR:                 no definida")
     print(f"ROI:                 {fin['roi']:.2f}%")
     print(f"Payback:             {fin['payback_meses']} meses ({fin['payback_meses']/12:.1f} años)")
 
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Generador de carga para `servidor_ingesta.py`: eventos por segundo sostenidos y latencia.
+
+Arma los eventos con `generate_data.generate_row` (lotes con la secuencia de
+actividades de `ACTIVITIES`), los serializa antes de medir y los envía por
+`--conexiones` sockets en paralelo, en tandas de `--tanda` líneas. La latencia
+de cada evento va desde que se escribió en el socket hasta que llega el
+`{"ack": N}` que lo cubre (es decir, hasta que el servidor lo escribió, con
+fsync según su política). `--tasa` limita los eventos/s totales (0 = lo más
+rápido posible, para medir el máximo sostenido).
+
+Uso:
+  python3 scripts/servidor_ingesta.py --port 7600 --out /tmp/linea.csv &
+  python3 scripts/carga_ingesta.py --port 7600 --eventos 200000 --conexiones 4
+  python3 scripts/carga_ingesta.py --port 7600 --eventos 50000 --tasa 2000 --out data/ingesta/carga.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from generate_data import ACTIVITIES, generate_row
+from servidor_ingesta import DEFAULT_PORT, percentil
+
+BATCH_LINES = 500
+
+
+def generar_lineas(n, seed=42, start=None, primer_lote=1):
+    """`n` eventos como líneas JSON (bytes), lote tras lote, con el generador fila a fila."""
+    random.seed(seed)
+    ts = start or datetime(2025, 1, 1)
+    lineas = []
+    i = primer_lote
+    while len(lineas) < n:
+        lote_id = f'L-{1000 + i}'
+        t = ts + timedelta(minutes=random.randint(0, 60 * 24))
+        for act, area in ACTIVITIES:
+            row, t = generate_row(lote_id, act, area, t)
+            lineas.append(json.dumps(row).encode() + b'\n')
+            t += timedelta(minutes=random.randint(5, 60))
+        ts += timedelta(minutes=random.randint(1, 30))
+        i += 1
+    return lineas[:n]
+
+
+async def _conexion(host, port, lineas, tanda, tasa):
+    """Envía `lineas` por un socket; devuelve (latencias en s, errores, instante de la última respuesta)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    enviados_t = []  # instante de envío de cada tanda
+    latencias = []
+    errores = []
+    fin = asyncio.get_running_loop().create_future()
+    total = len(lineas)
+
+    async def leer_acks():
+        confirmados = 0
+        while confirmados < total:
+            try:
+                linea = await reader.readline()
+            except ConnectionError:
+                break
+            if not linea:
+                break
+            r = json.loads(linea)
+            if 'error' in r:
+                errores.append(r)
+            else:
+                # el ack cubre los eventos aceptados en orden; con rechazos la tanda es aproximada
+                ahora = time.perf_counter()
+                nuevo = r['ack']
+                for k in range(confirmados, nuevo):
+                    latencias.append(ahora - enviados_t[min(k // tanda, len(enviados_t) - 1)])
+                confirmados = nuevo
+            if confirmados + len(errores) >= total:
+                break
+        fin.set_result(time.perf_counter())
+
+    lector = asyncio.create_task(leer_acks())
+    t0 = time.perf_counter()
+    for k in range(0, total, tanda):
+        if tasa:
+            # ritmo objetivo: la tanda k sale en t0 + k / tasa
+            espera = t0 + k / tasa - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+        enviados_t.append(time.perf_counter())
+        writer.writelines(lineas[k:k + tanda])
+        try:
+            await writer.drain()  # contrapresión: si el servidor no lee, esperamos acá
+        except ConnectionError:
+            break  # el servidor cerró (p. ej. se detuvo): se informa lo confirmado hasta acá
+    t_fin = await fin
+    await lector
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+    return latencias, errores, t_fin
+
+
+async def correr(host, port, lineas, conexiones, tanda, tasa):
+    partes = [lineas[i::conexiones] for i in range(conexiones)]
+    t0 = time.perf_counter()
+    res = await asyncio.gather(*[_conexion(host, port, parte, tanda, tasa / conexiones if tasa else 0)
+                                 for parte in partes if parte])
+    t1 = max(t for _, _, t in res)
+    latencias = sorted(l for lat, _, _ in res for l in lat)
+    errores = [e for _, errs, _ in res for e in errs]
+    ms = lambda s: None if s is None else round(s * 1000, 3)
+    return {
+        'eventos': len(lineas),
+        'confirmados': len(latencias),
+        'rechazados': len(errores),
+        'conexiones': conexiones,
+        'tanda': tanda,
+        'tasa_objetivo': tasa,
+        'segundos': round(t1 - t0, 3),
+        'eventos_por_s': round(len(latencias) / max(t1 - t0, 1e-9), 1),
+        'latencia_ms': {'p50': ms(percentil(latencias, 0.50)), 'p95': ms(percentil(latencias, 0.95)),
+                        'p99': ms(percentil(latencias, 0.99)), 'max': ms(latencias[-1] if latencias else None)},
+        'errores': errores[:10],
+    }
+
+
+async def pedir_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"cmd": "stats"}\n')
+    await writer.drain()
+    r = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return r.get('stats')
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--host', default='127.0.0.1', help='Servidor de ingesta')
+    p.add_argument('--port', type=int, default=DEFAULT_PORT, help='Puerto TCP')
+    p.add_argument('--eventos', type=int, default=100_000, help='Eventos a enviar')
+    p.add_argument('--conexiones', type=int, default=4, help='Sockets en paralelo')
+    p.add_argument('--tanda', type=int, default=BATCH_LINES, help='Líneas por escritura al socket')
+    p.add_argument('--tasa', type=float, default=0, help='Eventos/s totales (0: lo más rápido posible)')
+    p.add_argument('--seed', type=int, default=42, help='Semilla de generate_row')
+    p.add_argument('--start', default=None, help='Fecha ISO del primer lote')
+    p.add_argument('--stats', action='store_true', help='Mostrar también las métricas del servidor')
+    p.add_argument('--out', default=None, help='JSON con el resultado')
+    args = p.parse_args()
+    if args.eventos < 1 or args.conexiones < 1 or args.tanda < 1:
+        p.error('--eventos, --conexiones y --tanda deben ser positivos')
+
+    t0 = time.perf_counter()
+    lineas = generar_lineas(args.eventos, args.seed, datetime.fromisoformat(args.start) if args.start else None)
+    print(f'{len(lineas)} eventos generados en {time.perf_counter() - t0:.2f} s', file=sys.stderr)
+    try:
+        res = asyncio.run(correr(args.host, args.port, lineas, args.conexiones, args.tanda, args.tasa))
+        if args.stats:
+            res['servidor'] = asyncio.run(pedir_stats(args.host, args.port))
+    except ConnectionRefusedError:
+        sys.exit(f'No hay servidor de ingesta en {args.host}:{args.port}')
+
+    lat = res['latencia_ms']
+    print(f"{res['confirmados']} confirmados, {res['rechazados']} rechazados en {res['segundos']} s: "
+          f"{res['eventos_por_s']:.0f} eventos/s sostenidos")
+    print(f"Latencia hasta confirmación: p50 {lat['p50']} ms, p95 {lat['p95']} ms, "
+          f"p99 {lat['p99']} ms, máx {lat['max']} ms")
+    if args.stats and res['servidor']:
+        s = res['servidor']
+        print(f"Servidor: {s['eventos_por_lote']} eventos por lote, {s['fsyncs']} fsyncs, cola máx {s['cola_max']}")
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(res, f, indent=1, ensure_ascii=False)
+        print(f'Resultado en {args.out}')
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Caché columnar tipada de `produccion_harina.csv`.
+
+La primera lectura convierte el CSV a un directorio `<csv>.cols/` con un `.npy`
+por columna: enteros y flotantes ya tipados, `actividad`/`area`/`motivo_parada`/
+`notas` codificados por diccionario y `fecha_inicio`/`fecha_fin` como enteros
+(microsegundos desde epoch, sin zona horaria). Las corridas siguientes abren
+las columnas con memory-map si el CSV no cambió (mismo mtime y tamaño).
+
+Uso:
+  python3 scripts/columnar_cache.py --in data/produccion_harina.csv
+"""
+import csv
+import json
+import os
+import argparse
+import numpy as np
+
+from eventos import EVENT_INTERN, Evento, record_type
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+
+CACHE_VERSION = 1
+CHUNK_ROWS = 500_000
+
+INT_COLUMNS = ['duracion_min', 'rendimiento_kg', 'defectos_kg', 'operadores']
+FLOAT_COLUMNS = ['humedad_pct']
+TIME_COLUMNS = ['fecha_inicio', 'fecha_fin']
+CATEGORICAL_COLUMNS = ['actividad', 'area', 'motivo_parada', 'notas']
+TEXT_COLUMNS = ['lote_id']
+
+# orden de columnas del CSV original
+ALL_COLUMNS = ['lote_id', 'fecha_inicio', 'fecha_fin', 'actividad', 'area', 'duracion_min', 'rendimiento_kg',
+               'humedad_pct', 'defectos_kg', 'motivo_parada', 'operadores', 'notas']
+
+
+class ColumnarTable:
+    """Columnas de un CSV de eventos como arreglos NumPy.
+
+    `table['duracion_min']` devuelve el arreglo de la columna; para columnas
+    categóricas devuelve los códigos y `table.labels['area']` la lista de
+    etiquetas correspondientes.
+    """
+
+    def __init__(self, columns, labels, n):
+        self.columns = columns
+        self.labels = labels
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def code(self, name, value):
+        """Código de `value` en la columna categórica `name` (-1 si no aparece)."""
+        try:
+            return self.labels[name].index(value)
+        except ValueError:
+            return -1
+
+    def mask(self, name, value, ignore_case=False):
+        """Máscara booleana de filas cuya columna categórica es igual a `value`."""
+        labels = self.labels[name]
+        if ignore_case:
+            codes = [i for i, v in enumerate(labels) if v.lower() == value.lower()]
+        else:
+            codes = [i for i, v in enumerate(labels) if v == value]
+        return np.isin(self.columns[name], codes)
+
+    def decode(self, name, idx=None):
+        """Valores de texto de la columna `name` (opcionalmente solo las filas `idx`)."""
+        col = self.columns[name]
+        if idx is not None:
+            col = col[idx]
+        if name in CATEGORICAL_COLUMNS:
+            labels = self.labels[name]
+            return [labels[c] for c in col.tolist()]
+        if name in TIME_COLUMNS:
+            return iso_strings(col)
+        if name in TEXT_COLUMNS:
+            return np.char.decode(col, 'utf-8').tolist()
+        return col.tolist()
+
+    def iter_rows(self, idx=None):
+        """Filas como registros tipados (`eventos.Evento` si están todas las columnas)."""
+        names = [name for name in ALL_COLUMNS if name in self.columns]
+        cls = Evento if names == ALL_COLUMNS else record_type('Fila', names, intern=EVENT_INTERN)
+        cols = [self.decode(name, idx) for name in names]
+        for values in zip(*cols):
+            yield cls(*values)
+
+
+def iso_strings(us):
+    """Convierte microsegundos epoch a texto ISO igual que `datetime.isoformat()`."""
+    out = np.datetime_as_string(np.asarray(us).astype('datetime64[us]'), unit='us').tolist()
+    return [s[:-7] if s.endswith('.000000') else s for s in out]
+
+
+def cache_dir(csv_path):
+    return csv_path + '.cols'
+
+
+def _signature(csv_path):
+    st = os.stat(csv_path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+
+def _encode(values, labels, index):
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        c = index.get(v)
+        if c is None:
+            c = index[v] = len(labels)
+            labels.append(v)
+        codes[i] = c
+    return codes
+
+
+def build_cache(csv_path):
+    """Parsea el CSV por tramos y escribe las columnas tipadas en `<csv>.cols/`."""
+    out_dir = cache_dir(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+    sig = _signature(csv_path)
+    parts = {name: [] for name in ALL_COLUMNS}
+    labels = {name: [] for name in CATEGORICAL_COLUMNS}
+    index = {name: {} for name in CATEGORICAL_COLUMNS}
+    n = 0
+    with open(csv_path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        pos = {name: header.index(name) for name in parts}
+        while True:
+            chunk = [r for _, r in zip(range(CHUNK_ROWS), reader) if r]
+            if not chunk:
+                break
+            cols = list(zip(*chunk))
+            for name in INT_COLUMNS:
+                parts[name].append(np.array(cols[pos[name]], dtype=np.int64).astype(np.int32))
+            for name in FLOAT_COLUMNS:
+                parts[name].append(np.array(cols[pos[name]], dtype=np.float64))
+            for name in TIME_COLUMNS:
+                parts[name].append(np.array(cols[pos[name]], dtype='datetime64[us]').astype(np.int64))
+            for name in CATEGORICAL_COLUMNS:
+                parts[name].append(_encode(cols[pos[name]], labels[name], index[name]))
+            for name in TEXT_COLUMNS:
+                parts[name].append(np.char.encode(np.array(cols[pos[name]]), 'utf-8'))
+            n += len(chunk)
+
+    for name, chunks in parts.items():
+        if name in TEXT_COLUMNS:
+            width = max((c.dtype.itemsize for c in chunks), default=1)
+            arr = np.concatenate([c.astype(f'S{width}') for c in chunks]) if chunks else np.array([], dtype='S1')
+        else:
+            arr = np.concatenate(chunks) if chunks else np.array([], dtype=np.int64)
+        np.save(os.path.join(out_dir, f'{name}.npy'), arr)
+
+    meta = {'version': CACHE_VERSION, 'source': sig, 'n': n, 'labels': labels}
+    # meta.json se escribe al final: su presencia marca la caché como completa
+    tmp = os.path.join(out_dir, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(out_dir, 'meta.json'))
+    return meta
+
+
+def _valid_meta(csv_path):
+    path = os.path.join(cache_dir(csv_path), 'meta.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION or meta.get('source') != _signature(csv_path):
+        return None
+    return meta
+
+
+def load_columns(csv_path, columns=None, mmap=True):
+    """Devuelve un `ColumnarTable` del CSV, construyendo o refrescando la caché si hace falta."""
+    meta = _valid_meta(csv_path)
+    if meta is None:
+        with stage('parse'):
+            count_file(csv_path)
+            meta = build_cache(csv_path)
+            count('rows', meta['n'])
+    names = columns or ALL_COLUMNS
+    out_dir = cache_dir(csv_path)
+    # np.load no puede mapear archivos sin datos
+    mode = 'r' if mmap and meta['n'] > 0 else None
+    cols = {name: np.load(os.path.join(out_dir, f'{name}.npy'), mmap_mode=mode)
+            for name in names}
+    return ColumnarTable(cols, meta['labels'], meta['n'])
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', required=True, help='CSV de entrada')
+    p.add_argument('--rebuild', action='store_true', help='Reconstruir aunque la caché esté vigente')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'columnar_cache')
+    if args.rebuild or _valid_meta(args.infile) is None:
+        with stage('parse'):
+            count_file(args.infile)
+            meta = build_cache(args.infile)
+            count('rows', meta['n'])
+        print(f"Caché construida en {cache_dir(args.infile)}: {meta['n']} filas")
+    else:
+        print(f"Caché vigente en {cache_dir(args.infile)}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Operadores simultáneos por área y turno (barrido de intervalos).
+
+`minitab_operadores_agg.csv` promedia `operadores` por fecha y área, pero las
+actividades se superponen en el tiempo: ese promedio no muestra cuántos
+operadores hacen falta a la vez. Aquí cada actividad es un intervalo
+[`fecha_inicio`, `fecha_fin`) con peso `operadores`; se ordenan una sola vez
+los bordes (+peso al inicio, -peso al fin) y la suma acumulada da la función
+escalón exacta de operadores simultáneos por área, en O(n log n).
+
+Sobre esa función se calculan, por fecha, área y turno (los mismos límites de
+`timeutil`; la noche son los tramos 0-6 h y 22-24 h de cada fecha, igual que
+en los demás exportes): pico de operadores, promedio ponderado en el tiempo,
+utilización respecto de la dotación del área y porcentaje del turno con al
+menos un operador ocupado.
+
+Salidas (para Minitab):
+ - minitab_operadores_concurrencia.csv: fecha, área, turno, pico, medio, utilización
+ - minitab_operadores_escalones.csv: función escalón por área (desde, hasta, operadores)
+
+Uso:
+  python3 scripts/concurrencia.py --in data/produccion_harina.csv --out-dir data/minitab_exports
+  python3 scripts/concurrencia.py --in data/produccion_harina.csv --cache --capacidad Molienda=16
+"""
+import argparse
+import csv
+import os
+import numpy as np
+
+from generate_data import OPERADORES_AREA
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+from timeutil import SHIFT_BOUNDARIES, SHIFT_NAMES, epoch_seconds, shift_code
+
+CONCURRENCIA_FILE = 'minitab_operadores_concurrencia.csv'
+ESCALONES_FILE = 'minitab_operadores_escalones.csv'
+CONCURRENCIA_FIELDS = ('fecha', 'area', 'shift', 'horas', 'operadores_pico', 'operadores_medio',
+                       'utilizacion_pct', 'tiempo_activo_pct')
+ESCALONES_FIELDS = ('area', 'desde', 'hasta', 'duracion_min', 'operadores')
+
+DIA = 86400
+
+
+def step_function(inicio, fin, peso):
+    """Función escalón de la suma de intervalos [inicio, fin) con `peso`.
+
+    Devuelve `(t, nivel)`: a partir de `t[i]` y hasta `t[i+1]` hay `nivel[i]`
+    operadores simultáneos (el último nivel es 0). Los instantes repetidos y
+    los escalones sin cambio de nivel se colapsan.
+    """
+    inicio = np.asarray(inicio, dtype=np.float64)
+    fin = np.asarray(fin, dtype=np.float64)
+    peso = np.asarray(peso, dtype=np.int64)
+    t = np.concatenate([inicio, fin])
+    delta = np.concatenate([peso, -peso])
+    orden = np.argsort(t, kind='stable')  # el único ordenamiento: O(n log n)
+    t, nivel = t[orden], np.cumsum(delta[orden])
+    # en un mismo instante vale el nivel tras todos sus cambios
+    ultimo = np.r_[t[1:] != t[:-1], True] if len(t) else np.zeros(0, dtype=bool)
+    t, nivel = t[ultimo], nivel[ultimo]
+    cambia = np.r_[True, nivel[1:] != nivel[:-1]] if len(t) else np.zeros(0, dtype=bool)
+    return t[cambia], nivel[cambia]
+
+
+def shift_windows(t0, t1, boundaries=SHIFT_BOUNDARIES):
+    """Tramos de turno que cubren [t0, t1): (inicio, fin, día desde epoch, código de turno).
+
+    Cada día se corta en 0 h y en los límites de turno; la noche queda en dos
+    tramos (madrugada y cierre del día), ambos con la fecha de ese día.
+    """
+    cortes = sorted({0, *[h * 3600 for h in boundaries]})
+    codigos = [shift_code(c // 3600, boundaries) for c in cortes]
+    largos = np.diff(cortes + [DIA])
+    dias = np.arange(int(t0 // DIA), int(t1 // DIA) + 1)
+    k = len(cortes)
+    inicio = (dias[:, None] * DIA + np.array(cortes)[None, :]).ravel().astype(np.float64)
+    fin = inicio + np.tile(largos, len(dias))
+    return inicio, fin, np.repeat(dias, k), np.tile(codigos, len(dias))
+
+
+def _acumulada(t, nivel, x):
+    """Integral de la función escalón desde -inf hasta cada `x`."""
+    area = np.r_[0.0, np.cumsum(nivel[:-1] * np.diff(t))]
+    k = np.searchsorted(t, x, side='right') - 1
+    kk = np.maximum(k, 0)
+    return np.where(k < 0, 0.0, area[kk] + nivel[kk] * (x - t[kk]))
+
+
+def window_stats(t, nivel, a, b):
+    """Por ventana [a, b): (integral de operadores·s, segundos con operadores, pico)."""
+    if len(t) == 0:
+        ceros = np.zeros(len(a))
+        return ceros, ceros, ceros.astype(np.int64)
+    integral = _acumulada(t, nivel, b) - _acumulada(t, nivel, a)
+    activo = (nivel > 0).astype(np.int64)
+    segundos = _acumulada(t, activo, b) - _acumulada(t, activo, a)
+    # pico: máximo de los escalones vigentes en la ventana (un nivel 0 previo evita tramos vacíos)
+    tp = np.r_[min(t[0], a.min()) - 1, t]
+    nivp = np.r_[0, nivel, 0]
+    lo = np.searchsorted(tp, a, side='right') - 1
+    hi = np.searchsorted(tp, b, side='left')
+    pico = np.maximum.reduceat(nivp, np.column_stack([lo, hi]).ravel())[::2]
+    return integral, segundos, pico
+
+
+def concurrency(inicio, fin, ops, area, labels, capacidad=None, boundaries=SHIFT_BOUNDARIES):
+    """Función escalón y estadísticas por turno de cada área.
+
+    `area` son códigos enteros sobre `labels`; los tiempos, segundos desde
+    epoch. Devuelve {área: {'t', 'nivel', 'turnos', 'pico', 'pico_t',
+    'medio', 'utilizacion'}} con `turnos` como lista de filas de
+    `CONCURRENCIA_FIELDS`.
+    """
+    capacidad = {**OPERADORES_AREA, **(capacidad or {})}
+    inicio, fin = np.asarray(inicio, dtype=np.float64), np.asarray(fin, dtype=np.float64)
+    ops, area = np.asarray(ops), np.asarray(area)
+    resultado = {}
+    for code, nombre in enumerate(labels):
+        sel = area == code
+        if not sel.any():
+            continue
+        t, nivel = step_function(inicio[sel], fin[sel], ops[sel])
+        a, b, dias, turnos = shift_windows(t[0], t[-1], boundaries)
+        integral, segundos, pico = window_stats(t, nivel, a, b)
+        cap = capacidad.get(nombre)
+
+        # la noche tiene dos tramos por fecha: se combinan
+        grupos = {}
+        for d, s, ln, it, sg, pk in zip(dias.tolist(), turnos.tolist(), (b - a).tolist(), integral.tolist(),
+                                         segundos.tolist(), pico.tolist()):
+            g = grupos.setdefault((d, s), [0.0, 0.0, 0.0, 0])
+            g[0] += ln
+            g[1] += it
+            g[2] += sg
+            g[3] = max(g[3], pk)
+        fecha = dict(zip(dias.tolist(), np.datetime_as_string(dias.astype('datetime64[D]')).tolist()))
+        filas = []
+        for (d, s), (ln, it, sg, pk) in sorted(grupos.items()):
+            medio = it / ln
+            filas.append((fecha[d], nombre, SHIFT_NAMES[s], round(ln / 3600, 2), int(pk), round(medio, 4),
+                          round(medio / cap * 100, 2) if cap else '', round(sg / ln * 100, 2)))
+
+        total = t[-1] - t[0]
+        medio = float(np.sum(nivel[:-1] * np.diff(t)) / total) if total > 0 else 0.0
+        i_pico = int(np.argmax(nivel))
+        resultado[nombre] = {
+            't': t,
+            'nivel': nivel,
+            'turnos': filas,
+            'pico': int(nivel[i_pico]),
+            'pico_t': float(t[i_pico]),
+            'medio': medio,
+            'utilizacion': medio / cap if cap else None,
+            'capacidad': cap,
+        }
+    return resultado
+
+
+def load_intervals(path, cache=False):
+    """(inicio, fin, operadores, códigos de área, etiquetas) de un CSV de eventos."""
+    if cache:
+        from columnar_cache import load_columns
+        table = load_columns(path, ['fecha_inicio', 'fecha_fin', 'area', 'operadores'])
+        return (np.asarray(table['fecha_inicio']) / 1e6, np.asarray(table['fecha_fin']) / 1e6,
+                np.asarray(table['operadores']), np.asarray(table['area']), table.labels['area'])
+    from array import array
+    from eventos import read_events
+
+    count_file(path)
+    inicio, fin, ops, area = array('d'), array('d'), array('q'), array('q')
+    labels = {}
+    for ev in read_events(path):
+        inicio.append(epoch_seconds(ev.fecha_inicio))
+        fin.append(epoch_seconds(ev.fecha_fin))
+        ops.append(ev.operadores)
+        code = labels.get(ev.area)
+        if code is None:
+            code = labels[ev.area] = len(labels)
+        area.append(code)
+    return (np.frombuffer(inicio), np.frombuffer(fin), np.frombuffer(ops, dtype=np.int64),
+            np.frombuffer(area, dtype=np.int64), list(labels))
+
+
+def iso(segundos):
+    """Segundos desde epoch → texto ISO (sin fracción si es entera, como `isoformat`)."""
+    us = np.round(np.asarray(segundos) * 1e6).astype('datetime64[us]')
+    return [s[:-7] if s.endswith('.000000') else s for s in np.datetime_as_string(us, unit='us').tolist()]
+
+
+def shift_rows(resultado):
+    """Filas de `CONCURRENCIA_FIELDS` de todas las áreas, por fecha, área y turno."""
+    return sorted((fila for r in resultado.values() for fila in r['turnos']),
+                  key=lambda fila: (fila[0], fila[1], SHIFT_NAMES.index(fila[2])))
+
+
+def write_shift_table(resultado, path):
+    filas = shift_rows(resultado)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(CONCURRENCIA_FIELDS)
+        w.writerows(filas)
+    return len(filas)
+
+
+def write_steps(resultado, path):
+    n = 0
+    with open(path, 'w', newline='', buffering=1 << 20) as f:
+        w = csv.writer(f)
+        w.writerow(ESCALONES_FIELDS)
+        for nombre, r in sorted(resultado.items()):
+            t, nivel = r['t'], r['nivel']
+            txt = iso(t)
+            dur = np.round(np.diff(t) / 60, 2).tolist()
+            w.writerows(zip([nombre] * (len(t) - 1), txt[:-1], txt[1:], dur, nivel[:-1].tolist()))
+            n += len(t) - 1
+    return n
+
+
+def print_summary(resultado):
+    print('Operadores simultáneos por área:')
+    for nombre, r in sorted(resultado.items()):
+        util = f"{r['utilizacion']:.1%} de {r['capacidad']}" if r['utilizacion'] is not None else 's/d'
+        pico_peor = max(r['turnos'], key=lambda fila: fila[4])
+        print(f"  {nombre:<18} pico {r['pico']:>3} ({iso([r['pico_t']])[0]})  medio {r['medio']:6.2f}  "
+              f"utilización {util}  turno más cargado: {pico_peor[0]} {pico_peor[2]}")
+
+
+def _area_n(texto):
+    area, _, n = texto.partition('=')
+    if not area or not n.isdigit():
+        raise argparse.ArgumentTypeError('Formato AREA=N')
+    return area, int(n)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', required=True, help='CSV de eventos')
+    p.add_argument('--out-dir', dest='outdir', default='data/minitab_exports', help='Directorio de salida')
+    p.add_argument('--cache', action='store_true', help='Leer desde la caché columnar (<csv>.cols/)')
+    p.add_argument('--capacidad', type=_area_n, nargs='*', default=[],
+                   help=f'Dotación por área para la utilización, p. ej. Molienda=16 (por defecto {OPERADORES_AREA})')
+    p.add_argument('--sin-escalones', action='store_true', help='No escribir la función escalón completa')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'concurrencia')
+
+    with stage('load'):
+        inicio, fin, ops, area, labels = load_intervals(args.infile, args.cache)
+        count('intervals', len(inicio))
+    with stage('sweep'):
+        resultado = concurrency(inicio, fin, ops, area, labels, dict(args.capacidad))
+    os.makedirs(args.outdir, exist_ok=True)
+    with stage('write'):
+        salidas = [os.path.join(args.outdir, CONCURRENCIA_FILE)]
+        count('rows_written', write_shift_table(resultado, salidas[0]))
+        if not args.sin_escalones:
+            salidas.append(os.path.join(args.outdir, ESCALONES_FILE))
+            count('rows_written', write_steps(resultado, salidas[1]))
+    print_summary(resultado)
+    print('Archivos generados:')
+    for path in salidas:
+        print(' -', path)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Utilidades de la distribución normal estándar, vectorizadas y de alta precisión.
+
+- `norm_cdf` / `norm_sf`: vía `erfc` de Cody evaluada con NumPy (precisión de
+  máquina, también en colas).
+- `norm_ppf`: aproximación racional de Acklam (error relativo < 1.2e-9) más un
+  paso de refinamiento de Halley, que la lleva a precisión de máquina.
+- `nivel_sigma`: nivel sigma desde DPMO (sin desplazamiento de 1.5σ), con la
+  misma convención de extremos que usaba `calcular_capacidad`.
+- `ppm_esperado`: PPM fuera de especificación según el ajuste normal.
+
+Todas aceptan escalares o arreglos NumPy y devuelven lo mismo que reciben.
+"""
+import math
+import numpy as np
+
+# erfc de W. J. Cody (1969, rutina CALERF de SPECFUN): aproximaciones racionales por
+# tramos de |x|, con error relativo del orden de 1e-16; se evalúan con NumPy sobre todo el arreglo
+_ERF_A = (3.16112374387056560e+00, 1.13864154151050156e+02, 3.77485237685302021e+02,
+          3.20937758913846947e+03, 1.85777706184603153e-01)
+_ERF_B = (2.36012909523441209e+01, 2.44024637934444173e+02, 1.28261652607737228e+03,
+          2.84423683343917062e+03)
+_ERFC_C = (5.64188496988670089e-01, 8.88314979438837594e+00, 6.61191906371416295e+01,
+           2.98635138197400131e+02, 8.81952221241769090e+02, 1.71204761263407058e+03,
+           2.05107837782607147e+03, 1.23033935479799725e+03, 2.15311535474403846e-08)
+_ERFC_D = (1.57449261107098347e+01, 1.17693950891312499e+02, 5.37181101862009858e+02,
+           1.62138957456669019e+03, 3.29079923573345963e+03, 4.36261909014324716e+03,
+           3.43936767414372164e+03, 1.23033935480374942e+03)
+_ERFC_P = (3.05326634961232344e-01, 3.60344899949804439e-01, 1.25781726111229246e-01,
+           1.60837851487422766e-02, 6.58749161529837803e-04, 1.63153871373020978e-02)
+_ERFC_Q = (2.56852019228982242e+00, 1.87295284992346725e+00, 5.27905102951428412e-01,
+           6.05183413124413191e-02, 2.33520497626869185e-03)
+_ERF_UMBRAL = 0.46875
+_ERFC_XBIG = 27.3  # más allá erfc(x) es menor que el menor double positivo
+
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+_P_LOW = 0.02425
+
+
+def _salida(x, escalar):
+    return float(x) if escalar else x
+
+
+def _exp_menos_cuadrado(y):
+    """exp(-y²) sin perder precisión: y² se parte en una parte exacta (y truncado a 1/16) y un resto."""
+    yt = np.trunc(y * 16) / 16
+    return np.exp(-yt * yt) * np.exp(-(y - yt) * (y + yt))
+
+
+def _erfc_arr(x):
+    """erfc(x) elemento a elemento (Cody), para un arreglo de float."""
+    x = np.asarray(x, dtype=float)
+    y = np.abs(x)
+    out = np.full_like(x, np.nan)
+
+    # |x| <= 0.46875: erfc = 1 - erf, con erf racional en x²
+    m = y <= _ERF_UMBRAL
+    xs = x[m]
+    z = xs * xs
+    num = _ERF_A[4] * z
+    den = z
+    for a, b in zip(_ERF_A[:3], _ERF_B[:3]):
+        num = (num + a) * z
+        den = (den + b) * z
+    out[m] = 1 - xs * (num + _ERF_A[3]) / (den + _ERF_B[3])
+
+    # 0.46875 < |x| <= 4
+    m = (y > _ERF_UMBRAL) & (y <= 4)
+    ys = y[m]
+    num = _ERFC_C[8] * ys
+    den = ys
+    for c, d in zip(_ERFC_C[:7], _ERFC_D[:7]):
+        num = (num + c) * ys
+        den = (den + d) * ys
+    out[m] = _exp_menos_cuadrado(ys) * (num + _ERFC_C[7]) / (den + _ERFC_D[7])
+
+    # |x| > 4: desarrollo asintótico en 1/x²
+    m = y > 4
+    ys = np.minimum(y[m], _ERFC_XBIG)
+    z = 1 / (ys * ys)
+    num = _ERFC_P[5] * z
+    den = z
+    for p, q in zip(_ERFC_P[:4], _ERFC_Q[:4]):
+        num = (num + p) * z
+        den = (den + q) * z
+    r = (1 / math.sqrt(math.pi) - z * (num + _ERFC_P[4]) / (den + _ERFC_Q[4])) / ys
+    out[m] = np.where(y[m] < _ERFC_XBIG, _exp_menos_cuadrado(ys) * r, 0.0)
+
+    # erfc(-x) = 2 - erfc(x) fuera del tramo central
+    neg = (x < 0) & (y > _ERF_UMBRAL)
+    out[neg] = 2 - out[neg]
+    return out
+
+
+def norm_cdf(x):
+    """Φ(x) de la normal estándar."""
+    escalar = np.ndim(x) == 0
+    x = np.asarray(x, dtype=float)
+    return _salida(0.5 * _erfc_arr(-x / math.sqrt(2)), escalar)
+
+
+def norm_sf(x):
+    """1 - Φ(x), sin cancelación en la cola superior."""
+    escalar = np.ndim(x) == 0
+    x = np.asarray(x, dtype=float)
+    return _salida(0.5 * _erfc_arr(x / math.sqrt(2)), escalar)
+
+
+def _acklam(p):
+    x = np.empty_like(p)
+    bajo = p < _P_LOW
+    alto = p > 1 - _P_LOW
+    medio = ~(bajo | alto)
+
+    q = np.sqrt(-2 * np.log(p[bajo]))
+    x[bajo] = ((((((_C[0]*q + _C[1])*q + _C[2])*q + _C[3])*q + _C[4])*q + _C[5]) /
+               ((((_D[0]*q + _D[1])*q + _D[2])*q + _D[3])*q + 1))
+
+    q = p[medio] - 0.5
+    r = q * q
+    x[medio] = ((((((_A[0]*r + _A[1])*r + _A[2])*r + _A[3])*r + _A[4])*r + _A[5]) * q /
+                (((((_B[0]*r + _B[1])*r + _B[2])*r + _B[3])*r + _B[4])*r + 1))
+
+    q = np.sqrt(-2 * np.log1p(-p[alto]))
+    x[alto] = -((((((_C[0]*q + _C[1])*q + _C[2])*q + _C[3])*q + _C[4])*q + _C[5]) /
+                ((((_D[0]*q + _D[1])*q + _D[2])*q + _D[3])*q + 1))
+    return x
+
+
+def norm_ppf(p):
+    """Cuantil de la normal estándar: Φ⁻¹(p). Devuelve ±inf en 0/1 y NaN fuera de [0, 1]."""
+    escalar = np.ndim(p) == 0
+    p = np.asarray(p, dtype=float)
+    plano = p.ravel()
+    out = np.full(plano.shape, np.nan)
+    ok = (plano > 0) & (plano < 1)
+    pv = plano[ok]
+    x = _acklam(pv)
+    # refinamiento de Halley: e = Φ(x) - p (con la cola superior para p > 0.5)
+    cola = pv > 0.5
+    e = np.where(cola, (1 - pv) - 0.5 * _erfc_arr(x / math.sqrt(2)),
+                 0.5 * _erfc_arr(-x / math.sqrt(2)) - pv)
+    u = e * math.sqrt(2 * math.pi) * np.exp(x * x / 2)
+    out[ok] = x - u / (1 + x * u / 2)
+    out[plano == 0] = -np.inf
+    out[plano == 1] = np.inf
+    return _salida(out.reshape(p.shape), escalar)
+
+
+def nivel_sigma(dpmo):
+    """Nivel sigma (cuantil del rendimiento) desde DPMO: 6.0 si no hay defectos, 0 si todo es defecto."""
+    escalar = np.ndim(dpmo) == 0
+    dpmo = np.asarray(dpmo, dtype=float)
+    # Φ⁻¹(1 - dpmo/1e6) = -Φ⁻¹(dpmo/1e6): exacto también en la cola
+    with np.errstate(invalid='ignore'):
+        z = -np.asarray(norm_ppf(np.clip(dpmo, 0, 1_000_000) / 1_000_000))
+    z = np.where(dpmo >= 1_000_000, 0.0, np.where(dpmo <= 0, 6.0, z)) + 0.0
+    return _salida(z, escalar)
+
+
+def ppm_esperado(mu, sigma, lse, lie):
+    """PPM fuera de [lie, lse] esperadas si el proceso es N(mu, sigma)."""
+    return (norm_cdf((lie - mu) / sigma) + norm_sf((lse - mu) / sigma)) * 1_000_000
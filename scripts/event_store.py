@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Almacén de eventos en SQLite para consultas por lote, actividad, área, fecha o turno.
+
+Cada pregunta ("lotes de Molienda del martes en el turno noche", "todos los
+eventos de L-1042") dejaba de necesitar un recorrido completo del CSV: los
+eventos se cargan una vez en una base SQLite (modo WAL, transacciones por
+lotes de `BATCH_ROWS` filas) con índices sobre `lote_id`,
+`(actividad, fecha_inicio)` y `area`, más la columna derivada `shift`.
+
+La carga registra cada CSV en la tabla `fuentes` con su tamaño y mtime:
+`EventStore.sync(csv)` solo vuelve a cargar si el archivo cambió (en ese caso
+reemplaza las filas de esa fuente). `actividad` y `area` se comparan sin
+distinguir mayúsculas, igual que los cargadores (`.lower() == 'molienda'`).
+
+Los cargadores `analyze_data.load_rows`, `calcular_indicadores_lss.load_molienda_data`
+y `generar_graficos_minitab.load_data` aceptan `db=` y filtros (`desde`,
+`hasta`, `shift`, `lote_id`, `area`, ...) para leer solo ese tramo; los
+scripts lo exponen con `--db` y los mismos filtros (`add_store_args`).
+
+Uso:
+  python3 scripts/event_store.py --db data/eventos.sqlite --in data/produccion_harina.csv   # cargar/refrescar
+  python3 scripts/event_store.py --db data/eventos.sqlite --lote L-1042
+  python3 scripts/event_store.py --db data/eventos.sqlite --actividad Molienda --desde 2025-10-14 --hasta 2025-10-15 --shift Night
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from itertools import islice
+from operator import itemgetter
+
+from eventos import Evento
+from generate_data import FIELDNAMES
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+from timeutil import SHIFT_NAMES, infer_shift
+
+DEFAULT_DB = 'data/eventos.sqlite'
+BATCH_ROWS = 50_000
+
+COLUMN_TYPES = {
+    'lote_id': 'TEXT NOT NULL',
+    'fecha_inicio': 'TEXT NOT NULL',
+    'fecha_fin': 'TEXT NOT NULL',
+    'actividad': 'TEXT NOT NULL COLLATE NOCASE',
+    'area': 'TEXT NOT NULL COLLATE NOCASE',
+    'duracion_min': 'INTEGER',
+    'rendimiento_kg': 'INTEGER',
+    'humedad_pct': 'REAL',
+    'defectos_kg': 'INTEGER',
+    'motivo_parada': 'TEXT',
+    'operadores': 'INTEGER',
+    'notas': 'TEXT',
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS fuentes (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    filas INTEGER,
+    cargado TEXT
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    {', '.join(f'{c} {COLUMN_TYPES[c]}' for c in FIELDNAMES)},
+    shift TEXT,
+    fuente INTEGER REFERENCES fuentes(id)
+);
+"""
+
+INDEXES = {
+    'idx_eventos_lote': 'lote_id',
+    'idx_eventos_actividad_fecha': 'actividad, fecha_inicio',
+    'idx_eventos_area': 'area',
+}
+
+# filtro → (expresión SQL, operador)
+FILTERS = {
+    'lote_id': ('lote_id', '='),
+    'actividad': ('actividad', '='),
+    'area': ('area', '='),
+    'shift': ('shift', '='),
+    'desde': ('fecha_inicio', '>='),
+    'hasta': ('fecha_inicio', '<'),
+}
+
+_SELECT = ', '.join(FIELDNAMES)
+
+
+def _iso(valor):
+    """Fechas como texto ISO comparable con `fecha_inicio` (acepta str, date o datetime)."""
+    return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+
+def where_clause(filtros):
+    """Cláusula WHERE y parámetros para los filtros (los valores None se ignoran)."""
+    conds, params = [], []
+    for nombre, valor in filtros.items():
+        if valor is None:
+            continue
+        if nombre not in FILTERS:
+            raise ValueError(f'Filtro desconocido: {nombre} (válidos: {", ".join(FILTERS)})')
+        col, op = FILTERS[nombre]
+        if isinstance(valor, (list, tuple, set)):
+            conds.append(f'{col} IN ({", ".join("?" * len(valor))})')
+            params.extend(valor)
+        else:
+            conds.append(f'{col} {op} ?')
+            params.append(_iso(valor) if nombre in ('desde', 'hasta') else valor)
+    return (' WHERE ' + ' AND '.join(conds) if conds else ''), params
+
+
+def _order_by(order):
+    """Cláusula ORDER BY validada (`order`: columnas separadas por coma o None)."""
+    if not order:
+        return ''
+    cols = [c.strip() for c in order.split(',')]
+    for c in cols:
+        if c not in COLUMN_TYPES and c not in ('shift', 'rowid'):
+            raise ValueError(f'Columna de orden desconocida: {c}')
+    return ' ORDER BY ' + ', '.join(cols)
+
+
+class EventStore:
+    """Conexión al almacén; se usa como context manager."""
+
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    # --- carga
+
+    def _source(self, csv_path):
+        st = os.stat(csv_path)
+        row = self.conn.execute('SELECT id, size, mtime_ns FROM fuentes WHERE path = ?',
+                                (os.path.abspath(csv_path),)).fetchone()
+        return row, st
+
+    def is_current(self, csv_path):
+        row, st = self._source(csv_path)
+        return row is not None and row[1:] == (st.st_size, st.st_mtime_ns)
+
+    def sync(self, csv_path, batch=BATCH_ROWS):
+        """Carga `csv_path` si no está o cambió desde la última carga. Devuelve filas cargadas (0 si estaba al día)."""
+        if self.is_current(csv_path):
+            return 0
+        return self.ingest(csv_path, batch)
+
+    def ingest(self, csv_path, batch=BATCH_ROWS):
+        """Carga (o recarga) un CSV con el esquema de `produccion_harina.csv` en transacciones de `batch` filas.
+
+        El tamaño y mtime de la fuente se registran recién al terminar: si la
+        carga falla a mitad, `sync` la vuelve a intentar desde cero.
+        """
+        row, st = self._source(csv_path)
+        conn = self.conn
+        with conn:
+            if row is not None:
+                conn.execute('DELETE FROM eventos WHERE fuente = ?', (row[0],))
+                conn.execute('DELETE FROM fuentes WHERE id = ?', (row[0],))
+            fuente = conn.execute('INSERT INTO fuentes (path) VALUES (?)', (os.path.abspath(csv_path),)).lastrowid
+        # tabla vacía: los índices se crean al final (la carga masiva sin índices es más rápida)
+        vacia = conn.execute('SELECT 1 FROM eventos LIMIT 1').fetchone() is None
+        if vacia:
+            self.drop_indexes()
+
+        count_file(csv_path)
+        total = 0
+        sql = f'INSERT INTO eventos ({_SELECT}, shift, fuente) VALUES ({", ".join("?" * (len(FIELDNAMES) + 2))})'
+        try:
+            with open(csv_path, newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                pick = itemgetter(*[header.index(c) for c in FIELDNAMES])
+                i_ini = header.index('fecha_inicio')
+                # la afinidad de tipos de SQLite convierte el texto a INTEGER/REAL
+                filas = (pick(r) + (infer_shift(r[i_ini]), fuente) for r in reader if r)
+                while True:
+                    bloque = list(islice(filas, batch))
+                    if not bloque:
+                        break
+                    with conn:
+                        conn.executemany(sql, bloque)
+                    total += len(bloque)
+                    count('rows_ingested', len(bloque))
+            with conn:
+                conn.execute('UPDATE fuentes SET size = ?, mtime_ns = ?, filas = ?, cargado = ? WHERE id = ?',
+                             (st.st_size, st.st_mtime_ns, total, time.strftime('%Y-%m-%dT%H:%M:%S'), fuente))
+        finally:
+            self.create_indexes()
+        return total
+
+    def create_indexes(self):
+        with self.conn:
+            for nombre, cols in INDEXES.items():
+                self.conn.execute(f'CREATE INDEX IF NOT EXISTS {nombre} ON eventos ({cols})')
+            self.conn.execute('ANALYZE')
+
+    def drop_indexes(self):
+        with self.conn:
+            for nombre in INDEXES:
+                self.conn.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+    # --- consultas
+
+    def query(self, order='fecha_inicio', limit=None, **filtros):
+        """Eventos (`Evento`) que cumplen los filtros, ordenados por `order` (None: sin ordenar).
+
+        `order` es una columna o varias separadas por coma; `'rowid'` es el
+        orden de carga, es decir, el del CSV.
+        """
+        where, params = where_clause(filtros)
+        sql = f'SELECT {_SELECT} FROM eventos{where}'
+        sql += _order_by(order)
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        for row in self.conn.execute(sql, params):
+            yield Evento(*row)
+
+    def rows(self, columns, order=None, **filtros):
+        """Tuplas con solo `columns` (más liviano que `query` para agregaciones)."""
+        for c in columns:
+            if c not in COLUMN_TYPES and c != 'shift':
+                raise ValueError(f'Columna desconocida: {c}')
+        where, params = where_clause(filtros)
+        sql = f'SELECT {", ".join(columns)} FROM eventos{where}' + _order_by(order)
+        return self.conn.execute(sql, params)
+
+    def lote(self, lote_id):
+        """Todos los eventos de un lote, en orden cronológico."""
+        return list(self.query(lote_id=lote_id))
+
+    def count(self, **filtros):
+        where, params = where_clause(filtros)
+        return self.conn.execute(f'SELECT COUNT(*) FROM eventos{where}', params).fetchone()[0]
+
+    def explain(self, **filtros):
+        """Plan de consulta de SQLite (para comprobar qué índice se usa)."""
+        where, params = where_clause(filtros)
+        return [r[-1] for r in self.conn.execute(f'EXPLAIN QUERY PLAN SELECT {_SELECT} FROM eventos{where}', params)]
+
+
+def open_store(db, csv_path=None):
+    """Abre el almacén y, si se indica `csv_path`, lo refresca cuando el CSV cambió."""
+    store = EventStore(db)
+    if csv_path and os.path.exists(csv_path):
+        with stage('ingest'):
+            store.sync(csv_path)
+    return store
+
+
+def add_store_args(parser, db=None):
+    """Agrega `--db` (por defecto `db`) y los filtros de tramo a un script que lee eventos."""
+    parser.add_argument('--db', default=db,
+                        help='Leer desde el almacén SQLite (se carga o refresca desde --in si cambió)')
+    parser.add_argument('--desde', default=None, help='Con --db: fecha_inicio >= DESDE (ISO)')
+    parser.add_argument('--hasta', default=None, help='Con --db: fecha_inicio < HASTA (ISO)')
+    parser.add_argument('--shift', choices=SHIFT_NAMES, default=None, help='Con --db: solo este turno')
+    parser.add_argument('--lote', dest='lote_id', default=None, help='Con --db: solo este lote')
+    parser.add_argument('--area', default=None, help='Con --db: solo esta área')
+    return parser
+
+
+def store_filters(args, *nombres):
+    """Filtros del almacén presentes en `args` (todos o solo `nombres`)."""
+    nombres = nombres or ('desde', 'hasta', 'shift', 'lote_id', 'area')
+    return {n: getattr(args, n) for n in nombres if getattr(args, n, None) is not None}
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default=None, help='CSV a cargar (solo si cambió desde la última carga)')
+    p.add_argument('--force', action='store_true', help='Con --in: recargar aunque no haya cambiado')
+    p.add_argument('--actividad', default=None, help='Filtrar por actividad')
+    p.add_argument('--count', action='store_true', help='Mostrar solo la cantidad de eventos')
+    p.add_argument('--limit', type=int, default=None, help='Máximo de eventos a mostrar')
+    p.add_argument('--out', default=None, help='CSV de salida (por defecto, la consola)')
+    p.add_argument('--explain', action='store_true', help='Mostrar el plan de consulta')
+    add_store_args(p, DEFAULT_DB)
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'event_store')
+
+    with EventStore(args.db) as store:
+        if args.infile:
+            with stage('ingest'):
+                t0 = time.perf_counter()
+                n = store.ingest(args.infile) if args.force else store.sync(args.infile)
+            msg = f'{n} eventos cargados en {time.perf_counter() - t0:.2f} s' if n else 'ya estaba al día'
+            print(f'{args.infile}: {msg} ({args.db})', file=sys.stderr)
+        filtros = {**store_filters(args), 'actividad': args.actividad}
+        if args.explain:
+            for linea in store.explain(**filtros):
+                print(linea, file=sys.stderr)
+        if args.count:
+            print(store.count(**filtros))
+        elif any(v is not None for v in filtros.values()) or args.out:
+            with stage('query'):
+                out = open(args.out, 'w', newline='') if args.out else sys.stdout
+                w = csv.writer(out)
+                w.writerow(FIELDNAMES)
+                n = 0
+                for ev in store.query(limit=args.limit, **filtros):
+                    w.writerow(ev.values())
+                    n += 1
+                count('rows', n)
+                if args.out:
+                    out.close()
+                    print(f'{n} eventos en {args.out}', file=sys.stderr)
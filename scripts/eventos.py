@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Representación compacta de eventos (filas de los CSV de producción).
+
+Un dict por fila cuesta varios cientos de bytes (tabla hash más una clave por
+campo). `record_type` arma en su lugar una clase con `__slots__`: cada fila
+ocupa un objeto de tamaño fijo y los campos categóricos (`actividad`, `area`,
+`motivo_parada`, `notas`, `lote_id`) se internan, así los cientos de miles de
+repeticiones comparten una sola cadena.
+
+Los registros se comportan como un mapeo de solo lectura (`r['actividad']`,
+`r.get(...)`, `keys()`, `items()`, `dict(r)`), por lo que el código escrito
+contra `csv.DictReader` los acepta sin cambios; también admiten acceso por
+atributo (`r.actividad`), que es el camino más rápido.
+
+Uso:
+    from eventos import read_events
+    for ev in read_events('data/produccion_harina.csv'):
+        ev.duracion_min  # ya es int
+
+    python3 scripts/eventos.py --in data/produccion_harina.csv   # memoria por evento
+"""
+import argparse
+import csv
+import sys
+from operator import itemgetter
+
+from generate_data import FIELDNAMES
+
+# Conversión de tipos y campos internados del esquema de `produccion_harina.csv`
+EVENT_TYPES = {
+    'duracion_min': int,
+    'rendimiento_kg': int,
+    'humedad_pct': float,
+    'defectos_kg': int,
+    'operadores': int,
+}
+EVENT_INTERN = ('lote_id', 'actividad', 'area', 'motivo_parada', 'notas')
+
+_TYPES_CACHE = {}
+
+
+class _Record:
+    """Base de los registros: interfaz de mapeo sobre los `__slots__`.
+
+    `r[campo]` solo admite los campos del registro (un nombre que no lo es,
+    incluidos métodos y atributos internos, levanta KeyError como un dict);
+    el acceso por atributo evita ese chequeo.
+    """
+    __slots__ = ()
+    _fields = ()
+    _keys = {}.keys()
+
+    def __getitem__(self, key):
+        if key in self._keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self._keys else default
+
+    def keys(self):
+        # vista tipo conjunto, como dict.keys() (csv.DictWriter la resta a sus campos)
+        return self._keys
+
+    def values(self):
+        return [getattr(self, k) for k in self._fields]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self._fields]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            return self._fields == other._fields and self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = ', '.join(f'{k}={getattr(self, k)!r}' for k in self._fields)
+        return f'{type(self).__name__}({campos})'
+
+    def __reduce__(self):
+        return (type(self), tuple(self.values()))
+
+
+def record_type(name, fields, types=None, intern=(), module=None):
+    """Crea una clase de registro con `__slots__` para las columnas `fields`.
+
+    `types` mapea columna → conversor (p. ej. `int`) aplicado en el
+    constructor; las columnas en `intern` pasan por `sys.intern`. El
+    constructor recibe los valores en el orden de `fields`, que es el orden de
+    una fila de `csv.reader`, así que convertir una fila es `Cls(*row)`.
+    Para que los registros se puedan serializar con pickle, `module` debe ser
+    el módulo donde la clase queda asignada con el mismo `name`.
+    """
+    fields = tuple(fields)
+    types = types or {}
+    convs = {}
+    body = []
+    for f in fields:
+        if not f.isidentifier():
+            raise ValueError(f'Nombre de columna no válido para un registro: {f!r}')
+        expr = f
+        if f in types:
+            conv = f'_c_{f}'
+            convs[conv] = types[f]
+            expr = f'{conv}({expr})'
+        if f in intern:
+            expr = f'_intern({expr})'
+        body.append(f'    self.{f} = {expr}')
+    # constructor generado (como collections.namedtuple): una asignación por campo, sin bucles
+    src = f'def __init__(self, {", ".join(fields)}):\n' + ('\n'.join(body) or '    pass')
+    ns = {'_intern': sys.intern, **convs}
+    exec(src, ns)
+    cls = type(name, (_Record,), {
+        '__slots__': fields,
+        '__init__': ns['__init__'],
+        '_fields': fields,
+        '_keys': dict.fromkeys(fields).keys(),
+        '__module__': module or __name__,
+    })
+    return cls
+
+
+Evento = record_type('Evento', FIELDNAMES, EVENT_TYPES, EVENT_INTERN)
+
+
+def _row_type(header):
+    """Clase de registro para un CSV genérico: valores de texto, campos categóricos internados."""
+    key = tuple(header)
+    cls = _TYPES_CACHE.get(key)
+    if cls is None:
+        cls = _TYPES_CACHE[key] = record_type('Fila', key, intern=[h for h in key if h in EVENT_INTERN])
+    return cls
+
+
+def iter_records(rows, header, cls):
+    """Convierte filas de `csv.reader` (columnas en el orden de `header`) a registros `cls`.
+
+    Las filas vacías (p. ej. una línea en blanco al final) se saltean, como en DictReader.
+    """
+    if tuple(header) == cls._fields:
+        for r in rows:
+            if r:
+                yield cls(*r)
+        return
+    pick = itemgetter(*[header.index(f) for f in cls._fields])
+    for r in rows:
+        if r:
+            yield cls(*pick(r))
+
+
+def read_events(path):
+    """Itera los eventos de un CSV con el esquema de `produccion_harina.csv` como `Evento`."""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        yield from iter_records(reader, header, Evento)
+
+
+def read_records(path):
+    """Itera las filas de cualquier CSV como registros compactos (valores de texto, como DictReader)."""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        yield from iter_records(reader, header, _row_type(header))
+
+
+def _memoria(path, limite):
+    """Bytes por fila retenidos con dicts (`csv.DictReader`) y con `Evento` (medidos con tracemalloc)."""
+    import tracemalloc
+    from itertools import islice
+
+    def medir(cargar):
+        tracemalloc.start()
+        filas = cargar()
+        usado = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return usado / max(1, len(filas)), len(filas)
+
+    def con_dicts():
+        with open(path, newline='') as f:
+            filas = []
+            for r in islice(csv.DictReader(f), limite):
+                for k, conv in EVENT_TYPES.items():
+                    r[k] = conv(r[k])
+                filas.append(r)
+            return filas
+
+    por_dict, n = medir(con_dicts)
+    por_evento, _ = medir(lambda: list(islice(read_events(path), limite)))
+    return n, por_dict, por_evento
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default='data/produccion_harina.csv', help='CSV de eventos')
+    p.add_argument('--limit', type=int, default=200_000, help='Filas a medir')
+    args = p.parse_args()
+    n, por_dict, por_evento = _memoria(args.infile, args.limit)
+    print(f'Filas medidas: {n}')
+    print(f'  dict por fila:   {por_dict:8.0f} bytes')
+    print(f'  Evento por fila: {por_evento:8.0f} bytes ({por_dict / max(por_evento, 1):.1f}x menos)')
@@ -3,7 +3,10 @@
 Genera CSVs en una carpeta de salida con formatos pensados para:
 - Variabilidad en tiempos de molienda
 - Altos defectos en limpieza
-- Desbalance de operadores (registro y agregados)
+- Desbalance de operadores (registro, agregados y operadores simultáneos por turno)
+
+El CSV se recorre una sola vez; cada salida es un sink (`CsvSink`) registrado
+en el `Exporter`. Nuevas salidas se agregan como subclases de `CsvSink`.
 
 Uso:
   python3 scripts/export_minitab.py --in data/produccion_harina.csv --out-dir data/minitab_exports
@@ -11,129 +14,219 @@ Uso:
 import csv
 import os
 import argparse
-from datetime import datetime
+from array import array
 from collections import defaultdict
 
-
-def infer_shift(ts_iso):
-    h = datetime.fromisoformat(ts_iso).hour
-    if 6 <= h < 14:
-        return 'Morning'
-    if 14 <= h < 22:
-        return 'Afternoon'
-    return 'Night'
+from concurrencia import CONCURRENCIA_FIELDS, CONCURRENCIA_FILE, concurrency, shift_rows
+from eventos import read_events
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+from timeutil import date_and_shift, epoch_seconds, infer_shift  # noqa: F401 (infer_shift se re-exporta)
 
 
 def ensure_dir(p):
     os.makedirs(p, exist_ok=True)
 
 
-def export(infile, out_dir):
-    ensure_dir(out_dir)
-    rows = []
-    with open(infile) as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            # typed fields
-            r['duracion_min'] = int(r['duracion_min'])
-            r['rendimiento_kg'] = int(r['rendimiento_kg'])
-            r['humedad_pct'] = float(r['humedad_pct'])
-            r['defectos_kg'] = int(r['defectos_kg'])
-            r['operadores'] = int(r['operadores'])
-            rows.append(r)
-
-    # 1) Variabilidad en tiempos de molienda
-    mol_rows = [r for r in rows if r['actividad'].lower() == 'molienda']
-    mol_out = os.path.join(out_dir, 'minitab_molienda_variabilidad.csv')
-    with open(mol_out, 'w', newline='') as f:
-        fieldnames = ['lote_id','fecha_inicio','fecha_fin','duracion_min','operadores','shift','humedad_pct','motivo_parada','notas']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in mol_rows:
-            writer.writerow({
-                'lote_id': r['lote_id'],
-                'fecha_inicio': r['fecha_inicio'],
-                'fecha_fin': r['fecha_fin'],
-                'duracion_min': r['duracion_min'],
-                'operadores': r['operadores'],
-                'shift': infer_shift(r['fecha_inicio']),
-                'humedad_pct': r['humedad_pct'],
-                'motivo_parada': r.get('motivo_parada',''),
-                'notas': r.get('notas',''),
-            })
-
-    # 2) Altos defectos en limpieza
-    limp_rows = [r for r in rows if r['actividad'].lower() == 'limpieza']
-    limp_out = os.path.join(out_dir, 'minitab_limpieza_defectos.csv')
-    with open(limp_out, 'w', newline='') as f:
-        fieldnames = ['lote_id','fecha_inicio','duracion_min','rendimiento_kg','defectos_kg','defectos_pct','humedad_pct','motivo_parada','operadores','notas']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in limp_rows:
-            dpct = (r['defectos_kg'] / r['rendimiento_kg'] * 100) if r['rendimiento_kg']>0 else 0
-            writer.writerow({
-                'lote_id': r['lote_id'],
-                'fecha_inicio': r['fecha_inicio'],
-                'duracion_min': r['duracion_min'],
-                'rendimiento_kg': r['rendimiento_kg'],
-                'defectos_kg': r['defectos_kg'],
-                'defectos_pct': round(dpct,4),
-                'humedad_pct': r['humedad_pct'],
-                'motivo_parada': r.get('motivo_parada',''),
-                'operadores': r['operadores'],
-                'notas': r.get('notas',''),
-            })
-
-    # 3) Desbalance de operadores
-    op_out = os.path.join(out_dir, 'minitab_operadores_desbalance.csv')
-    with open(op_out, 'w', newline='') as f:
-        fieldnames = ['fecha','area','actividad','lote_id','operadores','shift']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            # date only for aggregation
-            date = datetime.fromisoformat(r['fecha_inicio']).date().isoformat()
-            writer.writerow({
-                'fecha': date,
-                'area': r['area'],
-                'actividad': r['actividad'],
-                'lote_id': r['lote_id'],
-                'operadores': r['operadores'],
-                'shift': infer_shift(r['fecha_inicio']),
-            })
-
-    # 3b) agregado por fecha+area (útil para Minitab: ANOVA/boxplot por area/fecha)
-    agg = defaultdict(lambda: {'total_operadores':0,'count':0})
-    for r in rows:
-        date = datetime.fromisoformat(r['fecha_inicio']).date().isoformat()
-        key = (date, r['area'])
-        agg[key]['total_operadores'] += r['operadores']
-        agg[key]['count'] += 1
-    agg_out = os.path.join(out_dir, 'minitab_operadores_agg.csv')
-    with open(agg_out, 'w', newline='') as f:
-        fieldnames = ['fecha','area','total_operadores','registros_count','operadores_mean']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for (date, area), v in sorted(agg.items()):
-            mean_ops = round(v['total_operadores']/v['count'],4) if v['count']>0 else 0
-            writer.writerow({
-                'fecha': date,
-                'area': area,
-                'total_operadores': v['total_operadores'],
-                'registros_count': v['count'],
-                'operadores_mean': mean_ops,
-            })
+def load_rows(infile, cache=False):
+    return list(iter_rows(infile, cache))
+
+
+def iter_rows(infile, cache=False):
+    """Itera las filas tipadas del CSV sin cargarlo completo en memoria."""
+    if cache:
+        from columnar_cache import load_columns
+        yield from load_columns(infile).iter_rows()
+        return
+    yield from read_events(infile)
+
+
+class Record:
+    """Fila tipada más los campos derivados de `fecha_inicio` (parseada una sola vez)."""
+    __slots__ = ('row', 'actividad', 'fecha', 'shift')
+
+    def __init__(self, row):
+        self.row = row
+        self.actividad = row['actividad'].lower()
+        self.fecha, self.shift = date_and_shift(row['fecha_inicio'])
+
+
+class CsvSink:
+    """Destino de exportación: recibe cada registro y escribe las filas que le interesan.
+
+    Las subclases definen `filename`, `fieldnames` y `project(rec)`, que
+    devuelve la fila de salida (tupla en el orden de `fieldnames`) o None si el
+    registro no aplica. Las filas se escriben en lotes de `BUFFER_ROWS`.
+    """
+    filename = None
+    fieldnames = ()
+    BUFFER_ROWS = 10_000
+
+    def open(self, out_dir):
+        self.path = os.path.join(out_dir, self.filename)
+        self._f = open(self.path, 'w', newline='', buffering=1 << 20)
+        self._writer = csv.writer(self._f)
+        self._writer.writerow(self.fieldnames)
+        self._buf = []
+
+    def consume(self, rec):
+        out = self.project(rec)
+        if out is not None:
+            self._buf.append(out)
+            if len(self._buf) >= self.BUFFER_ROWS:
+                self.flush()
+
+    def project(self, rec):
+        raise NotImplementedError
+
+    def flush(self):
+        count('rows_written', len(self._buf))
+        self._writer.writerows(self._buf)
+        self._buf.clear()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+
+class MoliendaSink(CsvSink):
+    """1) Variabilidad en tiempos de molienda."""
+    filename = 'minitab_molienda_variabilidad.csv'
+    fieldnames = ('lote_id','fecha_inicio','fecha_fin','duracion_min','operadores','shift','humedad_pct','motivo_parada','notas')
+
+    def project(self, rec):
+        if rec.actividad != 'molienda':
+            return None
+        r = rec.row
+        return (r['lote_id'], r['fecha_inicio'], r['fecha_fin'], r['duracion_min'], r['operadores'],
+                rec.shift, r['humedad_pct'], r.get('motivo_parada',''), r.get('notas',''))
+
+
+class LimpiezaSink(CsvSink):
+    """2) Altos defectos en limpieza."""
+    filename = 'minitab_limpieza_defectos.csv'
+    fieldnames = ('lote_id','fecha_inicio','duracion_min','rendimiento_kg','defectos_kg','defectos_pct','humedad_pct','motivo_parada','operadores','notas')
+
+    def project(self, rec):
+        if rec.actividad != 'limpieza':
+            return None
+        r = rec.row
+        dpct = (r['defectos_kg'] / r['rendimiento_kg'] * 100) if r['rendimiento_kg']>0 else 0
+        return (r['lote_id'], r['fecha_inicio'], r['duracion_min'], r['rendimiento_kg'], r['defectos_kg'],
+                round(dpct,4), r['humedad_pct'], r.get('motivo_parada',''), r['operadores'], r.get('notas',''))
+
+
+class OperadoresSink(CsvSink):
+    """3) Desbalance de operadores (registro por actividad)."""
+    filename = 'minitab_operadores_desbalance.csv'
+    fieldnames = ('fecha','area','actividad','lote_id','operadores','shift')
+
+    def project(self, rec):
+        r = rec.row
+        return (rec.fecha, r['area'], r['actividad'], r['lote_id'], r['operadores'], rec.shift)
+
+
+class OperadoresAggSink(CsvSink):
+    """3b) Agregado por fecha+area (útil para Minitab: ANOVA/boxplot por area/fecha)."""
+    filename = 'minitab_operadores_agg.csv'
+    fieldnames = ('fecha','area','total_operadores','registros_count','operadores_mean')
+
+    def open(self, out_dir):
+        super().open(out_dir)
+        self._agg = defaultdict(lambda: [0, 0])
+
+    def consume(self, rec):
+        acc = self._agg[(rec.fecha, rec.row['area'])]
+        acc[0] += rec.row['operadores']
+        acc[1] += 1
+
+    def close(self):
+        for (date, area), (total, count) in sorted(self._agg.items()):
+            mean_ops = round(total/count,4) if count>0 else 0
+            self._buf.append((date, area, total, count, mean_ops))
+        super().close()
+
+
+class OperadoresConcurrenciaSink(CsvSink):
+    """3c) Operadores simultáneos por fecha+area+turno (barrido de intervalos, ver `concurrencia`)."""
+    filename = CONCURRENCIA_FILE
+    fieldnames = CONCURRENCIA_FIELDS
+
+    def open(self, out_dir):
+        super().open(out_dir)
+        self._ini, self._fin, self._ops, self._area = array('d'), array('d'), array('q'), array('q')
+        self._labels = {}
+
+    def consume(self, rec):
+        r = rec.row
+        code = self._labels.get(r['area'])
+        if code is None:
+            code = self._labels[r['area']] = len(self._labels)
+        self._ini.append(epoch_seconds(r['fecha_inicio']))
+        self._fin.append(epoch_seconds(r['fecha_fin']))
+        self._ops.append(r['operadores'])
+        self._area.append(code)
+
+    def close(self):
+        if self._ini:
+            resultado = concurrency(self._ini, self._fin, self._ops, self._area, list(self._labels))
+            self._buf.extend(shift_rows(resultado))
+        super().close()
+
+
+class Exporter:
+    """Recorre las filas una sola vez y reparte cada registro a todos los sinks registrados."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.sinks = []
+
+    def register(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def run(self, rows):
+        ensure_dir(self.out_dir)
+        abiertos = []  # si un open falla, se cierran solo los sinks ya abiertos
+        n = 0
+        try:
+            for sink in self.sinks:
+                sink.open(self.out_dir)
+                abiertos.append(sink)
+            consumers = [sink.consume for sink in self.sinks]
+            for n, r in enumerate(rows, 1):
+                rec = Record(r)
+                for consume in consumers:
+                    consume(rec)
+        finally:
+            count('rows', n)
+            for sink in abiertos:
+                sink.close()
+        return [sink.path for sink in self.sinks]
+
+
+DEFAULT_SINKS = (MoliendaSink, LimpiezaSink, OperadoresSink, OperadoresAggSink, OperadoresConcurrenciaSink)
+
+
+def export(infile, out_dir, cache=False, sinks=None):
+    exporter = Exporter(out_dir)
+    for sink in (sinks if sinks is not None else [cls() for cls in DEFAULT_SINKS]):
+        exporter.register(sink)
+    with stage('export'):
+        if not cache:
+            count_file(infile)
+        paths = exporter.run(iter_rows(infile, cache))
 
     print('Archivos generados:')
-    print(' -', mol_out)
-    print(' -', limp_out)
-    print(' -', op_out)
-    print(' -', agg_out)
+    for path in paths:
+        print(' -', path)
 
 
 if __name__ == '__main__':
     p = argparse.ArgumentParser()
     p.add_argument('--in', dest='infile', required=True, help='CSV de entrada')
     p.add_argument('--out-dir', dest='outdir', required=False, default='data/minitab_exports', help='Directorio de salida')
+    p.add_argument('--cache', action='store_true', help='Leer desde la caché columnar (<csv>.cols/)')
+    add_profile_args(p)
     args = p.parse_args()
-    export(args.infile, args.outdir)
+    setup_profile(args, 'export_minitab')
+    export(args.infile, args.outdir, args.cache)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Caché de gráficos direccionada por contenido.
+
+Cada figura se identifica con un hash de: nombre del gráfico, versión del
+script que la dibuja (hash de su código fuente y del de los módulos locales
+que importa, p. ej. `estadistica`), parámetros (LSE/LIE/TARGET,
+etc.) y el tramo exacto de columnas que usa. Si la clave ya existe en la
+caché, los archivos de salida se copian desde ahí (o se dejan tal cual si ya
+son idénticos) y se devuelve el resultado guardado de la función de dibujo,
+sin volver a renderizar.
+
+Estructura: `<root>/<clave>/` con una copia de cada salida y `result.pkl`.
+"""
+import filecmp
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+
+DEFAULT_ROOT = 'data/.figcache'
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_IMPORT = re.compile(r'^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))', re.M)
+
+
+def local_modules(script):
+    """El script y, recursivamente, los módulos de `scripts/` que importa."""
+    vistos, pendientes = set(), [script[:-3]]
+    while pendientes:
+        mod = pendientes.pop()
+        path = os.path.join(SCRIPTS_DIR, mod + '.py')
+        if mod in vistos or not os.path.exists(path):
+            continue
+        vistos.add(mod)
+        with open(path, encoding='utf-8') as f:
+            pendientes += [a or b for a, b in _IMPORT.findall(f.read())]
+    return sorted(os.path.join('scripts', m + '.py') for m in vistos)
+
+
+def source_version(path):
+    """Versión de un script: hash de su código fuente y del de los módulos locales que importa."""
+    h = hashlib.sha1()
+    for mod in local_modules(os.path.basename(path)):
+        h.update(f'{mod}\0'.encode('utf-8'))
+        with open(os.path.join(os.path.dirname(SCRIPTS_DIR), mod), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+class FigureCache:
+    def __init__(self, root=DEFAULT_ROOT, version='', enabled=True):
+        self.root = root
+        self.version = version
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, params=None, **inputs):
+        h = hashlib.sha256()
+        h.update(f'{self.version}\0{name}\0'.encode('utf-8'))
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode('utf-8'))
+        for col in sorted(inputs):
+            v = inputs[col]
+            h.update(f'\0{col}\0'.encode('utf-8'))
+            if hasattr(v, 'tobytes'):
+                h.update(f'{v.dtype.str}{v.shape}'.encode('utf-8'))
+                h.update(v.tobytes())
+            else:
+                h.update(json.dumps(v, default=str, ensure_ascii=False).encode('utf-8'))
+        return h.hexdigest()
+
+    def restore(self, key, outputs):
+        """Restaura `outputs` desde la caché. Devuelve (acierto, resultado guardado)."""
+        if not self.enabled:
+            return False, None
+        entry = os.path.join(self.root, key)
+        cached = [os.path.join(entry, os.path.basename(out)) for out in outputs]
+        result_path = os.path.join(entry, 'result.pkl')
+        if not (os.path.exists(result_path) and all(os.path.exists(c) for c in cached)):
+            self.misses += 1
+            return False, None
+        for src, out in zip(cached, outputs):
+            if not (os.path.exists(out) and filecmp.cmp(src, out, shallow=False)):
+                shutil.copyfile(src, out)
+        with open(result_path, 'rb') as f:
+            result = pickle.load(f)
+        self.hits += 1
+        return True, result
+
+    def store(self, key, outputs, result=None):
+        if not self.enabled:
+            return
+        entry = os.path.join(self.root, key)
+        os.makedirs(entry, exist_ok=True)
+        for out in outputs:
+            shutil.copyfile(out, os.path.join(entry, os.path.basename(out)))
+        # result.pkl al final: marca la entrada como completa
+        tmp = os.path.join(entry, 'result.pkl.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(tmp, os.path.join(entry, 'result.pkl'))
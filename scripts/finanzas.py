@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Motor financiero: VAN y TIR para flujos regulares o irregulares.
+
+La TIR se obtiene con Newton acotado: primero se busca un intervalo con cambio
+de signo del VAN y Newton itera dentro de él; si un paso se sale del intervalo
+o no converge, se termina con el método de Brent sobre el intervalo vigente.
+La resolución es de máquina (no hay tope de 200%).
+
+Para barridos de sensibilidad, `van_vectorizado`/`tir_vectorizado` resuelven
+miles de escenarios a la vez (matriz escenarios × periodos) y
+`evaluar_escenarios` arma esa matriz desde grillas de inversión, ahorro, tasa
+y horizonte.
+"""
+import math
+
+TOL = 1e-12
+MAX_ITER = 100
+_TASA_MIN = -0.99
+_TASA_MAX = 1e6
+_DESCUENTO_MAX = 1e100  # mayor factor (1 + tasa)**-t admitido en el extremo inferior
+
+
+def _tasa_min(t_max):
+    """Extremo inferior de búsqueda de la TIR para flujos de hasta `t_max` años.
+
+    Cerca de -100% los factores (1 + tasa)**-t desbordan con horizontes
+    largos; se sube el extremo hasta que el mayor factor quede en `_DESCUENTO_MAX`.
+    """
+    if t_max <= 0:
+        return _TASA_MIN
+    return max(_TASA_MIN, _DESCUENTO_MAX ** (-1 / t_max) - 1)
+
+
+def van(flujos, tasa, tiempos=None):
+    """VAN de `flujos` a la tasa dada; `tiempos` (en años) permite flujos irregulares."""
+    if tiempos is None:
+        tiempos = range(len(flujos))
+    base = 1 + tasa
+    return sum(f * base ** -t for f, t in zip(flujos, tiempos))
+
+
+def _dvan(flujos, tasa, tiempos):
+    base = 1 + tasa
+    return sum(-t * f * base ** -(t + 1) for f, t in zip(flujos, tiempos))
+
+
+def _brent(f, a, b, fa, fb, tol=TOL, max_iter=MAX_ITER):
+    """Raíz de f en [a, b] (fa y fb con signos opuestos) por el método de Brent."""
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if fb == 0:
+            return b
+        if fa * fb > 0:
+            a, fa = c, fc
+            d = e = b - a
+        if abs(fa) < abs(fb):
+            c, fc = b, fb
+            b, fb = a, fa
+            a, fa = c, fc
+        tol1 = 2 * 2.2e-16 * abs(b) + 0.5 * tol
+        m = 0.5 * (a - b)
+        if abs(m) <= tol1:
+            return b
+        if abs(e) >= tol1 and abs(fc) > abs(fb):
+            s = fb / fc
+            if c == a:
+                # secante
+                p = 2 * m * s
+                q = 1 - s
+            else:
+                # interpolación cuadrática inversa
+                q = fc / fa
+                r = fb / fa
+                p = s * (2 * m * q * (q - r) - (b - c) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        c, fc = b, fb
+        b += d if abs(d) > tol1 else math.copysign(tol1, m)
+        fb = f(b)
+    return b
+
+
+def _bracket(f, a=_TASA_MIN):
+    """Intervalo [a, b] con cambio de signo de f (desde el extremo inferior `a`), o None."""
+    fa = f(a)
+    b = 0.0
+    fb = f(b)
+    while fa * fb > 0:
+        if b >= _TASA_MAX:
+            return None
+        a, fa = b, fb
+        b = 1.0 if b == 0 else b * 2
+        fb = f(b)
+    return a, b, fa, fb
+
+
+def tir(flujos, tiempos=None, guess=0.1):
+    """TIR de `flujos` (o None si el VAN no cambia de signo entre `_tasa_min` y 1e8%)."""
+    tiempos = list(range(len(flujos))) if tiempos is None else list(tiempos)
+    f = lambda r: van(flujos, r, tiempos)  # noqa: E731
+    br = _bracket(f, _tasa_min(max(map(abs, tiempos), default=0)))
+    if br is None:
+        return None
+    a, b, fa, fb = br
+    x = min(max(guess, a), b)
+    for _ in range(MAX_ITER):
+        fx = f(x)
+        if fx == 0:
+            return x
+        # mantener el intervalo con cambio de signo
+        if (fx > 0) == (fa > 0):
+            a, fa = x, fx
+        else:
+            b, fb = x, fx
+        d = _dvan(flujos, x, tiempos)
+        if d == 0:
+            break
+        x_new = x - fx / d
+        if not (a < x_new < b):
+            break
+        if abs(x_new - x) <= TOL * (1 + abs(x)):
+            return x_new
+        x = x_new
+    return _brent(f, a, b, fa, fb)
+
+
+def van_vectorizado(tasas, flujos, tiempos=None):
+    """VAN por escenario. `flujos` es (escenarios, periodos); `tasas` se difunde por escenario."""
+    import numpy as np
+
+    flujos = np.asarray(flujos, dtype=float)
+    tiempos = np.arange(flujos.shape[-1]) if tiempos is None else np.asarray(tiempos, dtype=float)
+    base = 1 + np.asarray(tasas, dtype=float)[..., None]
+    return (flujos * base ** -tiempos).sum(axis=-1)
+
+
+def tir_vectorizado(flujos, tiempos=None):
+    """TIR de cada fila de `flujos` (NaN sin cambio de signo), con Newton acotado vectorizado.
+
+    Cuando el paso de Newton se sale del intervalo de una fila, esa fila avanza
+    por bisección, de modo que la convergencia está garantizada.
+    """
+    import numpy as np
+
+    flujos = np.asarray(flujos, dtype=float)
+    if flujos.ndim == 1:
+        flujos = flujos[None, :]
+    n = flujos.shape[0]
+    tiempos = np.arange(flujos.shape[-1]) if tiempos is None else np.asarray(tiempos, dtype=float)
+
+    def f(r, filas=slice(None)):
+        return (flujos[filas] * (1 + r[:, None]) ** -tiempos).sum(axis=1)
+
+    def df(r, filas):
+        return (-tiempos * flujos[filas] * (1 + r[:, None]) ** -(tiempos + 1)).sum(axis=1)
+
+    a = np.full(n, _tasa_min(np.abs(tiempos).max(initial=0)))
+    fa = f(a)
+    b = np.zeros(n)
+    fb = f(b)
+    # expandir el extremo superior hasta encontrar cambio de signo
+    sin_cambio = fa * fb > 0
+    while sin_cambio.any():
+        a = np.where(sin_cambio, b, a)
+        fa = np.where(sin_cambio, fb, fa)
+        b = np.where(sin_cambio, np.where(b == 0, 1.0, b * 2), b)
+        fb = np.where(sin_cambio, f(b), fb)
+        sin_cambio = (fa * fb > 0) & (b < _TASA_MAX)
+    valido = fa * fb <= 0
+
+    x = np.where(valido, np.clip(0.1, a, b), np.nan)
+    # solo se itera sobre las filas que aún no convergen
+    activas = np.flatnonzero(valido)
+    for _ in range(MAX_ITER):
+        if activas.size == 0:
+            break
+        xa, aa, ba, faa = x[activas], a[activas], b[activas], fa[activas]
+        fx = f(xa, activas)
+        mismo = (fx > 0) == (faa > 0)
+        aa = np.where(mismo, xa, aa)
+        ba = np.where(mismo, ba, xa)
+        fa[activas] = np.where(mismo, fx, faa)
+        a[activas], b[activas] = aa, ba
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_new = xa - fx / df(xa, activas)
+        fuera = ~np.isfinite(x_new) | (x_new <= aa) | (x_new >= ba)
+        x_new = np.where(fuera, 0.5 * (aa + ba), x_new)
+        hecho = (fx == 0) | (np.abs(x_new - xa) <= TOL * (1 + np.abs(xa)))
+        x[activas] = np.where(fx == 0, xa, x_new)
+        activas = activas[~hecho]
+    return x
+
+
+def evaluar_escenarios(inversion, ahorro_anual, tasa_descuento=0.12, horizonte=3):
+    """Evalúa VAN, TIR, ROI y payback para grillas de escenarios en una sola llamada.
+
+    Los cuatro parámetros se difunden entre sí (escalares o arreglos NumPy,
+    p. ej. desde `np.meshgrid`). Devuelve un dict de arreglos con la forma
+    difundida; la TIR se expresa en % como en `calcular_financiero`. El ROI
+    es NaN con inversión <= 0 y el payback, NaN con ahorro <= 0.
+    """
+    import numpy as np
+
+    inv, ah, tasa, hor = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in
+                                               (inversion, ahorro_anual, tasa_descuento, horizonte)))
+    shape = inv.shape
+    inv, ah, tasa, hor = (v.ravel() for v in (inv, ah, tasa, hor))
+    t_max = int(hor.max()) if hor.size else 0
+    periodos = np.arange(t_max + 1)
+    flujos = np.where((periodos >= 1) & (periodos <= hor[:, None]), ah[:, None], 0.0)
+    flujos[:, 0] = -inv
+
+    van_ = van_vectorizado(tasa, flujos)
+    tir_ = tir_vectorizado(flujos)
+    # sin inversión no hay ROI y sin ahorro no hay payback: NaN en vez de inf o meses negativos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(inv > 0, (ah * hor - inv) / inv * 100, np.nan)
+        meses = np.ceil(inv / (ah / 12))
+    payback = np.where(ah > 0, np.where(meses < 100, meses, 0), np.nan)
+    return {
+        'van': van_.reshape(shape),
+        'tir': (tir_ * 100).reshape(shape),
+        'roi': roi.reshape(shape),
+        'payback_meses': payback.reshape(shape),
+    }
@@ -1,50 +1,146 @@
 #!/usr/bin/env python3
 """Genera gráficos de control y capacidad para análisis Lean Six Sigma.
 Gráficos: I-MR, Capacidad Normal, Normal Probability Plot, Box Plot, Scatter.
+
+Con series largas (más de `DECIMATE_THRESHOLD` puntos) el I-MR se dibuja
+decimado (mín/máx por tramo, conservando siempre los puntos fuera de control)
+y el scatter pasa a un mapa de densidad hexbin; así el tiempo de dibujo queda
+acotado aunque crezca el histórico.
 """
-import csv
 import os
 import math
+import time
+import argparse
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
 from statistics import mean, stdev
-from datetime import datetime
+import matplotlib
+matplotlib.use('Agg')  # solo se guardan PNG; también rige en los workers del pool
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
+from estadistica import norm_ppf, ppm_esperado
+from event_store import add_store_args, store_filters
+from eventos import read_events, record_type
+from figure_cache import DEFAULT_ROOT as FIG_CACHE_ROOT, FigureCache, source_version
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+from timeutil import SHIFT_NAMES, derive_arrays, parse_ts, shift_from_hour
+
 # Configuración estilo
 plt.style.use('seaborn-v0_8-whitegrid')
 plt.rcParams['figure.figsize'] = (10, 6)
 plt.rcParams['font.size'] = 10
 
-def load_data(path):
-    """Carga datos de molienda."""
+# registro compacto de cada punto de la serie de molienda (ver `eventos`)
+PuntoMolienda = record_type('PuntoMolienda', ['lote_id', 'duracion_min', 'humedad_pct', 'shift', 'fecha'],
+                            intern=['lote_id', 'shift'], module=__name__)
+
+
+def load_data(path, cache=False, db=None, ordenado=False, **filtros):
+    """Carga datos de molienda (con `db`, del almacén SQLite filtrado por `filtros`).
+
+    Con `ordenado` el CSV ya viene ordenado por `fecha_inicio` (p. ej. la
+    salida de `orden_externo.py`): se lee en streaming y no se ordena en memoria.
+    """
+    with stage('load'):
+        if db:
+            rows = _load_data_store(path, db, filtros)
+        elif cache:
+            rows = _load_data_cached(path)
+        else:
+            count_file(path)
+            rows = _load_data_csv(path, ordenado)
+        count('rows', len(rows))
+    return rows
+
+
+def _load_data_csv(path, ordenado=False):
     rows = []
-    with open(path) as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            if r['actividad'].lower() == 'molienda':
-                # Inferir turno
-                h = datetime.fromisoformat(r['fecha_inicio']).hour
-                if 6 <= h < 14:
-                    shift = 'Morning'
-                elif 14 <= h < 22:
-                    shift = 'Afternoon'
-                else:
-                    shift = 'Night'
-
-                rows.append({
-                    'lote_id': r['lote_id'],
-                    'duracion_min': int(r['duracion_min']),
-                    'humedad_pct': float(r['humedad_pct']),
-                    'shift': shift,
-                    'fecha': datetime.fromisoformat(r['fecha_inicio'])
-                })
-    return sorted(rows, key=lambda x: x['fecha'])
-
-
-def plot_imr_chart(data, output_dir, lse=140, lie=100):
+    previa = ''
+    for r in read_events(path):
+        if r.actividad.lower() == 'molienda':
+            if ordenado:
+                # la serie se usa tal como viene: se verifica el orden mientras se lee
+                if r.fecha_inicio < previa:
+                    raise ValueError(f'{path}: no está ordenado por fecha_inicio ({r.fecha_inicio} después de '
+                                     f'{previa}); ordenarlo antes con scripts/orden_externo.py')
+                previa = r.fecha_inicio
+            # Inferir turno (timestamp parseado una sola vez)
+            fecha = parse_ts(r.fecha_inicio)
+            rows.append(PuntoMolienda(r.lote_id, r.duracion_min, r.humedad_pct, shift_from_hour(fecha.hour), fecha))
+    return rows if ordenado else sorted(rows, key=attrgetter('fecha'))
+
+
+def _load_data_store(path, db, filtros):
+    from event_store import open_store
+
+    with open_store(db, path) as store:
+        # el índice (actividad, fecha_inicio) entrega el tramo ya ordenado
+        filas = store.rows(('lote_id', 'duracion_min', 'humedad_pct', 'fecha_inicio'),
+                           order='fecha_inicio, rowid', actividad='molienda', **filtros)
+        rows = []
+        for lote, dur, hum, ts in filas:
+            fecha = parse_ts(ts)
+            rows.append(PuntoMolienda(lote, dur, hum, shift_from_hour(fecha.hour), fecha))
+    return rows
+
+
+def _load_data_cached(path):
+    """Igual que `load_data` pero desde la caché columnar, sin parsear texto."""
+    import numpy as np
+    from columnar_cache import load_columns
+
+    table = load_columns(path, ['lote_id', 'fecha_inicio', 'actividad', 'duracion_min', 'humedad_pct'])
+    idx = table.mask('actividad', 'molienda', ignore_case=True).nonzero()[0]
+    ts = np.asarray(table['fecha_inicio'][idx])
+    order = np.argsort(ts, kind='stable')
+    idx, ts = idx[order], ts[order]
+    shifts = np.array(SHIFT_NAMES)[derive_arrays(ts)['shift_code']].tolist()
+    fechas = ts.astype('datetime64[us]').tolist()
+    return [
+        PuntoMolienda(l, d, h, s, f)
+        for l, d, h, s, f in zip(table.decode('lote_id', idx), table['duracion_min'][idx].tolist(),
+                                 table['humedad_pct'][idx].tolist(), shifts, fechas)
+    ]
+
+
+DECIMATE_THRESHOLD = 5000  # puntos a partir de los cuales se decima (modo automático)
+DECIMATE_BUCKETS = 1500  # tramos de la decimación: ~2 puntos por tramo, del orden del ancho en píxeles
+
+
+def _use_decimation(decimate, n):
+    """`decimate`: None = automático según `DECIMATE_THRESHOLD`, True/False = forzar."""
+    return n > DECIMATE_THRESHOLD if decimate is None else bool(decimate)
+
+
+def decimate_minmax(y, buckets=DECIMATE_BUCKETS, keep=None):
+    """Índices a dibujar de la serie `y`: el mínimo y el máximo de cada uno de
+    `buckets` tramos consecutivos, los extremos de la serie y los índices `keep`.
+
+    A diferencia de un submuestreo uniforme, conserva picos y valles, por lo que
+    la envolvente de la línea es la misma que con todos los puntos.
+    """
+    import numpy as np
+    y = np.asarray(y)
+    n = len(y)
+    if n <= 2 * buckets:
+        idx = np.arange(n)
+    else:
+        size = -(-n // buckets)
+        tramos = np.pad(y, (0, size * buckets - n), mode='edge').reshape(buckets, size)
+        base = np.arange(buckets) * size
+        idx = np.concatenate([base + tramos.argmin(axis=1), base + tramos.argmax(axis=1), [0, n - 1]])
+        idx = np.minimum(idx, n - 1)
+    if keep is not None:
+        idx = np.concatenate([idx, np.asarray(keep, dtype=int)])
+    return np.unique(idx)
+
+
+def plot_imr_chart(data, output_dir, lse=140, lie=100, decimate=None):
     """Gráfico I-MR (Individuales y Rangos Móviles)."""
     duraciones = [x['duracion_min'] for x in data]
     n = len(duraciones)
+    decimar = _use_decimation(decimate, n)
 
     # Calcular Moving Ranges
     mr = [abs(duraciones[i] - duraciones[i-1]) for i in range(1, n)]
@@ -65,26 +161,45 @@ def plot_imr_chart(data, output_dir, lse=140, lie=100):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
 
     # I-Chart
-    ax1.plot(range(1, n+1), duraciones, marker='o', linestyle='-', color='blue', markersize=4)
+    if decimar:
+        import numpy as np
+        y = np.asarray(duraciones)
+        fuera = np.flatnonzero((y > ucl_i) | (y < lcl_i))
+        idx = decimate_minmax(y, keep=fuera)
+        ax1.plot(idx + 1, y[idx], linestyle='-', color='blue', linewidth=0.6)
+        ax1.plot(fuera + 1, y[fuera], 'ro', markersize=4, markerfacecolor='red')
+    else:
+        ax1.plot(range(1, n+1), duraciones, marker='o', linestyle='-', color='blue', markersize=4)
     ax1.axhline(x_bar, color='green', linestyle='-', linewidth=2, label=f'Media = {x_bar:.2f}')
     ax1.axhline(ucl_i, color='red', linestyle='--', linewidth=1.5, label=f'UCL = {ucl_i:.2f}')
     ax1.axhline(lcl_i, color='red', linestyle='--', linewidth=1.5, label=f'LCL = {lcl_i:.2f}')
     ax1.axhline(lse, color='orange', linestyle=':', linewidth=2, label=f'LSE = {lse}')
     ax1.axhline(lie, color='orange', linestyle=':', linewidth=2, label=f'LIE = {lie}')
 
-    # Marcar puntos fuera de control
-    for i, val in enumerate(duraciones):
-        if val > ucl_i or val < lcl_i:
-            ax1.plot(i+1, val, 'ro', markersize=8, markerfacecolor='red')
+    # Marcar puntos fuera de control (en modo decimado ya se marcaron en bloque)
+    if not decimar:
+        for i, val in enumerate(duraciones):
+            if val > ucl_i or val < lcl_i:
+                ax1.plot(i+1, val, 'ro', markersize=8, markerfacecolor='red')
 
     ax1.set_xlabel('Número de Observación (Lote)')
     ax1.set_ylabel('Duración (min)')
-    ax1.set_title('Gráfico de Control I (Individuales) - Tiempos de Molienda', fontweight='bold', fontsize=12)
+    titulo = 'Gráfico de Control I (Individuales) - Tiempos de Molienda'
+    if decimar:
+        titulo += f' (decimado, n={n})'
+    ax1.set_title(titulo, fontweight='bold', fontsize=12)
     ax1.legend(loc='upper right', fontsize=9)
     ax1.grid(True, alpha=0.3)
 
     # MR-Chart
-    ax2.plot(range(2, n+1), mr, marker='s', linestyle='-', color='purple', markersize=4)
+    if decimar:
+        m = np.asarray(mr)
+        fuera_mr = np.flatnonzero(m > ucl_mr)
+        idx = decimate_minmax(m, keep=fuera_mr)
+        ax2.plot(idx + 2, m[idx], linestyle='-', color='purple', linewidth=0.6)
+        ax2.plot(fuera_mr + 2, m[fuera_mr], 'ro', markersize=4)
+    else:
+        ax2.plot(range(2, n+1), mr, marker='s', linestyle='-', color='purple', markersize=4)
     ax2.axhline(mr_mean, color='green', linestyle='-', linewidth=2, label=f'MR Media = {mr_mean:.2f}')
     ax2.axhline(ucl_mr, color='red', linestyle='--', linewidth=1.5, label=f'UCL = {ucl_mr:.2f}')
     if lcl_mr > 0:
@@ -163,6 +278,7 @@ def plot_capability(data, output_dir, lse=140, lie=100, target=120):
         ['', '', ''],
         ['% Fuera Espec.', f'{pct_out:.2f}%', 'Inaceptable' if pct_out > 0.5 else 'Aceptable'],
         ['PPM', f'{int(pct_out*10000)}', ''],
+        ['PPM esperado (normal)', f'{ppm_esperado(mu, sigma, lse, lie):.0f}', ''],
     ]
 
     table = ax2.table(cellText=tabla_data, loc='center', cellLoc='left', colWidths=[0.35, 0.25, 0.4])
@@ -194,21 +310,10 @@ def plot_normal_probability(data, output_dir):
     duraciones = sorted([x['duracion_min'] for x in data])
     n = len(duraciones)
 
-    # Cuantiles teóricos normales
-    from math import erf, sqrt
-    def norm_ppf(p):
-        """Aproximación inversa normal."""
-        if p <= 0 or p >= 1:
-            return 0
-        t = sqrt(-2 * math.log(1 - p)) if p > 0.5 else sqrt(-2 * math.log(p))
-        c0, c1, c2 = 2.515517, 0.802853, 0.010328
-        d1, d2, d3 = 1.432788, 0.189269, 0.001308
-        z = t - (c0 + c1*t + c2*t*t) / (1 + d1*t + d2*t*t + d3*t*t*t)
-        return z if p > 0.5 else -z
-
-    # Probabilidades empíricas
-    probs = [(i - 0.5) / n for i in range(1, n+1)]
-    theoretical_quantiles = [norm_ppf(p) for p in probs]
+    # Cuantiles teóricos normales (vectorizado)
+    import numpy as np
+    probs = (np.arange(1, n+1) - 0.5) / n
+    theoretical_quantiles = norm_ppf(probs).tolist()
 
     # Estandarizar datos
     mu = mean(duraciones)
@@ -289,8 +394,8 @@ def plot_boxplot_by_shift(data, output_dir):
     return stats
 
 
-def plot_scatter_humidity(data, output_dir):
-    """Scatter plot: Humedad vs Duración."""
+def plot_scatter_humidity(data, output_dir, decimate=None):
+    """Scatter plot: Humedad vs Duración (densidad hexbin con series largas)."""
     humedad = [x['humedad_pct'] for x in data]
     duracion = [x['duracion_min'] for x in data]
 
@@ -306,7 +411,11 @@ def plot_scatter_humidity(data, output_dir):
     r = cov / (std_h * std_d)
 
     fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(humedad, duracion, alpha=0.6, s=40, color='teal', edgecolor='black')
+    if _use_decimation(decimate, n):
+        hb = ax.hexbin(humedad, duracion, gridsize=60, cmap='viridis', mincnt=1, bins='log')
+        fig.colorbar(hb, ax=ax, label='Lotes por celda')
+    else:
+        ax.scatter(humedad, duracion, alpha=0.6, s=40, color='teal', edgecolor='black')
 
     # Línea de tendencia (regresión lineal simple)
     b = cov / (std_h ** 2)
@@ -346,10 +455,139 @@ def plot_scatter_humidity(data, output_dir):
     return r, a, b
 
 
+# --- Renderizado en paralelo -------------------------------------------------
+
+# nombre → (función, parámetros que recibe además de data/output_dir)
+CHARTS = {
+    'imr': (plot_imr_chart, ('lse', 'lie', 'decimate')),
+    'capacidad': (plot_capability, ('lse', 'lie', 'target')),
+    'normalidad': (plot_normal_probability, ()),
+    'boxplot_turnos': (plot_boxplot_by_shift, ()),
+    'scatter_humedad': (plot_scatter_humidity, ('decimate',)),
+}
+
+# nombre → (columnas de entrada que usa, archivo que produce); definen la clave de caché
+CHART_INPUTS = {
+    'imr': (('lote_id', 'duracion_min'), 'grafico_imr.png'),
+    'capacidad': (('duracion_min',), 'grafico_capacidad.png'),
+    'normalidad': (('duracion_min',), 'grafico_normalidad.png'),
+    'boxplot_turnos': (('duracion_min', 'shift'), 'grafico_boxplot_turnos.png'),
+    'scatter_humedad': (('duracion_min', 'humedad_pct'), 'grafico_scatter_humedad.png'),
+}
+
+SCRIPT_VERSION = f'{source_version(__file__)}-mpl{matplotlib.__version__}'
+
+_WORKER = {}
+
+
+def data_to_arrays(data):
+    """Empaqueta los registros de `load_data` como arreglos NumPy (se envían una vez por worker)."""
+    import numpy as np
+    return {
+        'lote_id': np.array([x['lote_id'] for x in data]),
+        'duracion_min': np.array([x['duracion_min'] for x in data], dtype=np.int64),
+        'humedad_pct': np.array([x['humedad_pct'] for x in data], dtype=np.float64),
+        'shift': np.array([SHIFT_NAMES.index(x['shift']) for x in data], dtype=np.int8),
+        'fecha': np.array([x['fecha'] for x in data], dtype='datetime64[us]'),
+    }
+
+
+def arrays_to_data(arrays):
+    return [
+        PuntoMolienda(l, d, h, SHIFT_NAMES[s], f)
+        for l, d, h, s, f in zip(arrays['lote_id'].tolist(), arrays['duracion_min'].tolist(),
+                                 arrays['humedad_pct'].tolist(), arrays['shift'].tolist(),
+                                 arrays['fecha'].tolist())
+    ]
+
+
+def _init_worker(arrays, output_dir, params):
+    _WORKER['data'] = arrays_to_data(arrays)
+    _WORKER['output_dir'] = output_dir
+    _WORKER['params'] = params
+
+
+def _render(name):
+    func, keys = CHARTS[name]
+    t0 = time.perf_counter()
+    result = func(_WORKER['data'], _WORKER['output_dir'], *[_WORKER['params'][k] for k in keys])
+    return name, result, time.perf_counter() - t0
+
+
+def render_charts(data, output_dir, lse=140, lie=100, target=120, names=None, workers=None,
+                  cache=None, decimate=None):
+    """Renderiza los gráficos de `CHARTS` (todos o `names`) y devuelve {nombre: (resultado, segundos)}.
+
+    Con `workers` != 1 cada gráfico se dibuja en un proceso del pool; los datos
+    viajan una sola vez por worker como arreglos y cada worker reconstruye los
+    registros localmente. Con `cache` (un `FigureCache`), los gráficos cuyas
+    columnas de entrada y parámetros no cambiaron se copian desde la caché
+    (segundos = 0.0) y solo el resto se dibuja. `decimate` se pasa a los
+    gráficos que lo admiten (None = automático).
+    """
+    with stage('render'):
+        return _render_charts(data, output_dir, lse, lie, target, names, workers, cache, decimate)
+
+
+def _render_charts(data, output_dir, lse, lie, target, names, workers, cache, decimate):
+    names = list(names or CHARTS)
+    params = {'lse': lse, 'lie': lie, 'target': target, 'decimate': decimate}
+    arrays = data_to_arrays(data)
+    results, keys, pending = [], {}, []
+    for name in names:
+        if cache is None:
+            pending.append(name)
+            continue
+        columns, filename = CHART_INPUTS[name]
+        keys[name] = cache.key(name, {k: params[k] for k in CHARTS[name][1]},
+                               **{c: arrays[c] for c in columns})
+        hit, result = cache.restore(keys[name], [os.path.join(output_dir, filename)])
+        if hit:
+            results.append((name, result, 0.0))
+        else:
+            pending.append(name)
+    count('figures_cached', len(names) - len(pending))
+    count('figures_rendered', len(pending))
+    if pending and workers == 1:
+        _init_worker(arrays, output_dir, params)
+        results += [_render(n) for n in pending]
+    elif pending:
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(arrays, output_dir, params)) as pool:
+            results += list(pool.map(_render, pending))
+    if cache is not None:
+        for name, result, _ in results:
+            if name in pending:
+                cache.store(keys[name], [os.path.join(output_dir, CHART_INPUTS[name][1])], result)
+    order = {n: i for i, n in enumerate(names)}
+    results.sort(key=lambda r: order[r[0]])
+    return {name: (result, secs) for name, result, secs in results}
+
 if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default='data/produccion_harina.csv', help='CSV de entrada')
+    p.add_argument('--out-dir', dest='outdir', default='data/figs', help='Directorio de salida')
+    p.add_argument('--cache', action='store_true', help='Leer desde la caché columnar (<csv>.cols/)')
+    p.add_argument('--workers', type=int, default=None,
+                   help='Procesos para renderizar (1 = secuencial; por defecto uno por gráfico)')
+    p.add_argument('--fig-cache', default=FIG_CACHE_ROOT,
+                   help='Directorio de la caché de gráficos (vacío para desactivarla)')
+    p.add_argument('--decimate', choices=['auto', 'on', 'off'], default='auto',
+                   help=f'Decimar I-MR y usar hexbin en el scatter (auto: más de {DECIMATE_THRESHOLD} puntos)')
+    p.add_argument('--ordenado', action='store_true',
+                   help='El CSV ya está ordenado por fecha_inicio (orden_externo.py): leerlo sin ordenar en memoria')
+    add_store_args(p)
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'generar_graficos_minitab')
+    filtros = store_filters(args)
+    if filtros and not args.db:
+        p.error('los filtros (--desde, --hasta, --shift, --lote, --area) requieren --db')
+
     # Configuración
-    DATA_PATH = 'data/produccion_harina.csv'
-    OUTPUT_DIR = 'data/figs'
+    DATA_PATH = args.infile
+    OUTPUT_DIR = args.outdir
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     LSE = 140
@@ -358,12 +596,22 @@ if __name__ == '__main__':
 
     # Cargar datos
     print("Cargando datos...")
-    data = load_data(DATA_PATH)
+    try:
+        data = load_data(DATA_PATH, args.cache, args.db, args.ordenado, **filtros)
+    except ValueError as e:
+        p.error(str(e))
     print(f"Datos cargados: {len(data)} lotes de molienda\n")
 
+    print(f"Renderizando {len(CHARTS)} gráficos...")
+    t0 = time.perf_counter()
+    fig_cache = FigureCache(args.fig_cache, SCRIPT_VERSION) if args.fig_cache else None
+    res = render_charts(data, OUTPUT_DIR, LSE, LIE, TARGET, workers=args.workers, cache=fig_cache,
+                        decimate={'auto': None, 'on': True, 'off': False}[args.decimate])
+    total = time.perf_counter() - t0
+
     # 1. Gráfico I-MR
-    print("Generando gráfico I-MR...")
-    out_of_control, x_bar, ucl, lcl = plot_imr_chart(data, OUTPUT_DIR, LSE, LIE)
+    print("\nGráfico I-MR:")
+    out_of_control, x_bar, ucl, lcl = res['imr'][0]
     print(f"  Media: {x_bar:.2f} min")
     print(f"  UCL: {ucl:.2f}, LCL: {lcl:.2f}")
     print(f"  Puntos fuera de control: {len(out_of_control)}")
@@ -371,28 +619,34 @@ if __name__ == '__main__':
         print(f"  Lotes: {', '.join([x[1] for x in out_of_control[:5]])}")
 
     # 2. Capacidad del Proceso
-    print("\nGenerando gráfico de capacidad...")
-    cp, cpk, pct_out = plot_capability(data, OUTPUT_DIR, LSE, LIE, TARGET)
+    print("\nGráfico de capacidad:")
+    cp, cpk, pct_out = res['capacidad'][0]
     print(f"  Cp: {cp:.3f}, Cpk: {cpk:.3f}")
     print(f"  % fuera de especificación: {pct_out:.2f}%")
 
     # 3. Probabilidad Normal
-    print("\nGenerando gráfico de probabilidad normal...")
-    plot_normal_probability(data, OUTPUT_DIR)
+    print("\nGráfico de probabilidad normal:")
     print("  Inspeccione visualmente si los puntos siguen la línea.")
 
     # 4. Box Plot por turno
-    print("\nGenerando box plot por turno...")
-    stats_turnos = plot_boxplot_by_shift(data, OUTPUT_DIR)
+    print("\nBox plot por turno:")
+    stats_turnos = res['boxplot_turnos'][0]
     for shift, s in stats_turnos.items():
         print(f"  {shift}: n={s['n']}, media={s['mean']:.2f}, std={s['std']:.2f}")
 
     # 5. Scatter Humedad
-    print("\nGenerando scatter humedad vs duración...")
-    r, a, b = plot_scatter_humidity(data, OUTPUT_DIR)
+    print("\nScatter humedad vs duración:")
+    r, a, b = res['scatter_humedad'][0]
     print(f"  Correlación: r={r:.3f}")
     print(f"  Ecuación: Duración = {a:.2f} + {b:.2f} × Humedad")
 
+    print("\nTiempos de renderizado:")
+    for name, (_, secs) in res.items():
+        print(f"  {name:<16} {secs:6.2f} s")
+    print(f"  {'total (pared)':<16} {total:6.2f} s")
+    if fig_cache is not None:
+        print(f"  caché: {fig_cache.hits} reutilizados, {fig_cache.misses} renderizados")
+
     print(f"\n✅ Todos los gráficos guardados en: {OUTPUT_DIR}/")
     print("Archivos generados:")
     print("  - grafico_imr.png")
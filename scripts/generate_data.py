@@ -3,10 +3,16 @@
 Genera un CSV con eventos por actividad por lote, con variabilidad y anomalías.
 """
 import csv
+import os
 import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import argparse
 
+from perfilado import add_profile_args, count, setup_profile, stage
+
 ACTIVITIES = [
     ("Limpieza","Acondicionamiento"),
     ("Control-Materia-Prima","Acondicionamiento"),
@@ -19,22 +25,43 @@ ACTIVITIES = [
 
 PARADA_MOTIVOS = ["", "mantenimiento", "atasco", "falla_electrica", "calibracion"]
 
+# Dotación de operadores por área (capacidad del simulador y base de la utilización en concurrencia)
+OPERADORES_AREA = {"Acondicionamiento": 8, "Molienda": 14, "Envasado": 6}
+
+# Duraciones base por actividad en minutos
+BASE_DURATION = {
+    "Limpieza": 30,
+    "Control-Materia-Prima": 20,
+    "Preparacion-Alimentacion-Molinos": 45,
+    "Molienda": 120,
+    "Control-Calidad-Molienda": 25,
+    "Preparacion-Dosificacion": 20,
+    "Sellado-Etiquetado": 35,
+}
+
+# yield base por lote (kg)
+BASE_YIELD = {
+    "Limpieza": 1000,
+    "Control-Materia-Prima": 1000,
+    "Preparacion-Alimentacion-Molinos": 950,
+    "Molienda": 900,
+    "Control-Calidad-Molienda": 900,
+    "Preparacion-Dosificacion": 880,
+    "Sellado-Etiquetado": 870,
+}
+
+FIELDNAMES = ["lote_id","fecha_inicio","fecha_fin","actividad","area","duracion_min","rendimiento_kg","humedad_pct","defectos_kg","motivo_parada","operadores","notas"]
+
+# Lotes por bloque del motor vectorizado: cada bloque tiene su propio stream
+# aleatorio y es la unidad de escritura (memoria acotada).
+BLOCK_LOTS = 10_000
+
 random.seed(42)
 
 
 def rand_time(start):
-    # Duraciones base por actividad en minutos
-    base = {
-        "Limpieza": 30,
-        "Control-Materia-Prima": 20,
-        "Preparacion-Alimentacion-Molinos": 45,
-        "Molienda": 120,
-        "Control-Calidad-Molienda": 25,
-        "Preparacion-Dosificacion": 20,
-        "Sellado-Etiquetado": 35,
-    }
     name = start
-    b = base.get(name, 30)
+    b = BASE_DURATION.get(name, 30)
     # variación +-30%
     duration = int(random.gauss(b, b*0.12))
     duration = max(1, duration)
@@ -47,17 +74,7 @@ def generate_row(lote_id, activity_name, area, start_ts):
     fecha_fin = fecha_inicio + timedelta(minutes=dur)
 
     # rendimiento y defectos
-    # yield base por lote (kg)
-    base_yield = {
-        "Limpieza": 1000,
-        "Control-Materia-Prima": 1000,
-        "Preparacion-Alimentacion-Molinos": 950,
-        "Molienda": 900,
-        "Control-Calidad-Molienda": 900,
-        "Preparacion-Dosificacion": 880,
-        "Sellado-Etiquetado": 870,
-    }
-    ry = base_yield.get(activity_name, 800)
+    ry = BASE_YIELD.get(activity_name, 800)
     # variación y pérdidas
     rendimiento = max(0, int(random.gauss(ry, ry*0.07)))
     humedad = round(max(8.0, random.gauss(12.0, 2.5)), 2)
@@ -116,18 +133,193 @@ def generate(n, out_path):
             ts += timedelta(minutes=random.randint(5, 60))
 
     # escribir csv
-    fieldnames = ["lote_id","fecha_inicio","fecha_fin","actividad","area","duracion_min","rendimiento_kg","humedad_pct","defectos_kg","motivo_parada","operadores","notas"]
     with open(out_path, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         for r in rows:
             writer.writerow(r)
     print(f"Generados {len(rows)} registros en {out_path}")
 
 
+def generate_block(first_lot, n_lots, start_date, seed=42):
+    """Genera con NumPy las actividades de `n_lots` lotes consecutivos.
+
+    Todas las variables (duración, rendimiento, humedad, defectos, paradas,
+    operadores y esperas) se sortean para el bloque completo de una vez,
+    con matrices de forma (lotes, actividades). El stream aleatorio se
+    deriva de (seed, índice de bloque), así cada bloque es reproducible por
+    sí mismo. Devuelve un iterable de filas en el orden de `FIELDNAMES`.
+    """
+    import numpy as np
+
+    block_idx = (first_lot - 1) // BLOCK_LOTS
+    rng = np.random.default_rng([seed, block_idx])
+    names = [a for a, _ in ACTIVITIES]
+    areas = [ar for _, ar in ACTIVITIES]
+    n_act = len(ACTIVITIES)
+    shape = (n_lots, n_act)
+
+    base_d = np.array([BASE_DURATION.get(a, 30) for a in names], dtype=float)
+    base_y = np.array([BASE_YIELD.get(a, 800) for a in names], dtype=float)
+    envasado = np.array([ar == "Envasado" for ar in areas])
+
+    lot_start = rng.integers(0, 60*24*28, size=n_lots, endpoint=True)
+    dur = np.maximum(1, rng.normal(base_d, base_d*0.12, size=shape).astype(np.int64))
+    rendimiento = np.maximum(0, rng.normal(base_y, base_y*0.07, size=shape).astype(np.int64))
+    humedad = np.round(np.maximum(8.0, rng.normal(12.0, 2.5, size=shape)), 2)
+
+    # defectos aleatorios
+    con_defecto = rng.random(shape) < 0.02
+    frac = rng.uniform(0.03, 0.15, size=shape)
+    defectos = np.where(con_defecto, (rendimiento * frac).astype(np.int64), 0)
+
+    # paradas raras (extienden la duración)
+    con_parada = rng.random(shape) < 0.04
+    motivo_idx = np.where(con_parada, rng.integers(1, len(PARADA_MOTIVOS), size=shape), 0)
+    extra = rng.integers(10, 120, size=shape, endpoint=True)
+    dur = dur + np.where(con_parada, extra, 0)
+
+    operadores = rng.integers(np.where(envasado, 1, 2), np.where(envasado, 4, 6), size=shape, endpoint=True)
+    gap = rng.integers(5, 60, size=shape, endpoint=True)
+
+    # inicio de cada actividad = inicio del lote + (duración + espera) acumuladas
+    paso = np.cumsum(dur + gap, axis=1)
+    ini = lot_start[:, None] + np.concatenate([np.zeros((n_lots, 1), dtype=np.int64), paso[:, :-1]], axis=1)
+    fin = ini + dur
+
+    base_ts = np.datetime64(start_date, 'us')
+    unit = 'us' if start_date.microsecond else 's'
+    ini_s = np.datetime_as_string(base_ts + ini.ravel().astype('timedelta64[m]'), unit=unit).tolist()
+    fin_s = np.datetime_as_string(base_ts + fin.ravel().astype('timedelta64[m]'), unit=unit).tolist()
+
+    notas_txt = ["", "Humedad alta", "Defectos detectados", "Humedad alta; Defectos detectados"]
+    notas_idx = (humedad > 15).astype(np.int64) + 2 * (defectos > 0)
+
+    lotes = [f"L-{1000+i}" for i in range(first_lot, first_lot + n_lots) for _ in range(n_act)]
+    return zip(
+        lotes,
+        ini_s,
+        fin_s,
+        names * n_lots,
+        areas * n_lots,
+        dur.ravel().tolist(),
+        rendimiento.ravel().tolist(),
+        humedad.ravel().tolist(),
+        defectos.ravel().tolist(),
+        [PARADA_MOTIVOS[i] for i in motivo_idx.ravel().tolist()],
+        operadores.ravel().tolist(),
+        [notas_txt[i] for i in notas_idx.ravel().tolist()],
+    )
+
+
+def generate_fast(n, out_path, seed=42, start_date=None):
+    """Versión vectorizada de `generate` para historiales grandes.
+
+    Mismo esquema CSV, tablas base y secuencia de actividades, pero escribe
+    por bloques de `BLOCK_LOTS` lotes, por lo que la memoria no depende de `n`.
+    Con la misma semilla y `start_date` el archivo resultante es idéntico.
+    """
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=30)
+    total = 0
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        for first in range(1, n+1, BLOCK_LOTS):
+            n_lots = min(BLOCK_LOTS, n + 1 - first)
+            writer.writerows(generate_block(first, n_lots, start_date, seed))
+            total += n_lots * len(ACTIVITIES)
+    print(f"Generados {total} registros en {out_path}")
+
+
+def _write_shard(job):
+    """Escribe en `path` los bloques de un shard (se ejecuta en un proceso del pool)."""
+    path, blocks, start_date, seed, header = job
+    total = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(FIELDNAMES)
+        for first, n_lots in blocks:
+            writer.writerows(generate_block(first, n_lots, start_date, seed))
+            total += n_lots * len(ACTIVITIES)
+    return total
+
+
+def split_shards(n, shards):
+    """Reparte los bloques de lotes 1..n en `shards` tramos contiguos y ordenados."""
+    blocks = [(first, min(BLOCK_LOTS, n + 1 - first)) for first in range(1, n+1, BLOCK_LOTS)]
+    shards = max(1, min(shards, len(blocks)))
+    size, rest = divmod(len(blocks), shards)
+    out = []
+    i = 0
+    for k in range(shards):
+        j = i + size + (1 if k < rest else 0)
+        out.append(blocks[i:j])
+        i = j
+    return out
+
+
+def generate_parallel(n, out_path, workers, seed=42, start_date=None, parts_dir=None):
+    """Genera el dataset repartiendo los lotes `L-{1000+i}` en shards sobre un pool de procesos.
+
+    Cada shard agrupa bloques contiguos y cada bloque usa el stream derivado de
+    (seed, índice de bloque), por lo que el resultado es idéntico byte a byte
+    para una semilla dada, sin importar el número de workers. Si `parts_dir`
+    se indica, deja un archivo `part-NNNNN.csv` por shard (cada uno con
+    cabecera); si no, concatena los shards en orden en `out_path`.
+    """
+    if start_date is None:
+        start_date = datetime.now() - timedelta(days=30)
+    shards = split_shards(n, workers)
+
+    if parts_dir:
+        os.makedirs(parts_dir, exist_ok=True)
+        jobs = [(os.path.join(parts_dir, f"part-{k:05d}.csv"), b, start_date, seed, True) for k, b in enumerate(shards)]
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="gen_", dir=os.path.dirname(os.path.abspath(out_path)))
+        jobs = [(os.path.join(tmp_dir, f"part-{k:05d}.csv"), b, start_date, seed, False) for k, b in enumerate(shards)]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            total = sum(pool.map(_write_shard, jobs))
+        if not parts_dir:
+            with open(out_path, "w", newline="") as out:
+                csv.writer(out).writerow(FIELDNAMES)
+                for path, *_ in jobs:
+                    with open(path, newline="") as part:
+                        shutil.copyfileobj(part, out, 1 << 20)
+    finally:
+        if not parts_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"Generados {total} registros en {parts_dir or out_path} ({len(shards)} shards, {workers} workers)")
+
+
 if __name__ == '__main__':
     p = argparse.ArgumentParser()
     p.add_argument('--n', type=int, default=200, help='Número de lotes a generar')
     p.add_argument('--out', type=str, default='data/produccion_harina.csv')
+    p.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                   help='Motor de generación: fila a fila (python) o por bloques vectorizados (numpy)')
+    p.add_argument('--seed', type=int, default=42, help='Semilla del motor numpy')
+    p.add_argument('--start', type=str, default=None,
+                   help='Fecha ISO de inicio del horizonte (por defecto: hace 30 días)')
+    p.add_argument('--workers', type=int, default=0,
+                   help='Procesos en paralelo (usa el motor numpy repartido en shards)')
+    p.add_argument('--parts-dir', type=str, default=None,
+                   help='Con --workers: escribir un CSV por shard en este directorio en vez de unirlos')
+    add_profile_args(p)
     args = p.parse_args()
-    generate(args.n, args.out)
+    setup_profile(args, 'generate_data')
+    start = datetime.fromisoformat(args.start) if args.start else None
+    with stage('generate'):
+        if args.workers > 0:
+            generate_parallel(args.n, args.out, args.workers, seed=args.seed, start_date=start, parts_dir=args.parts_dir)
+        elif args.engine == 'numpy':
+            generate_fast(args.n, args.out, seed=args.seed, start_date=start)
+        else:
+            generate(args.n, args.out)
+        count('rows', args.n * len(ACTIVITIES))
+        if not args.parts_dir:
+            count('bytes_written', os.path.getsize(args.out))
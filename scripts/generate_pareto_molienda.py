@@ -5,68 +5,63 @@ Guarda outputs en `data/figs/pareto_molienda.png` y `data/figs/pareto_molienda_t
 """
 import csv
 import os
+import argparse
 from collections import Counter, OrderedDict
+import matplotlib
 import matplotlib.pyplot as plt
 
+from eventos import read_records
+from figure_cache import DEFAULT_ROOT as FIG_CACHE_ROOT, FigureCache, source_version
+from pareto_classifier import KeywordClassifier
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+
 INPUT = 'data/minitab_exports/minitab_molienda_variabilidad.csv'
 OUT_DIR = 'data/figs'
 os.makedirs(OUT_DIR, exist_ok=True)
 
 
+# Categorías y palabras clave (en orden de prioridad)
+MAPPING = [
+    ('Mantenimiento correctivo', ['mantenimiento', 'mantenimiento correctivo']),
+    ('Falla eléctrica', ['falla_electrica', 'falla electrica', 'falla eléctrica', 'falla-electrica']),
+    ('Calibración', ['calibracion', 'calibración']),
+    ('Humedad alta', ['humedad alta', 'humedad alta', 'humedadalta']),
+    ('Defectos detectados', ['defectos detectados', 'defectos']),
+    ('Atasco / bloqueo', ['atasco', 'atascado', 'bloqueo']),
+]
+
+# map some free-text common words (solo si no hubo keyword ni humedad alta)
+FALLBACK = [
+    ('Calibración', ['calibr']),
+    ('Mantenimiento correctivo', ['mantenimiento']),
+    ('Falla eléctrica', ['falla', 'electr']),
+    ('Humedad alta', ['humedad']),
+    ('Defectos detectados', ['defect']),
+    ('Atasco / bloqueo', ['atasc', 'bloque']),
+]
+
+SCRIPT_VERSION = f'{source_version(__file__)}-mpl{matplotlib.__version__}'
+
+CLASSIFIER = KeywordClassifier(MAPPING, FALLBACK, default='Otros motivos', strip=True)
+
+
 def categorize_row(row):
-    motivo = (row.get('motivo_parada') or '').strip().lower()
-    notas = (row.get('notas') or '').strip().lower()
-    combined = ' '.join([motivo, notas])
-
-    # Categorías y palabras clave
-    mapping = [
-        ('Mantenimiento correctivo', ['mantenimiento', 'mantenimiento correctivo']),
-        ('Falla eléctrica', ['falla_electrica', 'falla electrica', 'falla eléctrica', 'falla-electrica']),
-        ('Calibración', ['calibracion', 'calibración']),
-        ('Humedad alta', ['humedad alta', 'humedad alta', 'humedadalta']),
-        ('Defectos detectados', ['defectos detectados', 'defectos']),
-        ('Atasco / bloqueo', ['atasco', 'atascado', 'bloqueo']),
-        ('Otros motivos', [])
-    ]
-
-    for cat, keys in mapping[:-1]:
-        for k in keys:
-            if k in combined:
-                return cat
-    # Si no coincide con keywords, revisar humedad_pct alta
-    try:
-        hum = float(row.get('humedad_pct') or 0)
-        if hum >= 15:
-            return 'Humedad alta'
-    except:
-        pass
-
-    if combined:
-        # map some free-text common words
-        if 'calibr' in combined:
-            return 'Calibración'
-        if 'mantenimiento' in combined:
-            return 'Mantenimiento correctivo'
-        if 'falla' in combined or 'electr' in combined:
-            return 'Falla eléctrica'
-        if 'humedad' in combined:
-            return 'Humedad alta'
-        if 'defect' in combined:
-            return 'Defectos detectados'
-        if 'atasc' in combined or 'bloque' in combined:
-            return 'Atasco / bloqueo'
-
-    return 'Otros motivos'
-
-
-def main():
-    rows = list(csv.DictReader(open(INPUT)))
+    return CLASSIFIER.classify(row)
+
+
+def main(cache_file=None, fig_cache=FIG_CACHE_ROOT, infile=INPUT, out_dir=OUT_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    with stage('load'):
+        count_file(infile)
+        rows = list(read_records(infile))
+        count('rows', len(rows))
+    cache = CLASSIFIER.enable_cache(path=cache_file)
     n = len(rows)
     counts = Counter()
 
-    for r in rows:
-        cat = categorize_row(r)
-        counts[cat] += 1
+    with stage('classify'):
+        counts.update(CLASSIFIER.classify_rows(rows))
+        count('rows_classified', n)
 
     # Ensure consistent ordering: descending
     ordered = OrderedDict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
@@ -81,7 +76,7 @@ def main():
         cum.append(s)
 
     # Write summary CSV in Pareto format similar to requested table
-    out_table = os.path.join(OUT_DIR, 'pareto_molienda_table.csv')
+    out_table = os.path.join(out_dir, 'pareto_molienda_table.csv')
     with open(out_table, 'w', newline='') as f:
         w = csv.writer(f)
         w.writerow(['Causa a Raíz', 'Frecuencia del Evento', 'Participación', 'Participación Acumulada (%)'])
@@ -89,37 +84,60 @@ def main():
             w.writerow([c, fcount, f'{p:.0f}%', f'{ac:.0f}%'])
 
     # Plot Pareto
-    fig, ax1 = plt.subplots(figsize=(9,5))
-    bars = ax1.bar(labels, freqs, color='tab:blue', alpha=0.9)
-
-    # Color top 3 differently
-    for i, bar in enumerate(bars):
-        if i < 3:
-            bar.set_color('#0b8043')
-
-    ax1.set_ylabel('Frecuencia', fontweight='bold')
-    ax1.set_xlabel('Causa raíz')
-
-    ax2 = ax1.twinx()
-    ax2.plot(labels, cum, color='#ff7f0e', marker='o', linewidth=2)
-    ax2.set_ylabel('Porcentaje acumulado (%)', fontweight='bold')
-    ax2.set_ylim(0, 105)
-
-    # Annotate percentages above bars
-    for i, (fcount, pct) in enumerate(zip(freqs, perc)):
-        ax1.text(i, fcount + max(freqs)*0.02, f'{pct:.1f}%', ha='center', fontsize=9)
-
-    plt.title('Pareto - Causas de variabilidad (Molienda)', fontsize=14, fontweight='bold')
-    plt.tight_layout()
-    out_png = os.path.join(OUT_DIR, 'pareto_molienda.png')
-    plt.savefig(out_png, dpi=200)
-    plt.close()
+    out_png = os.path.join(out_dir, 'pareto_molienda.png')
+    # el gráfico depende solo de las frecuencias: si no cambiaron, se reutiliza
+    figs = FigureCache(fig_cache, SCRIPT_VERSION, enabled=bool(fig_cache))
+    key = figs.key('pareto_molienda', labels=labels, freqs=freqs, n=n)
+    hit, _ = figs.restore(key, [out_png])
+    with stage('render'):
+        if not hit:
+            fig, ax1 = plt.subplots(figsize=(9,5))
+            bars = ax1.bar(labels, freqs, color='tab:blue', alpha=0.9)
+
+            # Color top 3 differently
+            for i, bar in enumerate(bars):
+                if i < 3:
+                    bar.set_color('#0b8043')
+
+            ax1.set_ylabel('Frecuencia', fontweight='bold')
+            ax1.set_xlabel('Causa raíz')
+
+            ax2 = ax1.twinx()
+            ax2.plot(labels, cum, color='#ff7f0e', marker='o', linewidth=2)
+            ax2.set_ylabel('Porcentaje acumulado (%)', fontweight='bold')
+            ax2.set_ylim(0, 105)
+
+            # Annotate percentages above bars
+            for i, (fcount, pct) in enumerate(zip(freqs, perc)):
+                ax1.text(i, fcount + max(freqs)*0.02, f'{pct:.1f}%', ha='center', fontsize=9)
+
+            plt.title('Pareto - Causas de variabilidad (Molienda)', fontsize=14, fontweight='bold')
+            plt.tight_layout()
+            plt.savefig(out_png, dpi=200)
+            plt.close()
+            count('figures_rendered')
+            figs.store(key, [out_png])
 
     # Print summary
     print('Total filas analizadas:', n)
     print('Resumen Pareto:')
     for c, fcount, p, ac in zip(labels, freqs, perc, cum):
         print(f'  {c}: {fcount} ({p:.2f}%), acumulado {ac:.2f}%')
+    print('Gráfico:', out_png, '(reutilizado de la caché)' if hit else '(renderizado)')
+    cache.save()
+    st = cache.stats()
+    print(f"Caché de clasificación: {st['hits']} aciertos, {st['misses']} fallos ({st['hit_rate']:.1%}), {st['size']} entradas")
+
 
 if __name__ == '__main__':
-    main()
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default=INPUT, help='CSV de variabilidad de molienda')
+    p.add_argument('--out-dir', dest='outdir', default=OUT_DIR, help='Directorio de salida')
+    p.add_argument('--cache-file', dest='cache_file', default=None,
+                   help='JSON donde persistir el caché de clasificaciones entre corridas')
+    p.add_argument('--fig-cache', default=FIG_CACHE_ROOT,
+                   help='Directorio de la caché de gráficos (vacío para desactivarla)')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'generate_pareto_molienda')
+    main(args.cache_file, args.fig_cache, args.infile, args.outdir)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Estado persistido de KPIs para recálculo incremental.
+
+Guarda en un JSON los acumuladores por actividad y por área, un histograma de
+duraciones por actividad y la marca de agua (offset en bytes) hasta donde se
+leyó el CSV. En la siguiente corrida solo se procesan las filas agregadas al
+final del archivo; si el archivo fue reescrito (es más corto que la marca de
+agua o cambiaron los bytes del inicio o los previos a la marca) se reconstruye
+el estado desde cero.
+
+Uso:
+  python3 scripts/kpi_state.py --in data/produccion_harina.csv --state data/.kpi_state.json
+"""
+import csv
+import hashlib
+import json
+import os
+import argparse
+
+from analyze_data import ActivityStats
+from perfilado import add_profile_args, count, setup_profile, stage
+
+STATE_VERSION = 1
+_CHECK_BYTES = 4096
+
+
+def _digest(path, start, end):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        h.update(f.read(end - start))
+    return h.hexdigest()
+
+
+def empty_state(csv_path):
+    return {
+        'version': STATE_VERSION,
+        'source': os.path.abspath(csv_path),
+        'offset': 0,
+        'rows': 0,
+        'header': None,
+        'prefix_sha1': None,
+        'tail_sha1': None,
+        'activities': {},
+        'areas': {},
+        'dur_hist': {},
+    }
+
+
+def load_state(state_path, csv_path):
+    if not state_path or not os.path.exists(state_path):
+        return empty_state(csv_path)
+    with open(state_path) as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        return empty_state(csv_path)
+    return state
+
+
+def save_state(state, state_path):
+    tmp = state_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+
+
+def is_append_only(state, csv_path):
+    """True si el CSV conserva intacto el tramo ya procesado según el estado."""
+    offset = state['offset']
+    if offset == 0:
+        return True
+    if state['source'] != os.path.abspath(csv_path):
+        return False
+    if os.path.getsize(csv_path) < offset:
+        return False
+    if _digest(csv_path, 0, min(offset, _CHECK_BYTES)) != state['prefix_sha1']:
+        return False
+    return _digest(csv_path, max(0, offset - _CHECK_BYTES), offset) == state['tail_sha1']
+
+
+def _complete_lines(f, pos):
+    """Itera las líneas completas desde `pos`, actualizando pos[0] con el offset leído."""
+    for line in f:
+        if not line.endswith(b'\n'):
+            # línea a medio escribir: se procesa en la próxima corrida
+            break
+        pos[0] += len(line)
+        yield line.decode('utf-8')
+
+
+def update_state(csv_path, state):
+    """Procesa las filas nuevas del CSV y las fusiona en `state`. Devuelve filas nuevas."""
+    pos = [state['offset']]
+    acts = {k: ActivityStats.from_dict(v) for k, v in state['activities'].items()}
+    areas = {k: ActivityStats.from_dict(v) for k, v in state['areas'].items()}
+    hist = state['dur_hist']
+    new_rows = 0
+    with open(csv_path, 'rb') as f:
+        f.seek(pos[0])
+        reader = csv.reader(_complete_lines(f, pos))
+        if state['header'] is None:
+            header = next(reader, None)
+            if header is None:
+                return 0
+            state['header'] = header
+        header = state['header']
+        i_act = header.index('actividad')
+        i_area = header.index('area')
+        i_dur = header.index('duracion_min')
+        i_rend = header.index('rendimiento_kg')
+        i_hum = header.index('humedad_pct')
+        i_def = header.index('defectos_kg')
+        i_ops = header.index('operadores')
+        for r in reader:
+            if not r:
+                continue
+            dur = int(r[i_dur])
+            vals = (dur, int(r[i_rend]), float(r[i_hum]), int(r[i_def]), int(r[i_ops]))
+            acc = acts.get(r[i_act])
+            if acc is None:
+                acc = acts[r[i_act]] = ActivityStats()
+            acc.add(*vals)
+            acc = areas.get(r[i_area])
+            if acc is None:
+                acc = areas[r[i_area]] = ActivityStats()
+            acc.add(*vals)
+            h = hist.setdefault(r[i_act], {})
+            h[str(dur)] = h.get(str(dur), 0) + 1
+            new_rows += 1
+
+    offset = pos[0]
+    state['offset'] = offset
+    state['rows'] += new_rows
+    state['activities'] = {k: v.to_dict() for k, v in acts.items()}
+    state['areas'] = {k: v.to_dict() for k, v in areas.items()}
+    state['prefix_sha1'] = _digest(csv_path, 0, min(offset, _CHECK_BYTES))
+    state['tail_sha1'] = _digest(csv_path, max(0, offset - _CHECK_BYTES), offset)
+    return new_rows
+
+
+def refresh(csv_path, state_path):
+    """Carga el estado, lo pone al día con el CSV y lo guarda.
+
+    Devuelve (state, filas_nuevas, reconstruido).
+    """
+    with stage('load'):
+        state = load_state(state_path, csv_path)
+        rebuilt = False
+        if not is_append_only(state, csv_path):
+            state = empty_state(csv_path)
+            rebuilt = True
+    with stage('aggregate'):
+        offset = state['offset']
+        new_rows = update_state(csv_path, state)
+        count('rows', new_rows)
+        count('bytes_read', state['offset'] - offset)
+    if state_path:
+        with stage('write'):
+            save_state(state, state_path)
+    return state, new_rows, rebuilt
+
+
+def kpis_from_state(state, by='activities'):
+    """KPIs (mismo formato que `analyze_data.stream_kpis`) por actividad o por área."""
+    return {k: ActivityStats.from_dict(v).result() for k, v in state[by].items()}
+
+
+def duration_histogram(state, actividad):
+    """Histograma {duracion_min: frecuencia} de una actividad (sin distinguir mayúsculas)."""
+    for act, h in state['dur_hist'].items():
+        if act.lower() == actividad.lower():
+            return {int(k): v for k, v in h.items()}
+    return {}
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', required=True, help='CSV de entrada')
+    p.add_argument('--state', required=True, help='Archivo JSON de estado')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'kpi_state')
+    state, new_rows, rebuilt = refresh(args.infile, args.state)
+    modo = 'reconstrucción completa' if rebuilt else 'incremental'
+    print(f"Estado actualizado ({modo}): {new_rows} filas nuevas, {state['rows']} en total, offset {state['offset']}")
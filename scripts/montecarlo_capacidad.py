@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Proyección Monte Carlo de capacidad del proceso (Cp, Cpk, % fuera de especificación, nivel sigma).
+
+Para cada combinación (media, sigma) de la grilla se simulan `replicas`
+muestras de tamaño `n` en un solo sorteo NumPy (matriz replicas × n), con la
+misma regla de la proyección de `calcular_indicadores_lss.py`: duración entera
+y piso de 90 min. De las réplicas salen las distribuciones de cada indicador y
+sus intervalos percentiles. Con grillas grandes las celdas se reparten en un
+pool de procesos; cada celda usa el stream (seed, índice de celda), así que el
+resultado no depende del número de workers.
+
+Uso:
+  python3 scripts/montecarlo_capacidad.py --means 120 --sigmas 7.37 5 4 --replicas 5000 \
+      --out data/analysis/montecarlo_capacidad.csv
+"""
+import csv
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from estadistica import nivel_sigma
+from perfilado import add_profile_args, count, setup_profile, stage
+
+METRICAS = ['mean', 'std', 'cp', 'cpk', 'pct_defects', 'nivel_sigma']
+CHUNK_REPLICAS = 10_000
+POOL_MIN_CELDAS = 8
+
+
+def simular_celda(mu, sigma, n, replicas, lse, lie, seed=42, celda=0, piso=90, entero=True):
+    """Simula `replicas` muestras de tamaño `n` y devuelve un dict métrica → arreglo por réplica."""
+    rng = np.random.default_rng([seed, celda])
+    partes = {m: [] for m in METRICAS}
+    for inicio in range(0, replicas, CHUNK_REPLICAS):
+        k = min(CHUNK_REPLICAS, replicas - inicio)
+        x = rng.normal(mu, sigma, size=(k, n))
+        if entero:
+            x = np.trunc(x)
+        if piso is not None:
+            x = np.maximum(piso, x)
+        m = x.mean(axis=1)
+        s = x.std(axis=1, ddof=1)
+        cp = (lse - lie) / (6 * s)
+        cpk = np.minimum((lse - m) / (3 * s), (m - lie) / (3 * s))
+        fuera = ((x < lie) | (x > lse)).sum(axis=1)
+        pct = fuera / n * 100
+        partes['mean'].append(m)
+        partes['std'].append(s)
+        partes['cp'].append(cp)
+        partes['cpk'].append(cpk)
+        partes['pct_defects'].append(pct)
+        partes['nivel_sigma'].append(nivel_sigma(fuera / n * 1_000_000))
+    return {m: np.concatenate(v) for m, v in partes.items()}
+
+
+def _resumir(args):
+    mu, sigma, n, replicas, lse, lie, seed, celda, piso, entero, alpha = args
+    dist = simular_celda(mu, sigma, n, replicas, lse, lie, seed, celda, piso, entero)
+    filas = []
+    for metrica in METRICAS:
+        v = dist[metrica]
+        lo, p50, hi = np.percentile(v, [100 * alpha / 2, 50, 100 * (1 - alpha / 2)])
+        filas.append({
+            'mu': mu, 'sigma': sigma, 'n': n, 'replicas': replicas,
+            'metrica': metrica,
+            'media': float(v.mean()),
+            'p_lo': float(lo), 'p50': float(p50), 'p_hi': float(hi),
+        })
+    return filas
+
+
+def simular_grilla(means, sigmas, n=200, replicas=5000, lse=140, lie=100, seed=42,
+                   piso=90, entero=True, alpha=0.05, workers=None):
+    """Simula toda la grilla means × sigmas y devuelve la tabla ordenada (lista de dicts).
+
+    `p_lo`/`p_hi` son los percentiles del intervalo (1 - alpha). Si la grilla
+    tiene al menos `POOL_MIN_CELDAS` celdas y `workers` != 1, se usa un pool de
+    procesos.
+    """
+    celdas = [(float(mu), float(s)) for mu in means for s in sigmas]
+    jobs = [(mu, s, n, replicas, lse, lie, seed, i, piso, entero, alpha) for i, (mu, s) in enumerate(celdas)]
+    if workers != 1 and len(jobs) >= POOL_MIN_CELDAS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(_resumir, jobs))
+    else:
+        resultados = [_resumir(j) for j in jobs]
+    return [fila for filas in resultados for fila in filas]
+
+
+def escribir_tabla(filas, out_path):
+    campos = ['mu', 'sigma', 'n', 'replicas', 'metrica', 'media', 'p_lo', 'p50', 'p_hi']
+    with open(out_path, 'w', newline='') as f:
+        w = csv.DictWriter(f, fieldnames=campos)
+        w.writeheader()
+        for fila in filas:
+            w.writerow({k: (round(v, 6) if isinstance(v, float) else v) for k, v in fila.items()})
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--means', type=float, nargs='+', default=[120.0], help='Medias objetivo (min)')
+    p.add_argument('--sigmas', type=float, nargs='+', default=[8.0], help='Sigmas objetivo (min)')
+    p.add_argument('--n', type=int, default=200, help='Tamaño de cada muestra simulada')
+    p.add_argument('--replicas', type=int, default=5000, help='Réplicas por celda')
+    p.add_argument('--lse', type=float, default=140)
+    p.add_argument('--lie', type=float, default=100)
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--alpha', type=float, default=0.05, help='1 - nivel del intervalo percentil')
+    p.add_argument('--workers', type=int, default=None, help='Procesos del pool (1 = sin pool)')
+    p.add_argument('--out', default='data/analysis/montecarlo_capacidad.csv')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'montecarlo_capacidad')
+
+    with stage('simulate'):
+        filas = simular_grilla(args.means, args.sigmas, args.n, args.replicas, args.lse, args.lie,
+                               args.seed, alpha=args.alpha, workers=args.workers)
+        count('replicas', len(args.means) * len(args.sigmas) * args.replicas)
+    with stage('write'):
+        escribir_tabla(filas, args.out)
+        count('rows_written', len(filas))
+    nivel = int(round((1 - args.alpha) * 100))
+    for fila in filas:
+        if fila['metrica'] in ('cpk', 'pct_defects'):
+            print(f"μ={fila['mu']:.2f} σ={fila['sigma']:.2f} {fila['metrica']:>11}: "
+                  f"{fila['p50']:.4f} (IC {nivel}%: {fila['p_lo']:.4f} – {fila['p_hi']:.4f})")
+    print(f"Tabla escrita en {args.out}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Ordenamiento externo (fuera de memoria) de los CSV del proyecto.
+
+Ordena cualquier CSV (`produccion_harina.csv`, los exportes de Minitab, el log
+de la ingesta) por una o más columnas con un presupuesto de memoria fijo:
+
+1. se leen tramos de filas hasta llenar `--memoria-mb` (estimado por fila a
+   partir del largo de sus campos), se ordenan en memoria y se vuelcan como
+   runs ordenados a disco (`--tmp-dir`); si el archivo entra en un solo tramo
+   no se escribe ningún run;
+2. los runs se combinan con una mezcla k-way sobre un heap (`heapq.merge`),
+   leyendo cada uno en streaming. Con más de `--fan-in` runs se mezclan
+   primero por grupos en pasadas intermedias, para no abrir cientos de
+   archivos a la vez.
+
+El orden es estable: ante claves iguales se conserva el orden original (y,
+con varios archivos, el del primero listado). Las columnas se comparan como
+texto (las fechas ISO ordenan bien así), salvo las numéricas del esquema de
+eventos (`duracion_min`, `humedad_pct`, ...), que se comparan como números, y
+`lote_id`, que se compara por su número (`L-999` antes que `L-1000`).
+
+Los análisis sensibles al orden leen la salida en streaming sin volver a
+ordenarla en memoria: `generar_graficos_minitab.py --ordenado` (la serie I-MR
+se toma tal como viene, verificando el orden al leer) y `spc_monitor.py
+--cronologico` (las cartas reciben las observaciones en orden temporal desde
+`ordenar_filas`). `leer_ordenado` ofrece la misma lectura verificada para
+cualquier columna; `--verificar` solo comprueba el orden.
+
+Uso:
+  python3 scripts/orden_externo.py --in data/produccion_harina.csv --por fecha_inicio --out data/produccion_ordenada.csv
+  python3 scripts/orden_externo.py --in data/produccion_harina.csv --por lote_id fecha_inicio --memoria-mb 64
+  python3 scripts/orden_externo.py --in data/produccion_ordenada.csv --por fecha_inicio --verificar
+"""
+import argparse
+import csv
+import heapq
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+from itertools import islice
+from operator import itemgetter
+
+from eventos import EVENT_TYPES
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+
+MEMORY_MB = 256
+FAN_IN = 64
+STR_OVERHEAD = 49  # bytes de un str ASCII vacío (CPython)
+KEY_OVERHEAD = 72  # clave de orden por fila (tupla o número convertido)
+
+NUMERIC_COLUMNS = frozenset(EVENT_TYPES)
+_LOTE_RE = re.compile(r'(\D*)(\d+)$')
+
+
+def _numero(v):
+    return float(v) if v else math.inf  # vacíos al final
+
+
+def _lote(v):
+    m = _LOTE_RE.match(v)
+    return (m.group(1), int(m.group(2))) if m else (v, -1)
+
+
+def clave_de(header, columnas, numericas=NUMERIC_COLUMNS):
+    """Función de clave de orden para filas de `csv.reader` con columnas `header`."""
+    faltan = [c for c in columnas if c not in header]
+    if faltan:
+        raise ValueError(f'Columnas inexistentes: {", ".join(faltan)} (disponibles: {", ".join(header)})')
+    idx = [header.index(c) for c in columnas]
+    convs = [_numero if c in numericas else _lote if c == 'lote_id' else None for c in columnas]
+    if len(idx) == 1:
+        i, conv = idx[0], convs[0]
+        return itemgetter(i) if conv is None else (lambda r: conv(r[i]))
+    if not any(convs):
+        return itemgetter(*idx)
+    pares = list(zip(idx, convs))
+    return lambda r: tuple(r[i] if conv is None else conv(r[i]) for i, conv in pares)
+
+
+def _tramos(filas, presupuesto, base):
+    """Agrupa `filas` en listas cuyo tamaño estimado en memoria no supera `presupuesto` bytes.
+
+    Genera (tramo, es_el_último); mira una sola fila por adelantado para saberlo.
+    """
+    filas = iter(filas)
+    r = next(filas, None)
+    while r is not None:
+        tramo, usado = [], 0
+        while r is not None and usado < presupuesto:
+            tramo.append(r)
+            usado += base + sum(map(len, r))
+            r = next(filas, None)
+        yield tramo, r is None
+
+
+def _leer_run(path):
+    with open(path, newline='') as f:
+        yield from csv.reader(f)
+
+
+def _escribir_run(filas, tmpdir):
+    fd, path = tempfile.mkstemp(suffix='.csv', dir=tmpdir)
+    with open(fd, 'w', newline='') as out:
+        csv.writer(out).writerows(filas)
+    count('runs')
+    return path
+
+
+def _runs(path, header, clave, presupuesto, tmpdir, en_memoria=False):
+    """Runs ordenados que cubren el CSV `path`, con las columnas en el orden de `header`.
+
+    Devuelve rutas de runs en disco o, con `en_memoria` y un archivo que entra
+    en un tramo, la lista ordenada misma.
+    """
+    count_file(path)
+    runs = []
+    base = sys.getsizeof([None] * len(header)) + STR_OVERHEAD * len(header) + KEY_OVERHEAD
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        propio = next(reader)
+        if sorted(propio) != sorted(header):
+            raise ValueError(f'{path}: las columnas no coinciden con las de los demás archivos')
+        if propio != header:
+            pick = itemgetter(*[propio.index(c) for c in header])
+            reader = (list(pick(r)) for r in reader)
+        for tramo, ultimo in _tramos(reader, presupuesto, base):
+            tramo.sort(key=clave)
+            count('rows', len(tramo))
+            if en_memoria and ultimo and not runs:
+                return [tramo]  # el archivo entero cupo en memoria
+            runs.append(_escribir_run(tramo, tmpdir))
+            del tramo
+    return runs
+
+
+def _pasadas(runs, clave, fan_in, tmpdir):
+    """Mezcla los runs por grupos consecutivos hasta que queden a lo sumo `fan_in`."""
+    while len(runs) > fan_in:
+        nuevos = []
+        for i in range(0, len(runs), fan_in):
+            grupo = runs[i:i + fan_in]
+            if len(grupo) == 1:
+                nuevos.append(grupo[0])
+                continue
+            nuevos.append(_escribir_run(heapq.merge(*map(_leer_run, grupo), key=clave), tmpdir))
+            for r in grupo:
+                os.remove(r)
+        count('merge_passes')
+        runs = nuevos
+    return runs
+
+
+def ordenar_filas(paths, columnas, memoria_mb=MEMORY_MB, fan_in=FAN_IN, tmpdir=None):
+    """(header, generador de filas) de todos `paths` ordenados por `columnas`.
+
+    Las filas son listas de texto con las columnas de `header` (el del primer
+    archivo). Los runs temporales se borran al agotar o cerrar el generador.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    if fan_in < 2:
+        raise ValueError('fan_in debe ser al menos 2')
+    with open(paths[0], newline='') as f:
+        header = next(csv.reader(f))
+    clave = clave_de(header, columnas)
+    presupuesto = memoria_mb * (1 << 20)
+
+    def filas():
+        dir_runs = tempfile.mkdtemp(prefix='runs-', dir=tmpdir)
+        try:
+            fuentes = []
+            # con varios archivos cada tramo va a disco: en memoria queda uno solo a la vez
+            for p in paths:
+                fuentes.extend(_runs(p, header, clave, presupuesto, dir_runs, en_memoria=len(paths) == 1))
+            if len(fuentes) == 1 and isinstance(fuentes[0], list):
+                yield from fuentes[0]
+                return
+            runs = _pasadas(fuentes, clave, fan_in, dir_runs)
+            if len(runs) == 1:
+                yield from _leer_run(runs[0])
+            else:
+                yield from heapq.merge(*map(_leer_run, runs), key=clave)
+        finally:
+            shutil.rmtree(dir_runs, ignore_errors=True)
+
+    return header, filas()
+
+
+def ordenar_csv(paths, out, columnas, memoria_mb=MEMORY_MB, fan_in=FAN_IN, tmpdir=None):
+    """Escribe en `out` las filas de `paths` ordenadas (se reemplaza al final: `out` puede ser la entrada)."""
+    header, filas = ordenar_filas(paths, columnas, memoria_mb, fan_in, tmpdir)
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    tmp = out + '.tmp'
+    n = 0
+    with open(tmp, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for lote in iter(lambda: list(islice(filas, 10_000)), []):
+            w.writerows(lote)
+            n += len(lote)
+    os.replace(tmp, out)
+    count('rows_written', n)
+    return n
+
+
+def leer_ordenado(path, columnas):
+    """(header, generador de filas) de un CSV que ya debe estar ordenado por `columnas`.
+
+    Verifica el orden mientras lee, sin cargar el archivo: ante la primera
+    fila fuera de orden levanta ValueError.
+    """
+    f = open(path, newline='')
+    reader = csv.reader(f)
+    header = next(reader)
+    clave = clave_de(header, columnas)
+
+    def filas():
+        with f:
+            previa = None
+            for n, r in enumerate(reader, 2):
+                k = clave(r)
+                if previa is not None and k < previa:
+                    raise ValueError(f'{path}: la línea {n} rompe el orden por {", ".join(columnas)}; '
+                                     f'ordenarlo antes con scripts/orden_externo.py')
+                previa = k
+                yield r
+
+    return header, filas()
+
+
+def esta_ordenado(path, columnas):
+    _, filas = leer_ordenado(path, columnas)
+    try:
+        for _ in filas:
+            pass
+    except ValueError:
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infiles', nargs='+', required=True, help='CSV a ordenar (uno o varios, mismas columnas)')
+    p.add_argument('--out', default=None, help='CSV ordenado (por defecto, <entrada>.ordenado.csv)')
+    p.add_argument('--por', nargs='+', default=['fecha_inicio'], help='Columnas de orden (p. ej. fecha_inicio o lote_id)')
+    p.add_argument('--memoria-mb', type=float, default=MEMORY_MB, help='Memoria para ordenar cada tramo')
+    p.add_argument('--fan-in', type=int, default=FAN_IN, help='Runs que se mezclan a la vez')
+    p.add_argument('--tmp-dir', default=None, help='Directorio para los runs temporales')
+    p.add_argument('--verificar', action='store_true', help='Solo comprobar si la entrada ya está ordenada')
+    add_profile_args(p)
+    args = p.parse_args()
+    if args.memoria_mb <= 0 or args.fan_in < 2:
+        p.error('--memoria-mb debe ser positivo y --fan-in al menos 2')
+    setup_profile(args, 'orden_externo')
+
+    try:
+        if args.verificar:
+            malos = [f for f in args.infiles if not esta_ordenado(f, args.por)]
+            for f in args.infiles:
+                print(f'{f}: {"NO ordenado" if f in malos else "ordenado"} por {", ".join(args.por)}')
+            sys.exit(1 if malos else 0)
+        out = args.out or os.path.splitext(args.infiles[0])[0] + '.ordenado.csv'
+        with stage('sort'):
+            n = ordenar_csv(args.infiles, out, args.por, args.memoria_mb, args.fan_in, args.tmp_dir)
+    except ValueError as e:
+        p.error(str(e))
+    print(f'{n} filas ordenadas por {", ".join(args.por)} en {out}')
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Clasificador de causas raíz compartido por los scripts de Pareto.
+
+Todas las palabras clave de todas las categorías se compilan en una sola
+expresión regular: una alternancia dentro de un lookahead, con un grupo por
+categoría en orden de prioridad. Un único recorrido del texto encuentra todas
+las posiciones donde empieza alguna palabra clave (incluso solapadas) y se
+queda con la categoría de mayor prioridad, que es exactamente lo que hacía el
+recorrido anidado categoría → palabra clave.
+
+Orden de decisión (igual que antes): reglas principales, luego humedad ≥ umbral,
+luego reglas de respaldo y por último la categoría por defecto.
+
+Como los motivos y notas se repiten muchísimo, `ClassificationCache` guarda
+el resultado por (motivo, notas, tramo de humedad) normalizados en un LRU
+acotado, con estadísticas de aciertos y persistencia opcional en JSON.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+
+def _compile(rules, regex):
+    groups = []
+    for i, (_, keys) in enumerate(rules):
+        alts = [k if regex else re.escape(k) for k in keys]
+        if alts:
+            groups.append(f"(?P<c{i}>{'|'.join(alts)})")
+    if not groups:
+        return None
+    return re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+
+def _best(pattern, text):
+    """Índice de la regla de mayor prioridad que aparece en `text` (o None)."""
+    best = None
+    for m in pattern.finditer(text):
+        i = int(m.lastgroup[1:])
+        if best is None or i < best:
+            best = i
+            if best == 0:
+                break
+    return best
+
+
+class ClassificationCache:
+    """LRU acotado de clasificaciones, con contadores de aciertos/fallos.
+
+    Solo guarda entradas calculadas con el mismo clasificador: el archivo
+    persistido lleva la huella de las reglas y se ignora si no coincide.
+    """
+
+    def __init__(self, maxsize=100_000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self.fingerprint = None
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def load(self, fingerprint):
+        self.fingerprint = fingerprint
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('fingerprint') != fingerprint:
+            return
+        for motivo, notas, high, cat in data['entries'][-self.maxsize:]:
+            self._data[(motivo, notas, high)] = cat
+
+    def save(self):
+        if not self.path:
+            return
+        entries = [[m, n, h, cat] for (m, n, h), cat in self._data.items()]
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class KeywordClassifier:
+    """Clasifica filas (`motivo_parada`, `notas`, `humedad_pct`) en categorías de Pareto.
+
+    `rules` y `fallback` son listas ordenadas de (categoría, [palabras clave]);
+    con `regex=True` las palabras clave son expresiones regulares, si no se
+    buscan como subcadenas literales. `strip` replica la normalización de cada
+    script (recortar espacios antes de unir motivo y notas).
+    """
+
+    def __init__(self, rules, fallback=(), default='Otros motivos', regex=False, strip=False,
+                 humidity_category='Humedad alta', humidity_threshold=15):
+        self.rules = list(rules)
+        self.fallback = list(fallback)
+        self.default = default
+        self.strip = strip
+        self.humidity_category = humidity_category
+        self.humidity_threshold = humidity_threshold
+        self.regex = regex
+        self._main = _compile(self.rules, regex)
+        self._fallback = _compile(self.fallback, False)
+        self.cache = None
+
+    def fingerprint(self):
+        spec = [self.rules, self.fallback, self.default, self.regex, self.strip,
+                self.humidity_category, self.humidity_threshold]
+        return hashlib.sha1(json.dumps(spec, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def enable_cache(self, maxsize=100_000, path=None):
+        """Activa el caché de resultados (y lo carga de `path` si existe)."""
+        self.cache = ClassificationCache(maxsize, path)
+        self.cache.load(self.fingerprint())
+        return self.cache
+
+    def _normalize_parts(self, motivo, notas):
+        motivo = (motivo or '')
+        notas = (notas or '')
+        if self.strip:
+            motivo, notas = motivo.strip(), notas.strip()
+        return motivo.lower(), notas.lower()
+
+    def normalize(self, motivo, notas):
+        return ' '.join(self._normalize_parts(motivo, notas))
+
+    def humidity_high(self, humedad):
+        try:
+            return float(humedad or 0) >= self.humidity_threshold
+        except (TypeError, ValueError):
+            return False
+
+    def classify_text(self, text, humidity_high):
+        if self._main is not None:
+            i = _best(self._main, text)
+            if i is not None:
+                return self.rules[i][0]
+        # Si no coincide con keywords, revisar humedad_pct alta
+        if humidity_high:
+            return self.humidity_category
+        if self._fallback is not None:
+            i = _best(self._fallback, text)
+            if i is not None:
+                return self.fallback[i][0]
+        return self.default
+
+    def classify_parts(self, motivo, notas, humedad):
+        m, n = self._normalize_parts(motivo, notas)
+        high = self.humidity_high(humedad)
+        cache = self.cache
+        if cache is None:
+            return self.classify_text(' '.join([m, n]), high)
+        key = (m, n, high)
+        cat = cache.get(key)
+        if cat is None:
+            cat = self.classify_text(' '.join([m, n]), high)
+            cache.put(key, cat)
+        return cat
+
+    def classify(self, row):
+        return self.classify_parts(row.get('motivo_parada'), row.get('notas'), row.get('humedad_pct'))
+
+    def classify_many(self, motivos, notas, humedades):
+        """Clasifica columnas completas; devuelve la lista de categorías."""
+        classify_parts = self.classify_parts
+        return [classify_parts(m, n, h) for m, n, h in zip(motivos, notas, humedades)]
+
+    def classify_rows(self, rows):
+        rows = rows if isinstance(rows, list) else list(rows)
+        return self.classify_many([r.get('motivo_parada') for r in rows],
+                                  [r.get('notas') for r in rows],
+                                  [r.get('humedad_pct') for r in rows])
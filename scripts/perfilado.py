@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Instrumentación opcional: tiempos por etapa, contadores y cProfile, con traza JSON.
+
+Se activa con `--profile` en cualquier script o con la variable de entorno
+`HARINA_PROFILE` (`1` = tiempos y contadores, `cprofile` = además un perfil
+cProfile por etapa). La traza se escribe al terminar el proceso en
+`data/.profile/<script>-<pid>-<hora>.json` (el directorio se cambia con
+`HARINA_PROFILE_DIR`; `--profile-out` fija el archivo). Como la variable de
+entorno se hereda, con ella también quedan trazas de los subprocesos (p. ej.
+cada etapa de `pipeline.py`).
+
+Uso en un script:
+
+    from perfilado import stage, count, add_profile_args, setup_profile
+    ...
+    with stage('load'):
+        rows = load(...)
+        count('rows', len(rows))
+
+Desactivada, `stage` devuelve siempre el mismo contexto vacío y `count` no
+hace nada: el costo es una consulta a una variable global por llamada.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+
+ENV = 'HARINA_PROFILE'
+ENV_DIR = 'HARINA_PROFILE_DIR'
+DEFAULT_DIR = 'data/.profile'
+TOP_FUNCIONES = 15
+
+_ACTIVE = None
+
+
+class _Nulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Etapa:
+    __slots__ = ('traza', 'nombre', 'padre', 'contadores', 't0', 'cpu0', 'perfil')
+
+    def __init__(self, traza, nombre):
+        self.traza = traza
+        self.nombre = nombre
+        self.padre = None
+        self.contadores = {}
+        self.perfil = None
+
+    def __enter__(self):
+        tr = self.traza
+        self.padre = tr.actual
+        tr.actual = self
+        if tr.cprofile and self.padre is None:
+            # cProfile no admite perfiles anidados activos: solo las etapas de primer nivel
+            import cProfile
+            self.perfil = cProfile.Profile()
+            self.perfil.enable()
+        self.cpu0 = time.process_time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        secs = time.perf_counter() - self.t0
+        cpu = time.process_time() - self.cpu0
+        tr = self.traza
+        tr.actual = self.padre
+        registro = {
+            'etapa': self.ruta(),
+            'inicio_s': round(self.t0 - tr.t0, 6),
+            'segundos': round(secs, 6),
+            'cpu_segundos': round(cpu, 6),
+            'contadores': self.contadores,
+            'por_segundo': {k: round(v / secs, 1) for k, v in self.contadores.items() if secs > 0},
+        }
+        if self.perfil is not None:
+            self.perfil.disable()
+            registro['cprofile'] = tr.guardar_perfil(self)
+        tr.etapas.append(registro)
+        return False
+
+    def ruta(self):
+        return self.nombre if self.padre is None else f'{self.padre.ruta()}/{self.nombre}'
+
+
+class Traza:
+    def __init__(self, script, cprofile=False, out=None):
+        self.script = script
+        self.cprofile = cprofile
+        self.out = out or os.path.join(os.environ.get(ENV_DIR, DEFAULT_DIR),
+                                       f'{script}-{os.getpid()}-{time.strftime("%Y%m%dT%H%M%S")}.json')
+        self.t0 = time.perf_counter()
+        self.inicio = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.actual = None
+        self.etapas = []
+        self.contadores = {}
+
+    def guardar_perfil(self, etapa):
+        """Vuelca el perfil de la etapa a `.prof` y devuelve su resumen (funciones más costosas)."""
+        import pstats
+        base = os.path.splitext(self.out)[0]
+        path = f'{base}.{etapa.nombre}.prof'
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        etapa.perfil.dump_stats(path)
+        stats = pstats.Stats(etapa.perfil).stats
+        top = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:TOP_FUNCIONES]
+        return {
+            'archivo': path,
+            'top_acumulado': [
+                {'funcion': f'{os.path.basename(fn)}:{line}({name})', 'llamadas': nc,
+                 'tottime': round(tt, 6), 'cumtime': round(ct, 6)}
+                for (fn, line, name), (cc, nc, tt, ct, _) in top
+            ],
+        }
+
+    def escribir(self):
+        os.makedirs(os.path.dirname(self.out) or '.', exist_ok=True)
+        with open(self.out, 'w') as f:
+            json.dump({
+                'script': self.script,
+                'argv': sys.argv,
+                'pid': os.getpid(),
+                'inicio': self.inicio,
+                'total_segundos': round(time.perf_counter() - self.t0, 6),
+                'contadores': self.contadores,
+                'etapas': self.etapas,
+            }, f, indent=1, ensure_ascii=False)
+        return self.out
+
+
+def enabled():
+    return _ACTIVE is not None
+
+
+def enable(script, cprofile=False, out=None):
+    """Activa la instrumentación en este proceso; la traza se escribe al salir."""
+    global _ACTIVE
+    if _ACTIVE is None:
+        _ACTIVE = Traza(script, cprofile, out)
+        atexit.register(finish)
+    return _ACTIVE
+
+
+def finish():
+    """Escribe la traza (si está activa) y desactiva la instrumentación; devuelve la ruta."""
+    global _ACTIVE
+    tr, _ACTIVE = _ACTIVE, None
+    if tr is None:
+        return None
+    path = tr.escribir()
+    print(f'Traza de perfilado: {path}', file=sys.stderr)
+    return path
+
+
+def stage(nombre):
+    """Contexto que mide una etapa (anidable)."""
+    if _ACTIVE is None:
+        return _NULO
+    return _Etapa(_ACTIVE, nombre)
+
+
+def count(nombre, n=1):
+    """Suma `n` al contador `nombre` de la etapa en curso y del total del proceso."""
+    tr = _ACTIVE
+    if tr is None:
+        return
+    tr.contadores[nombre] = tr.contadores.get(nombre, 0) + n
+    etapa = tr.actual
+    while etapa is not None:
+        etapa.contadores[nombre] = etapa.contadores.get(nombre, 0) + n
+        etapa = etapa.padre
+
+
+def count_file(path, nombre='bytes_read'):
+    """Cuenta el tamaño de un archivo leído (sin costo si está desactivada)."""
+    if _ACTIVE is not None:
+        count(nombre, os.path.getsize(path))
+
+
+def add_profile_args(parser):
+    parser.add_argument('--profile', nargs='?', const='1', default=None, choices=['1', 'cprofile'],
+                        help=f'Medir etapas y escribir traza JSON (también vía {ENV}); "cprofile" agrega perfiles')
+    parser.add_argument('--profile-out', default=None, help='Ruta de la traza JSON')
+    return parser
+
+
+def setup_profile(args, script):
+    """Activa la instrumentación según `--profile`/`--profile-out` o las variables de entorno."""
+    modo = getattr(args, 'profile', None) or os.environ.get(ENV)
+    if not modo or modo == '0':
+        return None
+    return enable(script, cprofile=(modo == 'cprofile'), out=getattr(args, 'profile_out', None))
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Orquestador del flujo completo: generación → exportes Minitab → Pareto → gráficos → indicadores.
+
+Cada etapa declara su comando, sus entradas y sus salidas; las dependencias se
+deducen de qué etapa produce cada entrada. Una etapa se reconstruye solo si
+cambió el contenido (hash SHA-256, no mtime) de alguna entrada, de su script
+o de los módulos locales que importa, o si falta o se editó alguna salida.
+Si una etapa se reconstruye pero sus salidas quedan idénticas, las etapas
+siguientes siguen al día.
+
+Las etapas independientes corren en paralelo y cada corrida deja un reporte
+de tiempos (consola y `data/.pipeline/last_run.json`). El estado vive en
+`data/.pipeline/state.json`; los hashes se memorizan por (tamaño, mtime) para
+no releer archivos que no cambiaron.
+
+Uso:
+  python3 scripts/pipeline.py                     # refresca todo lo desactualizado
+  python3 scripts/pipeline.py --dry-run           # solo muestra qué se reconstruiría
+  python3 scripts/pipeline.py graficos --force    # una etapa (y lo que necesite), forzada
+  python3 scripts/pipeline.py --generate 5000     # incluye la regeneración del dataset
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from figure_cache import local_modules
+from perfilado import ENV as PROFILE_ENV, add_profile_args, count, setup_profile, stage
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+STATE_DIR = 'data/.pipeline'
+
+DATASET = 'data/produccion_harina.csv'
+EXPORTS = 'data/minitab_exports'
+FIGS = 'data/figs'
+VARIABILIDAD = f'{EXPORTS}/minitab_molienda_variabilidad.csv'
+
+
+class Stage:
+    def __init__(self, name, script, args=(), inputs=(), outputs=(), stdout=None):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.inputs = list(inputs)
+        # con `stdout`, la salida de consola del script es el artefacto de la etapa
+        self.stdout = stdout
+        self.outputs = list(outputs) + ([stdout] if stdout else [])
+
+    @property
+    def cmd(self):
+        return [sys.executable, os.path.join('scripts', self.script)] + self.args
+
+
+def stages(generate=None, seed=42, start='2024-01-01'):
+    """Etapas del flujo. Con `generate` (n° de lotes) el dataset también se regenera (motor numpy)."""
+    lista = []
+    if generate:
+        lista.append(Stage('generar', 'generate_data.py',
+                           ['--n', str(generate), '--engine', 'numpy', '--seed', str(seed),
+                            '--start', start, '--out', DATASET],
+                           outputs=[DATASET]))
+    lista += [
+        Stage('exportar', 'export_minitab.py', ['--in', DATASET, '--out-dir', EXPORTS],
+              inputs=[DATASET],
+              outputs=[f'{EXPORTS}/{f}' for f in ('minitab_molienda_variabilidad.csv',
+                                                   'minitab_limpieza_defectos.csv',
+                                                   'minitab_operadores_desbalance.csv',
+                                                   'minitab_operadores_agg.csv',
+                                                   'minitab_operadores_concurrencia.csv')]),
+        Stage('pareto', 'generate_pareto_molienda.py', ['--in', VARIABILIDAD, '--out-dir', FIGS],
+              inputs=[VARIABILIDAD],
+              outputs=[f'{FIGS}/pareto_molienda_table.csv', f'{FIGS}/pareto_molienda.png']),
+        Stage('reclasificar', 'reclassify_pareto_molienda.py', ['--in', VARIABILIDAD, '--out-dir', FIGS],
+              inputs=[VARIABILIDAD],
+              outputs=[f'{FIGS}/pareto_molienda_reclassification_candidates.csv',
+                       f'{FIGS}/pareto_molienda_table_reclassified.csv',
+                       f'{FIGS}/pareto_molienda_reclassified.png']),
+        Stage('graficos', 'generar_graficos_minitab.py', ['--in', DATASET, '--out-dir', FIGS],
+              inputs=[DATASET],
+              outputs=[f'{FIGS}/{f}' for f in ('grafico_imr.png', 'grafico_capacidad.png',
+                                               'grafico_normalidad.png', 'grafico_boxplot_turnos.png',
+                                               'grafico_scatter_humedad.png')]),
+        Stage('indicadores', 'calcular_indicadores_lss.py', ['--in', DATASET],
+              inputs=[DATASET], stdout='data/analysis/indicadores_lss.txt'),
+        Stage('analizar', 'analyze_data.py', ['--in', DATASET, '--out', 'data/analysis_report.md'],
+              inputs=[DATASET], outputs=['data/analysis_report.md']),
+    ]
+    return lista
+
+
+def dependencies(lista):
+    """etapa → conjunto de etapas que producen alguna de sus entradas."""
+    productor = {out: s.name for s in lista for out in s.outputs}
+    return {s.name: {productor[i] for i in s.inputs if i in productor} for s in lista}
+
+
+class Hasher:
+    """SHA-256 de archivos, memorizado por (tamaño, mtime_ns) entre corridas."""
+
+    def __init__(self, memo=None):
+        self.memo = {} if memo is None else memo
+
+    def __call__(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        firma = [st.st_size, st.st_mtime_ns]
+        m = self.memo.get(path)
+        if m and m[:2] == firma:
+            return m[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        self.memo[path] = firma + [h.hexdigest()]
+        return h.hexdigest()
+
+
+def stage_key(stage, file_hash):
+    """Clave de la etapa: comando + contenido de entradas y del código que la ejecuta."""
+    h = hashlib.sha256(json.dumps(stage.cmd[1:]).encode('utf-8'))
+    for path in stage.inputs + local_modules(stage.script):
+        h.update(f'\0{path}\0{file_hash(path)}'.encode('utf-8'))
+    return h.hexdigest()
+
+
+def is_stale(stage, key, record, file_hash):
+    if record is None or record.get('key') != key:
+        return True
+    return any(file_hash(out) is None or file_hash(out) != record['outputs'].get(out)
+               for out in stage.outputs)
+
+
+def _run(stage):
+    t0 = time.perf_counter()
+    for out in stage.outputs:
+        os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    if stage.stdout:
+        with open(stage.stdout + '.tmp', 'w') as f:
+            proc = subprocess.run(stage.cmd, stdout=f, stderr=subprocess.PIPE, text=True)
+        if proc.returncode == 0:
+            os.replace(stage.stdout + '.tmp', stage.stdout)
+        else:
+            os.remove(stage.stdout + '.tmp')
+    else:
+        proc = subprocess.run(stage.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return proc.returncode, proc.stderr, time.perf_counter() - t0
+
+
+def run(lista, state, jobs=None, force=False, dry_run=False, log=print):
+    """Ejecuta las etapas desactualizadas respetando el DAG; devuelve el reporte por etapa."""
+    deps = dependencies(lista)
+    por_nombre = {s.name: s for s in lista}
+    file_hash = Hasher(state.setdefault('hashes', {}))
+    registros = state.setdefault('stages', {})
+    reporte = {}
+    pendientes = dict(deps)
+    en_curso = {}
+
+    def listas():
+        return [n for n, d in pendientes.items() if all(x in reporte for x in d)]
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while pendientes or en_curso:
+            for name in listas():
+                del pendientes[name]
+                stage = por_nombre[name]
+                if any(reporte[d]['estado'] in ('falló', 'omitida') for d in deps[name]):
+                    reporte[name] = {'estado': 'omitida', 'segundos': 0.0}
+                    log(f'[{name}] omitida: falló una etapa previa')
+                    continue
+                key = stage_key(stage, file_hash)
+                if not force and not is_stale(stage, key, registros.get(name), file_hash):
+                    reporte[name] = {'estado': 'al día', 'segundos': 0.0}
+                    continue
+                if dry_run:
+                    reporte[name] = {'estado': 'desactualizada', 'segundos': 0.0}
+                    log(f'[{name}] se reconstruiría: {" ".join(stage.cmd[1:])}')
+                    continue
+                log(f'[{name}] {" ".join(stage.cmd[1:])}')
+                en_curso[pool.submit(_run, stage)] = (stage, key)
+            if not en_curso:
+                if pendientes and not listas():
+                    raise SystemExit(f'Dependencias circulares entre: {", ".join(pendientes)}')
+                continue
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for fut in hechos:
+                stage, key = en_curso.pop(fut)
+                code, err, secs = fut.result()
+                if code == 0:
+                    registros[stage.name] = {
+                        'key': key,
+                        'outputs': {out: file_hash(out) for out in stage.outputs},
+                    }
+                    reporte[stage.name] = {'estado': 'ok', 'segundos': secs}
+                else:
+                    registros.pop(stage.name, None)
+                    reporte[stage.name] = {'estado': 'falló', 'segundos': secs, 'error': err.strip()[-2000:]}
+                    log(f'[{stage.name}] falló (código {code}):\n{err.strip()}')
+    return reporte
+
+
+def select(lista, targets):
+    """Restringe `lista` a las etapas `targets` y todas sus dependencias."""
+    if not targets:
+        return lista
+    deps = dependencies(lista)
+    elegidas, pila = set(), list(targets)
+    while pila:
+        n = pila.pop()
+        if n not in deps:
+            raise SystemExit(f'Etapa desconocida: {n} (disponibles: {", ".join(deps)})')
+        if n not in elegidas:
+            elegidas.add(n)
+            pila += deps[n]
+    return [s for s in lista if s.name in elegidas]
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('targets', nargs='*', help='Etapas a refrescar (por defecto todas)')
+    p.add_argument('--generate', type=int, default=None, metavar='N',
+                   help='Incluir la regeneración del dataset con N lotes (motor numpy, reproducible)')
+    p.add_argument('--seed', type=int, default=42, help='Semilla de la generación')
+    p.add_argument('--start', default='2024-01-01', help='Fecha de inicio de la generación')
+    p.add_argument('--jobs', type=int, default=None, help='Etapas simultáneas (por defecto núcleos de CPU)')
+    p.add_argument('--force', action='store_true', help='Reconstruir aunque esté al día')
+    p.add_argument('--dry-run', action='store_true', help='Mostrar qué se reconstruiría sin ejecutar')
+    add_profile_args(p)
+    args = p.parse_args()
+
+    os.chdir(ROOT)
+    if setup_profile(args, 'pipeline'):
+        # las etapas heredan la variable y dejan su propia traza
+        os.environ[PROFILE_ENV] = args.profile or os.environ[PROFILE_ENV]
+    state_path = os.path.join(STATE_DIR, 'state.json')
+    state = load_state(state_path)
+    lista = select(stages(args.generate, args.seed, args.start), args.targets)
+
+    t0 = time.perf_counter()
+    with stage('run'):
+        reporte = run(lista, state, args.jobs, args.force, args.dry_run)
+        count('stages_rebuilt', sum(r['estado'] == 'ok' for r in reporte.values()))
+    total = time.perf_counter() - t0
+
+    print('\nEtapa            Estado          Tiempo')
+    for s in lista:
+        r = reporte[s.name]
+        print(f"  {s.name:<14} {r['estado']:<14} {r['segundos']:7.2f} s")
+    print(f"  {'total (pared)':<14} {'':<14} {total:7.2f} s")
+
+    if not args.dry_run:
+        save_state(state, state_path)
+        with open(os.path.join(STATE_DIR, 'last_run.json'), 'w') as f:
+            json.dump({'inicio': time.strftime('%Y-%m-%dT%H:%M:%S'), 'total_segundos': total,
+                       'etapas': reporte}, f, indent=1, ensure_ascii=False)
+    sys.exit(1 if any(r['estado'] == 'falló' for r in reporte.values()) else 0)
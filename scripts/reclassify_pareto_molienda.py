@@ -10,10 +10,16 @@ Este script no modifica el CSV original.
 """
 import csv
 import os
-import re
+import argparse
 from collections import Counter, OrderedDict
+import matplotlib
 import matplotlib.pyplot as plt
 
+from eventos import read_records
+from figure_cache import DEFAULT_ROOT as FIG_CACHE_ROOT, FigureCache, source_version
+from pareto_classifier import KeywordClassifier
+from perfilado import add_profile_args, count, count_file, setup_profile, stage
+
 INPUT = 'data/minitab_exports/minitab_molienda_variabilidad.csv'
 OUT_DIR = 'data/figs'
 os.makedirs(OUT_DIR, exist_ok=True)
@@ -29,61 +35,47 @@ KEYWORDS = {
 }
 
 
+# look for common short words (solo si no hubo keyword ni humedad alta)
+FALLBACK = [
+    ('Mantenimiento correctivo', ['mante']),
+    ('Falla eléctrica', ['falla', 'elect']),
+    ('Calibración', ['calib']),
+    ('Defectos detectados', ['defect']),
+    ('Atasco / bloqueo', ['atas', 'bloq']),
+]
+
+SCRIPT_VERSION = f'{source_version(__file__)}-mpl{matplotlib.__version__}'
+
+CLASSIFIER = KeywordClassifier(list(KEYWORDS.items()), FALLBACK, default='Sin registrar', regex=True)
+
+
 def detect_category(row):
-    motivo = (row.get('motivo_parada') or '').lower()
-    notas = (row.get('notas') or '').lower()
-    text = ' '.join([motivo, notas])
-
-    # direct keyword match
-    for cat, keys in KEYWORDS.items():
-        for k in keys:
-            if re.search(k, text):
-                return cat
-
-    # humidity threshold
-    try:
-        hum = float(row.get('humedad_pct') or 0)
-        if hum >= 15:
-            return 'Humedad alta'
-    except:
-        pass
-
-    # look for common short words
-    if 'mante' in text:
-        return 'Mantenimiento correctivo'
-    if 'falla' in text or 'elect' in text:
-        return 'Falla eléctrica'
-    if 'calib' in text:
-        return 'Calibración'
-    if 'defect' in text:
-        return 'Defectos detectados'
-    if 'atas' in text or 'bloq' in text:
-        return 'Atasco / bloqueo'
-
-    return 'Sin registrar'
-
-
-def main():
-    rows = list(csv.DictReader(open(INPUT)))
+    return CLASSIFIER.classify(row)
+
+
+def main(cache_file=None, fig_cache=FIG_CACHE_ROOT, infile=INPUT, out_dir=OUT_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    with stage('load'):
+        count_file(infile)
+        rows = list(read_records(infile))
+        count('rows', len(rows))
+    cache = CLASSIFIER.enable_cache(path=cache_file)
     n = len(rows)
 
     # Apply detection to all rows and collect counts
-    counts = Counter()
-    reclassified_rows = []
-    for r in rows:
-        cat = detect_category(r)
-        counts[cat] += 1
-        newrow = dict(r)
-        newrow['categoria_mapeada'] = cat
-        reclassified_rows.append(newrow)
-
-    # write candidate file with mapeo (for traceability)
-    cand_path = os.path.join(OUT_DIR, 'pareto_molienda_reclassification_candidates.csv')
-    with open(cand_path, 'w', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=list(reclassified_rows[0].keys()))
-        w.writeheader()
-        for r in reclassified_rows:
-            w.writerow(r)
+    with stage('classify'):
+        cats = list(CLASSIFIER.classify_rows(rows))
+        counts = Counter(cats)
+        count('rows_classified', n)
+
+    # write candidate file with mapeo (for traceability): fila original + categoría, sin copiar cada fila
+    cand_path = os.path.join(out_dir, 'pareto_molienda_reclassification_candidates.csv')
+    with stage('write'), open(cand_path, 'w', newline='') as f:
+        w = csv.writer(f)
+        if rows:
+            w.writerow(list(rows[0].keys()) + ['categoria_mapeada'])
+        w.writerows(r.values() + [cat] for r, cat in zip(rows, cats))
+        count('rows_written', n)
 
     # create ordered pareto
     ordered = OrderedDict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
@@ -97,7 +89,7 @@ def main():
         cum.append(s)
 
     # write pareto table reclassified
-    out_table = os.path.join(OUT_DIR, 'pareto_molienda_table_reclassified.csv')
+    out_table = os.path.join(out_dir, 'pareto_molienda_table_reclassified.csv')
     with open(out_table, 'w', newline='') as f:
         w = csv.writer(f)
         w.writerow(['Causa a Raíz', 'Frecuencia del Evento', 'Participación', 'Participación Acumulada (%)'])
@@ -105,31 +97,53 @@ def main():
             w.writerow([c, fcount, f'{p:.0f}%', f'{ac:.0f}%'])
 
     # plot
-    fig, ax1 = plt.subplots(figsize=(9,5))
-    bars = ax1.bar(labels, freqs, color='tab:blue', alpha=0.9)
-    for i, bar in enumerate(bars):
-        if i < 3:
-            bar.set_color('#0b8043')
-    ax1.set_ylabel('Frecuencia', fontweight='bold')
-    ax1.set_xlabel('Causa raíz')
-    ax1.tick_params(axis='x', rotation=25)
-    ax2 = ax1.twinx()
-    ax2.plot(labels, cum, color='#ff7f0e', marker='o', linewidth=2)
-    ax2.set_ylabel('Porcentaje acumulado (%)', fontweight='bold')
-    ax2.set_ylim(0, 105)
-    for i, (fcount, pct) in enumerate(zip(freqs, perc)):
-        ax1.text(i, fcount + max(freqs)*0.02, f'{pct:.0f}%', ha='center', fontsize=9)
-    plt.title('Pareto Reclasificado - Causas de variabilidad (Molienda)', fontsize=14, fontweight='bold')
-    plt.tight_layout()
-    out_png = os.path.join(OUT_DIR, 'pareto_molienda_reclassified.png')
-    plt.savefig(out_png, dpi=200)
-    plt.close()
+    out_png = os.path.join(out_dir, 'pareto_molienda_reclassified.png')
+    # el gráfico depende solo de las frecuencias: si no cambiaron, se reutiliza
+    figs = FigureCache(fig_cache, SCRIPT_VERSION, enabled=bool(fig_cache))
+    key = figs.key('pareto_molienda_reclassified', labels=labels, freqs=freqs, n=n)
+    hit, _ = figs.restore(key, [out_png])
+    with stage('render'):
+        if not hit:
+            fig, ax1 = plt.subplots(figsize=(9,5))
+            bars = ax1.bar(labels, freqs, color='tab:blue', alpha=0.9)
+            for i, bar in enumerate(bars):
+                if i < 3:
+                    bar.set_color('#0b8043')
+            ax1.set_ylabel('Frecuencia', fontweight='bold')
+            ax1.set_xlabel('Causa raíz')
+            ax1.tick_params(axis='x', rotation=25)
+            ax2 = ax1.twinx()
+            ax2.plot(labels, cum, color='#ff7f0e', marker='o', linewidth=2)
+            ax2.set_ylabel('Porcentaje acumulado (%)', fontweight='bold')
+            ax2.set_ylim(0, 105)
+            for i, (fcount, pct) in enumerate(zip(freqs, perc)):
+                ax1.text(i, fcount + max(freqs)*0.02, f'{pct:.0f}%', ha='center', fontsize=9)
+            plt.title('Pareto Reclasificado - Causas de variabilidad (Molienda)', fontsize=14, fontweight='bold')
+            plt.tight_layout()
+            plt.savefig(out_png, dpi=200)
+            plt.close()
+            count('figures_rendered')
+            figs.store(key, [out_png])
 
     print('Reclasificación completa.')
     print('Total filas analizadas:', n)
     for c, fcount, p, ac in zip(labels, freqs, perc, cum):
         print(f'  {c}: {fcount} ({p:.1f}%), acumulado {ac:.1f}%')
+    print('Gráfico:', out_png, '(reutilizado de la caché)' if hit else '(renderizado)')
+    cache.save()
+    st = cache.stats()
+    print(f"Caché de clasificación: {st['hits']} aciertos, {st['misses']} fallos ({st['hit_rate']:.1%}), {st['size']} entradas")
 
 
 if __name__ == '__main__':
-    main()
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', default=INPUT, help='CSV de variabilidad de molienda')
+    p.add_argument('--out-dir', dest='outdir', default=OUT_DIR, help='Directorio de salida')
+    p.add_argument('--cache-file', dest='cache_file', default=None,
+                   help='JSON donde persistir el caché de clasificaciones entre corridas')
+    p.add_argument('--fig-cache', default=FIG_CACHE_ROOT,
+                   help='Directorio de la caché de gráficos (vacío para desactivarla)')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'reclassify_pareto_molienda')
+    main(args.cache_file, args.fig_cache, args.infile, args.outdir)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Flujo cronológico de eventos desde uno o varios CSV y reproducción a N× tiempo real.
+
+`generate_data` escribe los eventos agrupados por lote (lotes en horarios
+aleatorios) y los CSV de distintas líneas o días se solapan en el tiempo. Este
+script arma un único flujo en orden estrictamente no decreciente de
+`fecha_inicio` (o `fecha_fin`, el momento en que el evento "llega"):
+
+- cada CSV se lee en tramos de a lo sumo `--memoria-mb`; cada tramo se
+  ordena en memoria y, si el archivo no entra en un solo tramo, se vuelca a
+  un run ordenado en disco (`--tmp-dir`);
+- todos los runs de todos los archivos se combinan con una mezcla k-way sobre
+  un heap (`heapq.merge`), leyendo cada run en streaming: la memoria queda
+  acotada por un tramo más una fila por run.
+
+El ordenamiento es el de `orden_externo.py`: las fechas ISO se comparan como
+texto, sin parsear, y ante empates se conserva primero el archivo listado
+antes y, dentro de él, el orden original.
+
+La reproducción espera entre eventos lo que indica la diferencia de
+timestamps dividida por `--velocidad` (0 = sin esperas) y los entrega a una
+salida: CSV (`archivo:RUTA` o `-` para la consola), socket (`tcp:HOST:PUERTO`,
+JSON por línea, compatible con `servidor_ingesta.py`) o, desde Python, una
+función (`SalidaFuncion`).
+
+Uso:
+  python3 scripts/reproducir_eventos.py --in data/produccion_harina.csv --velocidad 0 --salida archivo:data/ordenado.csv
+  python3 scripts/reproducir_eventos.py --in linea1.csv linea2.csv --campo fecha_fin --velocidad 3600 --salida tcp:127.0.0.1:7600
+"""
+import argparse
+import csv
+import json
+import os
+import select
+import socket
+import sys
+import time
+from itertools import islice
+
+from orden_externo import MEMORY_MB, ordenar_filas
+from perfilado import add_profile_args, count, setup_profile, stage
+from timeutil import epoch_seconds
+
+KEY_FIELDS = ('fecha_inicio', 'fecha_fin')
+
+
+def eventos_cronologicos(paths, campo='fecha_inicio', memoria_mb=MEMORY_MB, tmpdir=None):
+    """(header, generador de filas) de todos `paths` en orden no decreciente de `campo`.
+
+    Ordenamiento externo de `orden_externo`: las filas son listas de texto con
+    las columnas del primer archivo.
+    """
+    if campo not in KEY_FIELDS:
+        raise ValueError(f'Campo de tiempo no válido: {campo} (válidos: {", ".join(KEY_FIELDS)})')
+    return ordenar_filas(paths, [campo], memoria_mb, tmpdir=tmpdir)
+
+
+# --- Salidas
+
+class SalidaCsv:
+    """Escribe los eventos a un CSV (o a la consola con `path` '-')."""
+
+    def __init__(self, path, header):
+        self._f = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self._w = csv.writer(self._f)
+        self._w.writerow(header)
+
+    def enviar(self, fila):
+        self._w.writerow(fila)
+
+    def cerrar(self):
+        if self._f is sys.stdout:
+            self._f.flush()
+        else:
+            self._f.close()
+
+
+class SalidaSocket:
+    """Envía cada evento como una línea JSON por TCP (protocolo de `servidor_ingesta.py`).
+
+    Lee y cuenta las respuestas del servidor a medida que llegan, así el
+    servidor nunca se bloquea esperando que las consumamos.
+    """
+
+    def __init__(self, host, port, header):
+        self._sock = socket.create_connection((host, port))
+        self._header = header
+        self._resto = b''
+        self._enviados = 0
+        self.confirmados = 0
+        self.errores = 0
+
+    def _leer_respuestas(self, espera=0):
+        """Consume las respuestas disponibles; devuelve False si el servidor cerró la conexión."""
+        while select.select([self._sock], [], [], espera)[0]:
+            datos = self._sock.recv(1 << 16)
+            if not datos:
+                return False
+            *lineas, self._resto = (self._resto + datos).split(b'\n')
+            for linea in lineas:
+                r = json.loads(linea)
+                if 'ack' in r:
+                    self.confirmados = r['ack']
+                elif 'error' in r:
+                    self.errores += 1
+            espera = 0
+        return True
+
+    def enviar(self, fila):
+        self._sock.sendall(json.dumps(dict(zip(self._header, fila))).encode() + b'\n')
+        self._enviados += 1
+        if self._enviados % 100 == 0:
+            self._leer_respuestas()
+
+    def cerrar(self, espera=5.0):
+        """Avisa fin de envío y espera las confirmaciones pendientes (el servidor cierra al terminar)."""
+        self._sock.shutdown(socket.SHUT_WR)
+        limite = time.monotonic() + espera
+        while time.monotonic() < limite and self._leer_respuestas(0.1):
+            pass
+        self._sock.close()
+
+
+class SalidaFuncion:
+    """Entrega cada evento (dict columna → texto) a una función de Python."""
+
+    def __init__(self, funcion, header):
+        self._funcion = funcion
+        self._header = header
+
+    def enviar(self, fila):
+        self._funcion(dict(zip(self._header, fila)))
+
+    def cerrar(self):
+        pass
+
+
+def abrir_salida(destino, header):
+    """'-' | 'archivo:RUTA' | 'tcp:HOST:PUERTO' → salida."""
+    if destino == '-':
+        return SalidaCsv('-', header)
+    tipo, _, resto = destino.partition(':')
+    if tipo == 'archivo' and resto:
+        os.makedirs(os.path.dirname(resto) or '.', exist_ok=True)
+        return SalidaCsv(resto, header)
+    if tipo == 'tcp' and resto:
+        host, _, port = resto.rpartition(':')
+        return SalidaSocket(host or '127.0.0.1', int(port), header)
+    raise ValueError(f'Salida no válida: {destino!r} (usar -, archivo:RUTA o tcp:HOST:PUERTO)')
+
+
+# --- Reproducción
+
+def reproducir(filas, i_ts, salida, velocidad=0.0, limite=None):
+    """Entrega `filas` a `salida` respetando los intervalos entre timestamps divididos por `velocidad`.
+
+    Con `velocidad` 0 no hay esperas. Devuelve métricas: eventos, segundos,
+    span simulado y el mayor retraso respecto del horario previsto (si la
+    salida no da abasto).
+    """
+    n = 0
+    retraso_max = 0.0
+    t0 = ts0 = ts = None
+    anterior = None
+    for fila in islice(filas, limite):
+        if fila[i_ts] != anterior:
+            anterior = fila[i_ts]
+            ts = epoch_seconds(anterior)
+        if t0 is None:
+            t0, ts0 = time.perf_counter(), ts
+        if velocidad:
+            previsto = t0 + (ts - ts0) / velocidad
+            falta = previsto - time.perf_counter()
+            if falta > 0:
+                time.sleep(falta)
+            elif -falta > retraso_max:
+                retraso_max = -falta
+        salida.enviar(fila)
+        n += 1
+    segundos = time.perf_counter() - t0 if t0 is not None else 0.0
+    count('events', n)
+    return {
+        'eventos': n,
+        'segundos': round(segundos, 3),
+        'eventos_por_s': round(n / segundos, 1) if segundos else None,
+        'span_simulado_h': round((ts - ts0) / 3600, 2) if n else 0,
+        'velocidad': velocidad,
+        'retraso_max_s': round(retraso_max, 3),
+    }
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infiles', nargs='+', default=['data/produccion_harina.csv'],
+                   help='CSV de eventos (uno o varios, mismas columnas)')
+    p.add_argument('--campo', choices=KEY_FIELDS, default='fecha_inicio',
+                   help='Timestamp que ordena el flujo (fecha_fin: cuando el evento termina y se informa)')
+    p.add_argument('--velocidad', type=float, default=0,
+                   help='Múltiplo del tiempo real (3600: una hora por segundo; 0: sin esperas)')
+    p.add_argument('--salida', default='-', help='- | archivo:RUTA | tcp:HOST:PUERTO')
+    p.add_argument('--limit', type=int, default=None, help='Reproducir solo los primeros N eventos')
+    p.add_argument('--memoria-mb', type=float, default=MEMORY_MB,
+                   help='Memoria para ordenar cada tramo (más: menos runs en disco)')
+    p.add_argument('--tmp-dir', default=None, help='Directorio para los runs temporales')
+    add_profile_args(p)
+    args = p.parse_args()
+    if args.velocidad < 0 or args.memoria_mb <= 0:
+        p.error('--velocidad no puede ser negativa y --memoria-mb debe ser positivo')
+    setup_profile(args, 'reproducir_eventos')
+
+    header, filas = eventos_cronologicos(args.infiles, args.campo, args.memoria_mb, args.tmp_dir)
+    try:
+        salida = abrir_salida(args.salida, header)
+    except (ValueError, OSError) as e:
+        p.error(str(e))
+    with stage('replay'):
+        try:
+            res = reproducir(filas, header.index(args.campo), salida, args.velocidad, args.limit)
+        finally:
+            filas.close()
+            salida.cerrar()
+    if isinstance(salida, SalidaSocket):
+        res.update(confirmados=salida.confirmados, rechazados=salida.errores)
+    print(f"{res['eventos']} eventos ({res['span_simulado_h']} h simuladas) en {res['segundos']} s"
+          + (f", retraso máx {res['retraso_max_s']} s" if args.velocidad else '')
+          + (f", {res['confirmados']} confirmados / {res['rechazados']} rechazados" if 'confirmados' in res else ''),
+          file=sys.stderr)
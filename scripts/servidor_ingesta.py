@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""Servidor local de ingesta de eventos de línea (JSON por línea sobre TCP, asyncio).
+
+Las líneas de molienda envían cada actividad terminada como un objeto JSON por
+línea con las columnas de `produccion_harina.csv`. El servidor:
+
+- valida cada evento contra el esquema (`validar`): columnas exactas, tipos,
+  fechas ISO `AAAA-MM-DDTHH:MM:SS[.ffffff]` sin zona horaria (como las del
+  generador) con `fecha_fin >= fecha_inicio`, actividad/área conocidas y
+  coherentes, motivo de parada válido;
+- encola los válidos en una cola acotada (`--cola`): si el escritor no da
+  abasto, la cola se llena, el servidor deja de leer los sockets y TCP frena
+  a los clientes (contrapresión, sin memoria sin límite);
+- un único escritor agrupa los eventos en lotes (hasta `--lote` eventos o
+  `--espera-ms` de espera) y los agrega al CSV de salida con una sola
+  escritura; el `fsync` sigue la política `--fsync`:
+    lote       fsync de cada lote antes de confirmar (durable al confirmar)
+    intervalo  a lo sumo un fsync cada `--fsync-intervalo` segundos
+    nunca      lo decide el sistema operativo
+  El fsync corre en un hilo, así mientras tanto se sigue llenando la cola y el
+  siguiente lote es más grande (group commit).
+
+Respuestas (una línea JSON cada una):
+  {"ack": N}                     N eventos de esta conexión ya escritos (acumulado)
+  {"error": "...", "linea": K}   la línea K de esta conexión fue rechazada
+  {"stats": {...}}               respuesta a {"cmd": "stats"}
+
+Contadores: recibidos, aceptados, rechazados, lotes, fsyncs, bytes, profundidad
+máxima de la cola, esperas por cola llena, eventos/s y latencia recepción →
+confirmación (p50/p95/p99). Se informan cada `--reporte` segundos, a pedido y
+en `--stats` al terminar (Ctrl-C o `--duracion`).
+
+Uso:
+  python3 scripts/servidor_ingesta.py --port 7600 --out data/ingesta/produccion_linea.csv
+  python3 scripts/carga_ingesta.py --port 7600 --eventos 200000 --conexiones 4   # generador de carga
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from generate_data import ACTIVITIES, FIELDNAMES, PARADA_MOTIVOS
+from perfilado import add_profile_args, count, setup_profile
+
+DEFAULT_OUT = 'data/ingesta/produccion_linea.csv'
+DEFAULT_PORT = 7600
+QUEUE_SIZE = 50_000
+BATCH_EVENTS = 5_000
+BATCH_WAIT_MS = 5
+FSYNC_POLICIES = ('lote', 'intervalo', 'nunca')
+LATENCY_WINDOW = 100_000  # últimas latencias conservadas para los percentiles
+MAX_LINE = 64 * 1024
+
+AREA_POR_ACTIVIDAD = dict(ACTIVITIES)
+ENTEROS = ('duracion_min', 'rendimiento_kg', 'defectos_kg', 'operadores')
+TEXTOS = ('lote_id', 'motivo_parada', 'notas')
+_CAMPOS = frozenset(FIELDNAMES)
+# formato de `datetime.isoformat()` en generate_data: local, sin zona horaria
+_FECHA_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{6})?', re.ASCII)
+
+
+def _entero(campo, v):
+    if isinstance(v, bool) or not isinstance(v, (int, str)):
+        raise ValueError(f'{campo}: se esperaba un entero')
+    try:
+        n = int(v)
+    except ValueError:
+        raise ValueError(f'{campo}: se esperaba un entero') from None
+    if n < 0:
+        raise ValueError(f'{campo}: no puede ser negativo')
+    return n
+
+
+def _fecha(campo, v):
+    if not isinstance(v, str) or not _FECHA_RE.fullmatch(v):
+        raise ValueError(f'{campo}: se esperaba una fecha ISO AAAA-MM-DDTHH:MM:SS[.ffffff] sin zona ({v!r})')
+    try:
+        return datetime.fromisoformat(v)
+    except ValueError:
+        raise ValueError(f'{campo}: fecha ISO no válida ({v!r})') from None
+
+
+def validar(ev):
+    """Valida un evento (dict decodificado del JSON) y devuelve la fila del CSV en el orden de `FIELDNAMES`.
+
+    Levanta ValueError con un mensaje legible si el evento no cumple el esquema.
+    """
+    if not isinstance(ev, dict):
+        raise ValueError('se esperaba un objeto JSON')
+    claves = ev.keys()
+    if claves != _CAMPOS:
+        faltan = [c for c in FIELDNAMES if c not in ev]
+        sobran = sorted(claves - _CAMPOS)
+        raise ValueError('; '.join(filter(None, [faltan and f'faltan columnas: {", ".join(faltan)}',
+                                                 sobran and f'columnas desconocidas: {", ".join(sobran)}'])))
+    for c in TEXTOS:
+        if not isinstance(ev[c], str):
+            raise ValueError(f'{c}: se esperaba texto')
+    if not ev['lote_id']:
+        raise ValueError('lote_id: vacío')
+    inicio = _fecha('fecha_inicio', ev['fecha_inicio'])
+    if _fecha('fecha_fin', ev['fecha_fin']) < inicio:
+        raise ValueError('fecha_fin anterior a fecha_inicio')
+    act, area = ev['actividad'], ev['area']
+    if act not in AREA_POR_ACTIVIDAD:
+        raise ValueError(f'actividad desconocida: {act!r}')
+    if AREA_POR_ACTIVIDAD[act] != area:
+        raise ValueError(f'área {area!r} no corresponde a {act} ({AREA_POR_ACTIVIDAD[act]})')
+    enteros = {c: _entero(c, ev[c]) for c in ENTEROS}
+    if enteros['operadores'] < 1:
+        raise ValueError('operadores: debe ser al menos 1')
+    hum = ev['humedad_pct']
+    if isinstance(hum, bool) or not isinstance(hum, (int, float, str)):
+        raise ValueError('humedad_pct: se esperaba un número')
+    try:
+        hum = float(hum)
+    except ValueError:
+        raise ValueError('humedad_pct: se esperaba un número') from None
+    if not 0 <= hum <= 100:
+        raise ValueError('humedad_pct: fuera de 0-100')
+    if ev['motivo_parada'] not in PARADA_MOTIVOS:
+        raise ValueError(f'motivo_parada desconocido: {ev["motivo_parada"]!r}')
+    return (ev['lote_id'], ev['fecha_inicio'], ev['fecha_fin'], act, area,
+            enteros['duracion_min'], enteros['rendimiento_kg'], hum, enteros['defectos_kg'],
+            ev['motivo_parada'], enteros['operadores'], ev['notas'])
+
+
+def percentil(ordenados, q):
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(q * len(ordenados)) - 1))]
+
+
+class Metricas:
+    """Contadores de rendimiento del servidor."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.recibidos = 0
+        self.aceptados = 0
+        self.rechazados = 0
+        self.escritos = 0
+        self.lotes = 0
+        self.fsyncs = 0
+        self.bytes = 0
+        self.cola_max = 0
+        self.esperas_cola = 0
+        self.conexiones = 0
+        self.latencias = deque(maxlen=LATENCY_WINDOW)
+        self._ultimo = (self.t0, 0)
+
+    def snapshot(self):
+        ahora = time.perf_counter()
+        t_prev, n_prev = self._ultimo
+        self._ultimo = (ahora, self.escritos)
+        lat = sorted(self.latencias)
+        ms = lambda s: None if s is None else round(s * 1000, 3)
+        return {
+            'segundos': round(ahora - self.t0, 3),
+            'conexiones': self.conexiones,
+            'recibidos': self.recibidos,
+            'aceptados': self.aceptados,
+            'rechazados': self.rechazados,
+            'escritos': self.escritos,
+            'lotes': self.lotes,
+            'eventos_por_lote': round(self.escritos / self.lotes, 1) if self.lotes else 0,
+            'fsyncs': self.fsyncs,
+            'bytes': self.bytes,
+            'cola_max': self.cola_max,
+            'esperas_cola': self.esperas_cola,
+            'eventos_por_s': round(self.escritos / max(ahora - self.t0, 1e-9), 1),
+            'eventos_por_s_reciente': round((self.escritos - n_prev) / max(ahora - t_prev, 1e-9), 1),
+            'latencia_ms': {'p50': ms(percentil(lat, 0.50)), 'p95': ms(percentil(lat, 0.95)),
+                            'p99': ms(percentil(lat, 0.99)), 'max': ms(lat[-1] if lat else None)},
+        }
+
+
+class Conexion:
+    __slots__ = ('writer', 'tarea', 'lineas', 'aceptados', 'confirmados', 'al_dia')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.tarea = asyncio.current_task()
+        self.lineas = 0
+        self.aceptados = 0
+        self.confirmados = 0
+        self.al_dia = asyncio.Event()
+
+    def responder(self, obj):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(obj, ensure_ascii=False).encode() + b'\n')
+
+
+class ServidorIngesta:
+    """Recibe, valida, agrupa y agrega eventos al CSV de salida."""
+
+    def __init__(self, out=DEFAULT_OUT, cola=QUEUE_SIZE, lote=BATCH_EVENTS, espera_ms=BATCH_WAIT_MS,
+                 fsync='lote', fsync_intervalo=1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'Política de fsync desconocida: {fsync} (válidas: {", ".join(FSYNC_POLICIES)})')
+        self.out = out
+        self.cola = asyncio.Queue(maxsize=cola)
+        self.lote = lote
+        self.espera = espera_ms / 1000
+        self.fsync = fsync
+        self.fsync_intervalo = fsync_intervalo
+        self.metricas = Metricas()
+        self._archivo = None
+        self._ultimo_fsync = time.monotonic()
+        self._escritor = None
+        self.conexiones = set()
+
+    # --- archivo
+
+    def _abrir(self):
+        os.makedirs(os.path.dirname(self.out) or '.', exist_ok=True)
+        nuevo = not os.path.exists(self.out) or os.path.getsize(self.out) == 0
+        self._archivo = open(self.out, 'a', newline='')
+        if nuevo:
+            csv.writer(self._archivo).writerow(FIELDNAMES)
+            self._archivo.flush()
+
+    async def _sincronizar(self, forzar=False):
+        ahora = time.monotonic()
+        if forzar or self.fsync == 'lote' or (
+                self.fsync == 'intervalo' and ahora - self._ultimo_fsync >= self.fsync_intervalo):
+            # en un hilo: el bucle sigue leyendo sockets y llenando la cola mientras tanto
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._archivo.fileno())
+            self._ultimo_fsync = ahora
+            self.metricas.fsyncs += 1
+
+    # --- escritor
+
+    async def _tomar_lote(self):
+        """Espera el primer evento y junta los siguientes hasta `lote` o hasta vencer la espera."""
+        cola = self.cola
+        items = [await cola.get()]
+        limite = time.monotonic() + self.espera
+        while len(items) < self.lote:
+            if cola.empty():
+                resto = limite - time.monotonic()
+                if resto <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(cola.get(), resto))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                items.append(cola.get_nowait())
+        return items
+
+    async def _escribir(self):
+        m = self.metricas
+        while True:
+            items = await self._tomar_lote()
+            buf = io.StringIO()
+            csv.writer(buf).writerows(fila for _, fila, _ in items)
+            datos = buf.getvalue()
+            self._archivo.write(datos)
+            self._archivo.flush()
+            await self._sincronizar()
+            ahora = time.perf_counter()
+            por_conexion = {}
+            for conn, _, t in items:
+                por_conexion[conn] = por_conexion.get(conn, 0) + 1
+                m.latencias.append(ahora - t)
+            for conn, n in por_conexion.items():
+                conn.confirmados += n
+                conn.responder({'ack': conn.confirmados})
+                if conn.confirmados == conn.aceptados:
+                    conn.al_dia.set()
+            m.escritos += len(items)
+            m.lotes += 1
+            m.bytes += len(datos)
+            count('eventos_escritos', len(items))
+            for _ in items:
+                self.cola.task_done()
+
+    # --- conexiones
+
+    async def atender(self, reader, writer):
+        m = self.metricas
+        conn = Conexion(writer)
+        self.conexiones.add(conn)
+        m.conexiones += 1
+        cola = self.cola
+        try:
+            while True:
+                try:
+                    linea = await reader.readline()
+                except ValueError as e:  # línea más larga que MAX_LINE
+                    conn.responder({'error': str(e), 'linea': conn.lineas + 1})
+                    break
+                if not linea:
+                    break
+                t = time.perf_counter()
+                conn.lineas += 1
+                if not linea.strip():
+                    continue
+                try:
+                    ev = json.loads(linea)
+                except Exception as e:  # JSON inválido o demasiado anidado
+                    ev = e
+                if isinstance(ev, dict) and 'cmd' in ev:
+                    self._comando(conn, ev)
+                    continue
+                m.recibidos += 1
+                try:
+                    if isinstance(ev, Exception):
+                        raise ev
+                    fila = validar(ev)
+                except Exception as e:  # una línea mala se rechaza sin cortar la conexión
+                    m.rechazados += 1
+                    conn.responder({'error': str(e) or type(e).__name__, 'linea': conn.lineas})
+                    continue
+                m.aceptados += 1
+                conn.aceptados += 1
+                if cola.full():
+                    m.esperas_cola += 1
+                # con la cola llena se bloquea acá: no se lee más del socket (contrapresión)
+                await cola.put((conn, fila, t))
+                if cola.qsize() > m.cola_max:
+                    m.cola_max = cola.qsize()
+                if writer.transport.get_write_buffer_size() > MAX_LINE:
+                    await writer.drain()
+            # confirmar lo pendiente antes de cerrar
+            while conn.confirmados < conn.aceptados:
+                conn.al_dia.clear()
+                await conn.al_dia.wait()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            m.conexiones -= 1
+            self.conexiones.discard(conn)
+            writer.close()
+
+    def _comando(self, conn, ev):
+        if ev['cmd'] == 'stats':
+            conn.responder({'stats': self.metricas.snapshot()})
+        else:
+            conn.responder({'error': f'comando desconocido: {ev["cmd"]!r}', 'linea': conn.lineas})
+
+    # --- ciclo de vida
+
+    async def iniciar(self):
+        self._abrir()
+        self._escritor = asyncio.create_task(self._escribir())
+
+    async def cerrar(self):
+        """Escribe lo que queda en la cola y hace el fsync final."""
+        await self.cola.join()
+        self._escritor.cancel()
+        try:
+            await self._escritor
+        except asyncio.CancelledError:
+            pass
+        if self.fsync != 'nunca':
+            await self._sincronizar(forzar=True)
+        self._archivo.close()
+
+
+def _reportar(m, prefijo='ingesta'):
+    s = m.snapshot()
+    lat = s['latencia_ms']
+    print(f"{prefijo}: {s['escritos']} escritos ({s['eventos_por_s_reciente']:.0f} ev/s, "
+          f"{s['eventos_por_lote']} por lote), {s['rechazados']} rechazados, cola máx {s['cola_max']}, "
+          f"latencia p50 {lat['p50']} ms p99 {lat['p99']} ms, {s['conexiones']} conexiones", file=sys.stderr)
+
+
+async def servir(args):
+    srv = ServidorIngesta(args.out, args.cola, args.lote, args.espera_ms, args.fsync, args.fsync_intervalo)
+    await srv.iniciar()
+    server = await asyncio.start_server(srv.atender, args.host, args.port, limit=MAX_LINE)
+    print(f'Escuchando en {args.host}:{args.port} → {args.out} (fsync: {args.fsync})', file=sys.stderr)
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, parar.set)
+    if args.duracion:
+        loop.call_later(args.duracion, parar.set)
+
+    async def reporte():
+        while True:
+            await asyncio.sleep(args.reporte)
+            _reportar(srv.metricas)
+
+    tarea_reporte = asyncio.create_task(reporte()) if args.reporte else None
+    await parar.wait()
+    server.close()
+    # dejar de leer de los clientes conectados, escribir y confirmar lo ya encolado, y recién ahí cortar
+    for conn in list(srv.conexiones):
+        conn.writer.transport.pause_reading()
+    await srv.cerrar()
+    abiertas = list(srv.conexiones)
+    for conn in abiertas:
+        conn.writer.close()
+    await asyncio.gather(*[c.tarea for c in abiertas], return_exceptions=True)
+    await server.wait_closed()
+    if tarea_reporte:
+        tarea_reporte.cancel()
+    stats = srv.metricas.snapshot()
+    _reportar(srv.metricas, 'final')
+    if args.stats:
+        os.makedirs(os.path.dirname(args.stats) or '.', exist_ok=True)
+        with open(args.stats, 'w') as f:
+            json.dump({'config': {k: getattr(args, k) for k in ('out', 'cola', 'lote', 'espera_ms', 'fsync',
+                                                                 'fsync_intervalo')},
+                       'metricas': stats}, f, indent=1)
+        print(f'Métricas en {args.stats}', file=sys.stderr)
+    return stats
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--host', default='127.0.0.1', help='Dirección de escucha')
+    p.add_argument('--port', type=int, default=DEFAULT_PORT, help='Puerto TCP')
+    p.add_argument('--out', default=DEFAULT_OUT, help='CSV de salida (se agrega al final; encabezado si es nuevo)')
+    p.add_argument('--cola', type=int, default=QUEUE_SIZE, help='Eventos en cola antes de frenar a los clientes')
+    p.add_argument('--lote', type=int, default=BATCH_EVENTS, help='Máximo de eventos por escritura')
+    p.add_argument('--espera-ms', type=float, default=BATCH_WAIT_MS,
+                   help='Espera máxima para completar un lote (ms)')
+    p.add_argument('--fsync', choices=FSYNC_POLICIES, default='lote', help='Política de fsync')
+    p.add_argument('--fsync-intervalo', type=float, default=1.0, help='Con --fsync intervalo: segundos entre fsync')
+    p.add_argument('--reporte', type=float, default=5.0, help='Segundos entre reportes de métricas (0: ninguno)')
+    p.add_argument('--duracion', type=float, default=None, help='Terminar tras estos segundos')
+    p.add_argument('--stats', default=None, help='JSON con la configuración y las métricas finales')
+    add_profile_args(p)
+    args = p.parse_args()
+    if args.cola < 1 or args.lote < 1:
+        p.error('--cola y --lote deben ser positivos')
+    setup_profile(args, 'servidor_ingesta')
+    asyncio.run(servir(args))
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""Simulador de eventos discretos de la planta, armado desde los diagramas BPMN.
+
+A diferencia de `generate_data.py` (cada lote por su cuenta, sin recursos
+compartidos), aquí los lotes compiten por molinos y por operadores de cada
+área, así que aparecen colas, esperas y cuellos de botella.
+
+Modelo:
+ - Secuencia de actividades: la de `generate_data.ACTIVITIES`; cada actividad
+   con diagrama en `Acondicionamiento/`, `Molienda/` o `Envasado/` toma de
+   él sus decisiones y lazos. Por cada compuerta de decisión se clasifica cada
+   rama: lazo de reproceso (la rama vuelve a la compuerta; p. ej. "No conforme
+   Ajustable" → ajuste → "Señal de reproceso" → "Tomar muestras" en
+   Control-Calidad), rechazo del lote, o continuación. Los lazos de espera por
+   disponibilidad ("¿Silos disponibles?") no se sortean: los modelan las colas.
+ - Un reproceso repite la parte de la actividad que recorre el lazo (fracción
+   de tareas del camino principal) más los temporizadores del lazo, con los
+   recursos tomados. Los temporizadores del camino principal (p. ej. reposo
+   "4h-6h" de limpieza) son esperas sin recursos antes de la actividad siguiente.
+ - Recursos: `--molinos` molinos (actividad Molienda) y `--operadores AREA=N`
+   por área; cada actividad pide los operadores que sortea `generate_row`.
+   Al liberarse recursos se atiende primero la actividad más avanzada del área.
+ - Calendario de eventos en un heap (llegada, fin de actividad, lote listo).
+
+Salida: CSV con el mismo esquema que `produccion_harina.csv` y un JSON con
+utilización de recursos, colas por actividad, throughput y tiempos de ciclo.
+
+Uso:
+  python3 scripts/simulador_planta.py --dias 365 --lotes-dia 20 --out data/simulacion/produccion_simulada.csv
+  python3 scripts/simulador_planta.py --molinos 3 --operadores Molienda=16   # probar más capacidad
+"""
+import argparse
+import csv
+import heapq
+import json
+import os
+import random
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import count as contador
+
+from eventos import Evento
+from generate_data import ACTIVITIES, FIELDNAMES, OPERADORES_AREA, generate_row
+from perfilado import add_profile_args, count, setup_profile, stage
+
+BPMN_NS = '{http://www.omg.org/spec/BPMN/20100524/MODEL}'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# actividad del registro de eventos → diagrama que la describe (Molienda no tiene diagrama propio)
+BPMN_FILES = {
+    'Limpieza': 'Acondicionamiento/limpieza-grano.bpmn',
+    'Control-Materia-Prima': 'Acondicionamiento/control-materia-prima.bpmn',
+    'Preparacion-Alimentacion-Molinos': 'Molienda/prepracion-alimentacion-molinos.bpmn',
+    'Control-Calidad-Molienda': 'Molienda/control-calidad-molienda.bpmn',
+    'Preparacion-Dosificacion': 'Envasado/preparacion-dosificacion.bpmn',
+    'Sellado-Etiquetado': 'Envasado/sellado-etiquetado.bpmn',
+}
+
+MOLINOS = 2
+EQUIPOS = {'Molienda': 'molinos'}  # actividad → recurso de equipo que ocupa
+LOTES_DIA = 20
+PROB_REPROCESO = 0.03  # por compuerta con lazo de reproceso
+PROB_RECHAZO = 0.01  # por compuerta con rama de rechazo
+
+ESPERA_RE = re.compile(r'disponib', re.I)
+RECHAZO_RE = re.compile(r'rechaz', re.I)
+NOTA_REPROCESO = 'Reproceso'
+NOTA_RECHAZO = 'Lote rechazado'
+
+
+# --- Modelo desde BPMN
+
+def timer_minutes(nombre):
+    """Minutos de un temporizador según su etiqueta ('15 min.', 'Timer 20 min.', '4h-6h' → 300)."""
+    texto = (nombre or '').lower()
+    m = re.search(r'(\d+)\s*h?\s*-\s*(\d+)\s*h', texto)
+    if m:
+        return (int(m.group(1)) + int(m.group(2))) * 30
+    m = re.search(r'(\d+)\s*min', texto)
+    if m:
+        return int(m.group(1))
+    m = re.search(r'(\d+)\s*h', texto)
+    return int(m.group(1)) * 60 if m else 0
+
+
+def read_graph(path):
+    """Nodos y flujos de secuencia de un diagrama: (nombre del participante, nodos, salidas)."""
+    root = ET.parse(path).getroot()
+    participante = root.find(f'.//{BPMN_NS}participant')
+    nodos, salidas = {}, {}
+    for proc in root.iter(BPMN_NS + 'process'):
+        for el in proc:
+            tipo = el.tag[len(BPMN_NS):]
+            nombre = ' '.join((el.get('name') or '').split())
+            if tipo == 'sequenceFlow':
+                salidas.setdefault(el.get('sourceRef'), []).append((el.get('targetRef'), nombre))
+            elif tipo.endswith(('Task', 'task', 'Gateway', 'Event')):
+                timer = el.find(f'{BPMN_NS}timerEventDefinition') is not None
+                nodos[el.get('id')] = {
+                    'tipo': tipo,
+                    'nombre': nombre,
+                    'minutos': timer_minutes(nombre) if timer else 0,
+                    'adosado': el.get('attachedToRef'),
+                }
+    # un evento de borde es una salida más de la tarea a la que está adosado
+    for nid, nodo in nodos.items():
+        if nodo['adosado']:
+            salidas.setdefault(nodo['adosado'], []).append((nid, ''))
+    nombre = participante.get('name') if participante is not None else os.path.basename(path)
+    return nombre, nodos, salidas
+
+
+def _alcanzables(origen, salidas, parar=frozenset()):
+    """Nodos alcanzables desde `origen`; los nodos en `parar` se alcanzan pero no se expanden."""
+    vistos, pila = {origen}, [origen]
+    while pila:
+        u = pila.pop()
+        if u in parar:
+            continue
+        for v, _ in salidas.get(u, ()):
+            if v not in vistos:
+                vistos.add(v)
+                pila.append(v)
+    return vistos
+
+
+def _camino(origenes, destino, salidas, excluidas=frozenset()):
+    """Camino más corto (BFS) desde alguno de `origenes` hasta un nodo que cumpla `destino`."""
+    previo = {o: None for o in origenes}
+    cola = deque(origenes)
+    while cola:
+        u = cola.popleft()
+        if destino(u):
+            camino = []
+            while u is not None:
+                camino.append(u)
+                u = previo[u]
+            return camino[::-1]
+        for v, _ in salidas.get(u, ()):
+            if (u, v) not in excluidas and v not in previo:
+                previo[v] = u
+                cola.append(v)
+    return []
+
+
+def _es_tarea(nodo):
+    return nodo['tipo'].lower().endswith('task')
+
+
+def parse_process(actividad, path):
+    """Compila un diagrama a lo que usa el simulador.
+
+    Devuelve un dict con `nombre`, `tareas` (camino principal), `espera_min`
+    (temporizadores del camino principal) y `decisiones`: por compuerta, el
+    reproceso `(fracción de la actividad, minutos de temporizadores del lazo)`
+    si tiene un lazo, y si tiene rama de rechazo.
+    """
+    nombre, nodos, salidas = read_graph(path)
+    inicio = [n for n, d in nodos.items() if d['tipo'] == 'startEvent']
+
+    compuertas = frozenset(n for n, d in nodos.items()
+                           if d['tipo'].endswith('Gateway') and len(salidas.get(n, ())) >= 2)
+    ramas = []  # (compuerta, destino, clase)
+    for g, d in nodos.items():
+        if g not in compuertas:
+            continue
+        for v, etiqueta in salidas[g]:
+            # la rama es un lazo propio si vuelve a la compuerta sin pasar por otra decisión
+            if g in _alcanzables(v, salidas, compuertas):
+                clase = 'espera' if ESPERA_RE.search(d['nombre']) else 'reproceso'
+            elif RECHAZO_RE.search(etiqueta) or RECHAZO_RE.search(nodos.get(v, {}).get('nombre', '')):
+                clase = 'rechazo'
+            else:
+                clase = 'sigue'
+            ramas.append((g, v, clase))
+
+    # camino principal: de inicio a fin sin entrar en lazos ni rechazos
+    desvios = frozenset((g, v) for g, v, clase in ramas if clase != 'sigue')
+    principal = _camino(inicio, lambda n: nodos[n]['tipo'] == 'endEvent', salidas, desvios)
+    posicion = {n: i for i, n in enumerate(principal)}
+    tareas = [nodos[n]['nombre'] for n in principal if _es_tarea(nodos[n])]
+
+    decisiones = {}
+    for g, v, clase in ramas:
+        if clase not in ('reproceso', 'rechazo') or g not in posicion:
+            continue
+        dec = decisiones.setdefault(g, {'compuerta': nodos[g]['nombre'] or 'Decisión', 'reproceso': None,
+                                        'rechazo': False})
+        if clase == 'rechazo':
+            dec['rechazo'] = True
+            continue
+        # lazo: de la rama hasta reingresar al camino principal en o antes de la compuerta
+        lazo = _camino([v], lambda n: posicion.get(n, len(principal)) <= posicion[g], salidas)
+        reingreso = lazo[-1]
+        tramo = principal[posicion[reingreso]:posicion[g]]
+        n_tareas = sum(_es_tarea(nodos[n]) for n in lazo[:-1] + tramo)
+        fraccion = min(1.0, n_tareas / max(1, len(tareas)))
+        demora = sum(nodos[n]['minutos'] for n in lazo[:-1])
+        dec['reproceso'] = (round(fraccion, 3), demora)
+
+    return {
+        'actividad': actividad,
+        'nombre': nombre,
+        'archivo': os.path.relpath(path, ROOT),
+        'tareas': tareas,
+        'espera_min': sum(nodos[n]['minutos'] for n in principal),
+        'decisiones': [decisiones[g] for g in principal if g in decisiones],
+    }
+
+
+def load_model(root=ROOT):
+    """Modelo de la planta: por actividad de `ACTIVITIES`, su área y lo compilado de su diagrama."""
+    modelo = []
+    for actividad, area in ACTIVITIES:
+        archivo = BPMN_FILES.get(actividad)
+        if archivo and os.path.exists(os.path.join(root, archivo)):
+            proc = parse_process(actividad, os.path.join(root, archivo))
+        else:
+            proc = {'actividad': actividad, 'nombre': None, 'archivo': None, 'tareas': [],
+                    'espera_min': 0, 'decisiones': []}
+        proc['area'] = area
+        modelo.append(proc)
+    return modelo
+
+
+# --- Motor de simulación
+
+class Recurso:
+    """Recurso con capacidad finita; integra la ocupación en el tiempo para la utilización."""
+    __slots__ = ('nombre', 'capacidad', 'ocupados', 'pico', '_t', '_area')
+
+    def __init__(self, nombre, capacidad):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self.ocupados = 0
+        self.pico = 0
+        self._t = 0
+        self._area = 0
+
+    def _avanzar(self, t):
+        self._area += self.ocupados * (t - self._t)
+        self._t = t
+
+    def libres(self):
+        return self.capacidad - self.ocupados
+
+    def tomar(self, n, t):
+        self._avanzar(t)
+        self.ocupados += n
+        self.pico = max(self.pico, self.ocupados)
+
+    def soltar(self, n, t):
+        self._avanzar(t)
+        self.ocupados -= n
+
+    def resumen(self, horizonte):
+        self._avanzar(horizonte)
+        return {
+            'capacidad': self.capacidad,
+            'utilizacion': round(self._area / (self.capacidad * horizonte), 4) if horizonte else 0.0,
+            'ocupacion_media': round(self._area / horizonte, 3) if horizonte else 0.0,
+            'pico': self.pico,
+        }
+
+
+class Cola:
+    """Cola FIFO de una actividad, con largo medio ponderado en el tiempo y esperas."""
+    __slots__ = ('items', 'esperas', 'pico', '_t', '_area')
+
+    def __init__(self):
+        self.items = deque()
+        self.esperas = []
+        self.pico = 0
+        self._t = 0
+        self._area = 0
+
+    def _avanzar(self, t):
+        self._area += len(self.items) * (t - self._t)
+        self._t = t
+
+    def poner(self, trabajo, t):
+        self._avanzar(t)
+        self.items.append(trabajo)
+        self.pico = max(self.pico, len(self.items))
+
+    def sacar(self, t):
+        self._avanzar(t)
+        trabajo = self.items.popleft()
+        self.esperas.append(t - trabajo[1])
+        return trabajo
+
+    def resumen(self, horizonte):
+        self._avanzar(horizonte)
+        esperas = sorted(self.esperas)
+        n = len(esperas)
+        return {
+            'atendidos': n,
+            'espera_media_min': round(sum(esperas) / n, 2) if n else 0.0,
+            'espera_p95_min': esperas[min(n - 1, int(0.95 * n))] if n else 0,
+            'espera_max_min': esperas[-1] if n else 0,
+            'largo_medio': round(self._area / horizonte, 3) if horizonte else 0.0,
+            'largo_max': self.pico,
+            'en_cola_al_final': len(self.items),
+        }
+
+
+LLEGADA, FIN, LISTO = 0, 1, 2
+
+
+class Planta:
+    """Simulación de eventos discretos sobre el modelo de `load_model`."""
+
+    def __init__(self, modelo, molinos=MOLINOS, operadores=None, lotes_dia=LOTES_DIA,
+                 prob_reproceso=PROB_REPROCESO, prob_rechazo=PROB_RECHAZO, seed=42, start=None):
+        self.modelo = modelo
+        operadores = {**OPERADORES_AREA, **(operadores or {})}
+        self.recursos = {area: Recurso(f'operadores_{area}', n) for area, n in operadores.items()}
+        self.recursos['molinos'] = Recurso('molinos', molinos)
+        for proc in modelo:
+            maximo = 4 if proc['area'] == 'Envasado' else 6  # rangos de operadores de generate_row
+            if self.recursos[proc['area']].capacidad < maximo:
+                raise ValueError(f"{proc['area']} necesita al menos {maximo} operadores "
+                                 f"(pedido máximo de {proc['actividad']})")
+        if EQUIPOS and molinos < 1:
+            raise ValueError('Se necesita al menos un molino')
+        self.colas = [Cola() for _ in modelo]
+        self.por_area = {}
+        for i, proc in enumerate(modelo):
+            self.por_area.setdefault(proc['area'], []).append(i)
+        # primero la actividad más avanzada del área: empuja el WIP hacia la salida
+        for idx in self.por_area.values():
+            idx.reverse()
+        self.entre_llegadas = 1440 / lotes_dia
+        self.prob_reproceso = prob_reproceso
+        self.prob_rechazo = prob_rechazo
+        self.rng = random.Random(seed)
+        random.seed(seed)  # generate_row sortea con el generador global
+        self.start = start or datetime(2024, 1, 1)
+        self.calendario = []
+        self._seq = contador()
+        self.eventos = []
+        self.lotes = {'llegados': 0, 'terminados': 0, 'rechazados': 0, 'reprocesos': 0}
+        self.ciclos = []
+        self.kg_terminados = 0
+
+    def _programar(self, t, tipo, dato):
+        heapq.heappush(self.calendario, (t, next(self._seq), tipo, dato))
+
+    def _fecha(self, t):
+        return (self.start + timedelta(minutes=t)).isoformat()
+
+    def _encolar(self, lote, i, t, reproceso=None):
+        """Pone el lote en la cola de la actividad `i` con su fila ya sorteada (duración y operadores)."""
+        proc = self.modelo[i]
+        fila, _ = generate_row(lote['id'], proc['actividad'], proc['area'], self.start)
+        if reproceso:
+            fraccion, demora = reproceso
+            fila['duracion_min'] = max(1, round(fila['duracion_min'] * fraccion)) + demora
+            fila['notas'] = f"{fila['notas']}; {NOTA_REPROCESO}" if fila['notas'] else NOTA_REPROCESO
+        self.colas[i].poner((lote, t, fila), t)
+
+    def _despachar(self, area, t):
+        ops = self.recursos[area]
+        for i in self.por_area[area]:
+            cola = self.colas[i]
+            equipo = self.recursos.get(EQUIPOS.get(self.modelo[i]['actividad']))
+            while cola.items:
+                fila = cola.items[0][2]
+                if fila['operadores'] > ops.libres() or (equipo is not None and equipo.libres() < 1):
+                    break
+                lote, _, fila = cola.sacar(t)
+                ops.tomar(fila['operadores'], t)
+                if equipo is not None:
+                    equipo.tomar(1, t)
+                self._programar(t + fila['duracion_min'], FIN, (lote, i, fila, t))
+
+    def _terminar(self, t, lote, i, fila, inicio):
+        proc = self.modelo[i]
+        self.recursos[proc['area']].soltar(fila['operadores'], t)
+        equipo = EQUIPOS.get(proc['actividad'])
+        if equipo:
+            self.recursos[equipo].soltar(1, t)
+
+        resultado = None
+        for dec in proc['decisiones']:
+            u = self.rng.random()
+            # con rama de rechazo, [0, prob_rechazo) rechaza y el reproceso toma el tramo siguiente
+            umbral = self.prob_rechazo if dec['rechazo'] else 0.0
+            if dec['rechazo'] and u < umbral:
+                resultado = ('rechazo', None)
+                break
+            if dec['reproceso'] and u < umbral + self.prob_reproceso:
+                resultado = ('reproceso', dec['reproceso'])
+                break
+        if resultado and resultado[0] == 'rechazo':
+            fila['notas'] = f"{fila['notas']}; {NOTA_RECHAZO}" if fila['notas'] else NOTA_RECHAZO
+
+        fila['fecha_inicio'] = self._fecha(inicio)
+        fila['fecha_fin'] = self._fecha(t)
+        self.eventos.append(Evento(*[fila[k] for k in FIELDNAMES]))
+
+        if resultado is None:
+            if i + 1 < len(self.modelo):
+                self._programar(t + proc['espera_min'], LISTO, (lote, i + 1))
+            else:
+                self.lotes['terminados'] += 1
+                self.ciclos.append(t - lote['llegada'])
+                self.kg_terminados += fila['rendimiento_kg']
+        elif resultado[0] == 'reproceso':
+            self.lotes['reprocesos'] += 1
+            self._encolar(lote, i, t, resultado[1])
+        else:
+            self.lotes['rechazados'] += 1
+        self._despachar(proc['area'], t)
+
+    def run(self, dias):
+        """Simula `dias` días de producción continua; devuelve las estadísticas."""
+        horizonte = dias * 1440
+        self._programar(0, LLEGADA, None)
+        n_lote = 0
+        while self.calendario and self.calendario[0][0] <= horizonte:
+            t, _, tipo, dato = heapq.heappop(self.calendario)
+            if tipo == LLEGADA:
+                n_lote += 1
+                lote = {'id': f'L-{1000 + n_lote}', 'llegada': t}
+                self.lotes['llegados'] += 1
+                self._encolar(lote, 0, t)
+                self._despachar(self.modelo[0]['area'], t)
+                self._programar(t + max(1, round(self.rng.expovariate(1 / self.entre_llegadas))), LLEGADA, None)
+            elif tipo == FIN:
+                self._terminar(t, *dato)
+            else:
+                lote, i = dato
+                self._encolar(lote, i, t)
+                self._despachar(self.modelo[i]['area'], t)
+        count('events', len(self.eventos))
+        return self.stats(dias, horizonte)
+
+    def stats(self, dias, horizonte):
+        ciclos = sorted(self.ciclos)
+        recursos = {r.nombre: r.resumen(horizonte) for r in self.recursos.values()}
+        colas = {proc['actividad']: c.resumen(horizonte) for proc, c in zip(self.modelo, self.colas)}
+        cuello = max(recursos, key=lambda k: recursos[k]['utilizacion'])
+        return {
+            'dias': dias,
+            'inicio': self.start.isoformat(),
+            'lotes': {**self.lotes, 'en_proceso_al_final': self.lotes['llegados'] - self.lotes['terminados']
+                      - self.lotes['rechazados']},
+            'throughput_lotes_dia': round(self.lotes['terminados'] / dias, 3) if dias else 0.0,
+            'kg_terminados': self.kg_terminados,
+            'ciclo_medio_min': round(sum(ciclos) / len(ciclos), 1) if ciclos else 0.0,
+            'ciclo_p95_min': ciclos[min(len(ciclos) - 1, int(0.95 * len(ciclos)))] if ciclos else 0,
+            'recursos': recursos,
+            'colas': colas,
+            'cuello_de_botella': cuello,
+            'eventos': len(self.eventos),
+        }
+
+
+def write_events(eventos, path):
+    """Escribe el registro de eventos ordenado por inicio, con el esquema de `produccion_harina.csv`."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(FIELDNAMES)
+        w.writerows(ev.values() for ev in sorted(eventos, key=lambda ev: ev.fecha_inicio))
+
+
+def print_summary(st, modelo):
+    print(f"Simulación de {st['dias']} días desde {st['inicio']}")
+    for proc in modelo:
+        if proc['nombre']:
+            lazos = sum(1 for d in proc['decisiones'] if d['reproceso'])
+            rechazos = sum(1 for d in proc['decisiones'] if d['rechazo'])
+            print(f"  {proc['actividad']:<34} ← {proc['archivo']} ({len(proc['tareas'])} tareas, "
+                  f"{lazos} lazos de reproceso, {rechazos} rechazos, espera {proc['espera_min']} min)")
+    lotes = st['lotes']
+    print(f"\nLotes: {lotes['llegados']} llegados, {lotes['terminados']} terminados, {lotes['rechazados']} rechazados, "
+          f"{lotes['reprocesos']} reprocesos, {lotes['en_proceso_al_final']} en proceso al final")
+    print(f"Throughput: {st['throughput_lotes_dia']:.2f} lotes/día, {st['kg_terminados']} kg terminados")
+    print(f"Tiempo de ciclo: medio {st['ciclo_medio_min']:.0f} min, p95 {st['ciclo_p95_min']} min")
+    print('\nRecursos:')
+    for nombre, r in st['recursos'].items():
+        print(f"  {nombre:<30} capacidad {r['capacidad']:>3}  utilización {r['utilizacion']:6.1%}  pico {r['pico']}")
+    print('\nColas por actividad:')
+    for act, c in st['colas'].items():
+        print(f"  {act:<34} espera media {c['espera_media_min']:8.1f} min  p95 {c['espera_p95_min']:>6}  "
+              f"largo medio {c['largo_medio']:6.2f}  máx {c['largo_max']}")
+    print(f"\nCuello de botella: {st['cuello_de_botella']}")
+
+
+def _area_n(texto):
+    area, _, n = texto.partition('=')
+    if area not in OPERADORES_AREA or not n.isdigit():
+        raise argparse.ArgumentTypeError(f'Formato AREA=N con AREA en {", ".join(OPERADORES_AREA)}')
+    return area, int(n)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--dias', type=int, default=365, help='Horizonte de simulación en días')
+    p.add_argument('--lotes-dia', type=float, default=LOTES_DIA, help='Llegadas medias de lotes por día (Poisson)')
+    p.add_argument('--molinos', type=int, default=MOLINOS, help='Molinos disponibles')
+    p.add_argument('--operadores', type=_area_n, nargs='*', default=[],
+                   help=f'Operadores por área, p. ej. Molienda=16 (por defecto {OPERADORES_AREA})')
+    p.add_argument('--prob-reproceso', type=float, default=PROB_REPROCESO,
+                   help='Probabilidad de tomar cada lazo de reproceso de los diagramas')
+    p.add_argument('--prob-rechazo', type=float, default=PROB_RECHAZO,
+                   help='Probabilidad de tomar cada rama de rechazo de los diagramas')
+    p.add_argument('--seed', type=int, default=42, help='Semilla')
+    p.add_argument('--start', type=str, default='2024-01-01T00:00:00', help='Fecha ISO de inicio')
+    p.add_argument('--bpmn-root', default=ROOT, help='Directorio con Acondicionamiento/, Molienda/ y Envasado/')
+    p.add_argument('--out', default='data/simulacion/produccion_simulada.csv', help='CSV del registro de eventos')
+    p.add_argument('--stats', default='data/simulacion/estadisticas.json', help='JSON de estadísticas')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'simulador_planta')
+
+    with stage('model'):
+        modelo = load_model(args.bpmn_root)
+    try:
+        planta = Planta(modelo, args.molinos, dict(args.operadores), args.lotes_dia, args.prob_reproceso,
+                        args.prob_rechazo, args.seed, datetime.fromisoformat(args.start))
+    except ValueError as e:
+        p.error(str(e))
+    with stage('simulate'):
+        st = planta.run(args.dias)
+    with stage('write'):
+        write_events(planta.eventos, args.out)
+        os.makedirs(os.path.dirname(args.stats) or '.', exist_ok=True)
+        with open(args.stats, 'w') as f:
+            json.dump({**st, 'modelo': modelo}, f, indent=1, ensure_ascii=False)
+    print_summary(st, modelo)
+    print(f'\nEventos: {args.out}\nEstadísticas: {args.stats}')
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Monitor SPC en línea (I-MR + reglas de Nelson) sobre el log de eventos.
+
+Lee `produccion_harina.csv` a medida que crece (como `tail -f`) y mantiene,
+por actividad, una carta I-MR incremental:
+
+- Fase I: las primeras `baseline` observaciones estiman la media y el rango
+  móvil medio (MR̄); al completarse, los límites se congelan
+  (σ = MR̄/1.128, UCL/LCL = media ± 3σ, UCL_MR = 3.267·MR̄).
+- Fase II: cada punto nuevo se evalúa en O(1) contra las 8 reglas de Nelson
+  y el límite del rango móvil, usando contadores de rachas y ventanas fijas.
+
+Cada alarma se emite como una línea JSON (stdout o `--out`).
+
+Uso:
+  python3 scripts/spc_monitor.py --in data/produccion_harina.csv --from-start --once
+  python3 scripts/spc_monitor.py --in data/produccion_harina.csv --out alarmas.jsonl
+"""
+import csv
+import json
+import math
+import sys
+import time
+import argparse
+from collections import deque
+
+from perfilado import add_profile_args, count, setup_profile, stage
+
+D2 = 1.128
+D4 = 3.267
+
+NELSON = {
+    1: 'Un punto fuera de ±3σ',
+    2: '9 puntos seguidos del mismo lado de la media',
+    3: '6 puntos seguidos creciendo o decreciendo',
+    4: '14 puntos seguidos alternando arriba/abajo',
+    5: '2 de 3 puntos más allá de 2σ del mismo lado',
+    6: '4 de 5 puntos más allá de 1σ del mismo lado',
+    7: '15 puntos seguidos dentro de ±1σ',
+    8: '8 puntos seguidos fuera de ±1σ (ambos lados)',
+    'MR': 'Rango móvil sobre UCL_MR',
+}
+
+
+class _Ventana:
+    """Cuenta, en las últimas `k` observaciones, cuántas superan un umbral por cada lado."""
+    __slots__ = ('k', 'buf', 'arriba', 'abajo')
+
+    def __init__(self, k):
+        self.k = k
+        self.buf = deque()
+        self.arriba = 0
+        self.abajo = 0
+
+    def push(self, lado):
+        self.buf.append(lado)
+        if lado > 0:
+            self.arriba += 1
+        elif lado < 0:
+            self.abajo += 1
+        if len(self.buf) > self.k:
+            viejo = self.buf.popleft()
+            if viejo > 0:
+                self.arriba -= 1
+            elif viejo < 0:
+                self.abajo -= 1
+
+
+class IMRMonitor:
+    """Carta I-MR incremental de una serie, con línea base (Fase I) y reglas de Nelson (Fase II)."""
+
+    def __init__(self, baseline=30):
+        self.baseline = baseline
+        self.n = 0
+        self.suma = 0.0
+        self.suma_mr = 0.0
+        self.prev = None
+        self.limites = None
+        # estado de Fase II
+        self.lado_run = 0
+        self.lado_prev = 0
+        self.trend_run = 0
+        self.trend_dir = 0
+        self.alt_run = 0
+        self.alt_dir = 0
+        self.dentro1_run = 0
+        self.fuera1_run = 0
+        self.v3 = _Ventana(3)
+        self.v5 = _Ventana(5)
+
+    def _congelar(self):
+        center = self.suma / self.n
+        mr_bar = self.suma_mr / (self.n - 1) if self.n > 1 else 0.0
+        sigma = mr_bar / D2
+        self.limites = {
+            'center': center,
+            'sigma': sigma,
+            'ucl': center + 3 * sigma,
+            'lcl': center - 3 * sigma,
+            'mr_bar': mr_bar,
+            'ucl_mr': D4 * mr_bar,
+        }
+
+    def update(self, x):
+        """Agrega una observación; devuelve la lista de reglas violadas (vacía en Fase I)."""
+        mr = abs(x - self.prev) if self.prev is not None else None
+        prev = self.prev
+        self.prev = x
+        if self.limites is None:
+            self.n += 1
+            self.suma += x
+            if mr is not None:
+                self.suma_mr += mr
+            if self.n >= self.baseline:
+                self._congelar()
+            return []
+
+        lim = self.limites
+        c, s = lim['center'], lim['sigma']
+        if s > 0:
+            z = (x - c) / s
+        else:
+            # línea base constante (σ = 0): todo valor distinto del centro queda fuera de los límites
+            z = math.copysign(math.inf, x - c) if x != c else 0.0
+        lado = 1 if x > c else (-1 if x < c else 0)
+        reglas = []
+
+        # 1: fuera de 3σ
+        if abs(z) > 3:
+            reglas.append(1)
+        # 2: 9 seguidos del mismo lado
+        if lado != 0 and lado == self.lado_prev:
+            self.lado_run += 1
+        else:
+            self.lado_run = 1 if lado != 0 else 0
+        self.lado_prev = lado
+        if self.lado_run >= 9:
+            reglas.append(2)
+        # 3: 6 seguidos en tendencia (5 incrementos del mismo signo)
+        # 4: 14 seguidos alternando (13 cambios de signo consecutivos)
+        if prev is not None:
+            d = (x > prev) - (x < prev)
+            if d != 0 and d == self.trend_dir:
+                self.trend_run += 1
+            else:
+                self.trend_run = 1 if d != 0 else 0
+            if d != 0 and self.alt_dir != 0 and d == -self.alt_dir:
+                self.alt_run += 1
+            else:
+                self.alt_run = 1 if d != 0 else 0
+            self.trend_dir = d
+            self.alt_dir = d
+            if self.trend_run >= 5:
+                reglas.append(3)
+            if self.alt_run >= 13:
+                reglas.append(4)
+        # 5: 2 de 3 más allá de 2σ del mismo lado
+        self.v3.push(1 if z > 2 else (-1 if z < -2 else 0))
+        if abs(z) > 2 and (self.v3.arriba >= 2 if z > 0 else self.v3.abajo >= 2):
+            reglas.append(5)
+        # 6: 4 de 5 más allá de 1σ del mismo lado
+        self.v5.push(1 if z > 1 else (-1 if z < -1 else 0))
+        if abs(z) > 1 and (self.v5.arriba >= 4 if z > 0 else self.v5.abajo >= 4):
+            reglas.append(6)
+        # 7: 15 seguidos dentro de 1σ / 8: 8 seguidos fuera de 1σ
+        if abs(z) < 1:
+            self.dentro1_run += 1
+            self.fuera1_run = 0
+        else:
+            self.fuera1_run += 1
+            self.dentro1_run = 0
+        if self.dentro1_run >= 15 and s > 0:  # con σ = 0 no hay menos variación que detectar
+            reglas.append(7)
+        if self.fuera1_run >= 8:
+            reglas.append(8)
+        # rango móvil
+        if mr is not None and mr > lim['ucl_mr']:
+            reglas.append('MR')
+        return reglas
+
+
+def follow(path, from_start=True, poll=1.0, once=False):
+    """Genera líneas completas del archivo a medida que se agregan (estilo `tail -f`).
+
+    La primera línea (cabecera) se entrega siempre. Con `from_start=False`
+    el resto del contenido actual se salta y solo se leen filas nuevas; con
+    `once=True` termina al llegar al final del archivo.
+    """
+    with open(path, newline='') as f:
+        yield f.readline()
+        if not from_start:
+            f.seek(0, 2)
+        pendiente = ''
+        while True:
+            line = f.readline()
+            if not line:
+                if once:
+                    return
+                time.sleep(poll)
+                continue
+            pendiente += line
+            if not pendiente.endswith('\n'):
+                # línea a medio escribir
+                continue
+            yield pendiente
+            pendiente = ''
+
+
+def monitor(lines, out, campo='duracion_min', baseline=30):
+    """Procesa líneas CSV (la primera es la cabecera) y escribe alarmas JSON en `out`."""
+    reader = csv.reader(lines)
+    header = next(reader)
+    return monitor_rows(header, reader, out, campo, baseline)
+
+
+def monitor_rows(header, reader, out, campo='duracion_min', baseline=30):
+    """Igual que `monitor` pero sobre filas ya separadas en columnas `header`."""
+    i_act = header.index('actividad')
+    i_val = header.index(campo)
+    i_lote = header.index('lote_id')
+    i_ts = header.index('fecha_inicio')
+    monitores = {}
+    alarmas = n = 0
+    with stage('monitor'):
+        try:
+            for n, r in enumerate(reader, 1):
+                if not r:
+                    continue
+                act = r[i_act]
+                mon = monitores.get(act)
+                if mon is None:
+                    mon = monitores[act] = IMRMonitor(baseline)
+                x = float(r[i_val])
+                for regla in mon.update(x):
+                    lim = mon.limites
+                    out.write(json.dumps({
+                        'actividad': act,
+                        'lote_id': r[i_lote],
+                        'fecha_inicio': r[i_ts],
+                        'campo': campo,
+                        'valor': x,
+                        'regla': regla,
+                        'descripcion': NELSON[regla],
+                        'center': round(lim['center'], 4),
+                        'ucl': round(lim['ucl'], 4),
+                        'lcl': round(lim['lcl'], 4),
+                        'detectado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    }, ensure_ascii=False) + '\n')
+                    out.flush()
+                    alarmas += 1
+        finally:
+            count('rows', n)
+            count('alarms', alarmas)
+    return monitores, alarmas
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--in', dest='infile', required=True, help='CSV de eventos a vigilar')
+    p.add_argument('--out', dest='outfile', default=None, help='Archivo JSONL de alarmas (por defecto stdout)')
+    p.add_argument('--campo', default='duracion_min', help='Columna numérica a controlar')
+    p.add_argument('--baseline', type=int, default=30, help='Observaciones de Fase I por actividad')
+    p.add_argument('--from-start', action='store_true', help='Procesar también el contenido actual del archivo')
+    p.add_argument('--once', action='store_true', help='Terminar al llegar al final del archivo')
+    p.add_argument('--poll', type=float, default=1.0, help='Segundos entre lecturas cuando no hay datos')
+    p.add_argument('--cronologico', action='store_true',
+                   help='Procesar el contenido actual en orden de fecha_inicio (ordenamiento externo) y terminar')
+    add_profile_args(p)
+    args = p.parse_args()
+    setup_profile(args, 'spc_monitor')
+
+    out = open(args.outfile, 'a') if args.outfile else sys.stdout
+    monitores, alarmas = {}, 0
+    try:
+        if args.cronologico:
+            # el archivo está agrupado por lote: las cartas necesitan las observaciones en orden temporal
+            from orden_externo import ordenar_filas
+            header, filas = ordenar_filas(args.infile, ['fecha_inicio'])
+            monitores, alarmas = monitor_rows(header, filas, out, args.campo, args.baseline)
+        else:
+            lines = follow(args.infile, from_start=args.from_start, poll=args.poll, once=args.once)
+            monitores, alarmas = monitor(lines, out, args.campo, args.baseline)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.outfile:
+            out.close()
+    if args.once or args.cronologico:
+        print(f"{alarmas} alarmas en {len(monitores)} actividades", file=sys.stderr)
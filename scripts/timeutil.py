@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Derivación compartida de fecha y turno a partir de los timestamps ISO.
+
+Los timestamps del dataset tienen formato fijo `YYYY-MM-DDTHH:MM:SS[.ffffff]`,
+así que la fecha y el turno solo dependen del prefijo `YYYY-MM-DDTHH`; ese
+prefijo se memoiza y cada `fecha_inicio` se resuelve con un lookup en vez de
+un `datetime.fromisoformat` por llamada. Para columnas completas existe la ruta
+vectorizada `derive_arrays` (NumPy).
+
+Los límites de turno (6/14/22 h) son configurables con `boundaries`.
+"""
+from datetime import datetime
+from functools import lru_cache
+
+SHIFT_NAMES = ('Morning', 'Afternoon', 'Night')
+SHIFT_BOUNDARIES = (6, 14, 22)
+
+_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+_EPOCH = datetime(1970, 1, 1)
+
+
+def shift_from_hour(h, boundaries=SHIFT_BOUNDARIES):
+    """Turno ('Morning', 'Afternoon', 'Night') para una hora 0-23."""
+    return SHIFT_NAMES[shift_code(h, boundaries)]
+
+
+def shift_code(h, boundaries=SHIFT_BOUNDARIES):
+    """Código de turno: índice en `SHIFT_NAMES`."""
+    morning, afternoon, night = boundaries
+    if morning <= h < afternoon:
+        return 0
+    if afternoon <= h < night:
+        return 1
+    return 2
+
+
+def parse_ts(ts_iso):
+    return datetime.fromisoformat(ts_iso)
+
+
+@lru_cache(maxsize=65536)
+def _date_shift(prefix, boundaries):
+    ts = datetime.fromisoformat(prefix + ':00')
+    return ts.date().isoformat(), shift_from_hour(ts.hour, boundaries)
+
+
+def date_and_shift(ts_iso, boundaries=SHIFT_BOUNDARIES):
+    """(fecha ISO, turno) de un timestamp ISO, memoizado por fecha+hora."""
+    return _date_shift(ts_iso[:13], boundaries)
+
+
+def infer_shift(ts_iso, boundaries=SHIFT_BOUNDARIES):
+    return _date_shift(ts_iso[:13], boundaries)[1]
+
+
+@lru_cache(maxsize=65536)
+def _hour_epoch(prefix):
+    return (datetime.fromisoformat(prefix + ':00') - _EPOCH).total_seconds()
+
+
+def epoch_seconds(ts_iso):
+    """Segundos desde epoch (sin zona horaria) de un timestamp ISO, memoizado por fecha+hora."""
+    s = _hour_epoch(ts_iso[:13]) + int(ts_iso[14:16]) * 60
+    return s + float(ts_iso[17:]) if len(ts_iso) > 17 else s
+
+
+def shift_codes(hours, boundaries=SHIFT_BOUNDARIES):
+    """Versión vectorizada de `shift_code` sobre un arreglo de horas."""
+    import numpy as np
+
+    morning, afternoon, night = boundaries
+    hours = np.asarray(hours)
+    return np.where((hours >= morning) & (hours < afternoon), 0,
+                    np.where((hours >= afternoon) & (hours < night), 1, 2)).astype(np.int8)
+
+
+def derive_arrays(values, boundaries=SHIFT_BOUNDARIES):
+    """Deriva columnas de tiempo para un arreglo completo.
+
+    `values` puede ser una secuencia de textos ISO o un arreglo de enteros en
+    microsegundos desde epoch (como los guarda `columnar_cache`). Devuelve un
+    dict con arreglos `epoch_min`, `hour`, `date_ordinal` y `shift_code`.
+    """
+    import numpy as np
+
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu':
+        us = arr.astype(np.int64)
+    else:
+        us = arr.astype('datetime64[us]').astype(np.int64)
+    epoch_min = us // 60_000_000
+    hour = (epoch_min // 60) % 24
+    return {
+        'epoch_min': epoch_min,
+        'hour': hour,
+        'date_ordinal': epoch_min // 1440 + _EPOCH_ORDINAL,
+        'shift_code': shift_codes(hour, boundaries),
+    }